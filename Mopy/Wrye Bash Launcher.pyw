@@ -25,6 +25,9 @@
 """This module starts the Wrye Bash application in GUI mode."""
 
 if __name__ == '__main__':
+    # Needed for the worker processes of bash.worker_pool in standalone builds
+    import multiprocessing
+    multiprocessing.freeze_support()
     from bash import barg, bash
     opts = barg.parse()
     bash.main(opts)
@@ -20,8 +20,13 @@
 #  https://github.com/wrye-bash
 #
 # =============================================================================
+import lzma
 import os
 import re
+import struct
+import zipfile
+from lzma import LZMAError
+from zlib import crc32
 
 from . import bass
 from .bolt import FName, deprint, os_name, popen_common
@@ -163,7 +168,27 @@ def _compressionSettings(fn_archive, blockSize, isSolid):
 
 def list_archive(archive_path, parse_archive_line, __reList=reListArchive):
     """Client is responsible for closing the file ! See uses for
-    _parse_archive_line examples."""
+    _parse_archive_line examples. Zip and 7z archives are listed in-process,
+    anything else (or anything we fail to parse) is listed by 7z."""
+    if lister := _native_listers.get(os.path.splitext(
+            f'{archive_path}')[1].lower()):
+        try:
+            is_solid, entries = lister(archive_path)
+        except (_UnsupportedArchive, OSError, EOFError, LZMAError,
+                zipfile.BadZipFile, struct.error, IndexError,
+                UnicodeDecodeError) as e:
+            deprint(f'Falling back to 7z to list {archive_path}: {e!r}')
+        else:
+            # Feed the client the same keys 7z -slt would
+            parse_archive_line('Solid', '+' if is_solid else '-')
+            for entry_path, entry_size, entry_crc, entry_is_dir in entries:
+                parse_archive_line('Path', entry_path)
+                parse_archive_line('Size', f'{entry_size}')
+                parse_archive_line('Attributes', 'D' if entry_is_dir else 'A')
+                parse_archive_line('CRC', '' if entry_crc is None else
+                                   f'{entry_crc:08X}')
+                parse_archive_line('Method', '')
+            return
     command = [exe7z, 'l', '-slt', '-sccUTF-8', f'{archive_path}']
     proc = popen_common(command, encoding='utf-8')
     ins, _err = proc.communicate()
@@ -171,3 +196,328 @@ def list_archive(archive_path, parse_archive_line, __reList=reListArchive):
         maList = __reList.match(line)
         if maList:
             parse_archive_line(*(maList.groups()))
+
+# In-process listing ----------------------------------------------------------
+class _UnsupportedArchive(Exception):
+    """We can't list this archive ourselves, 7z has to do it."""
+
+def _to_os_path(entry_path: str):
+    return entry_path.replace('\\', os.sep).replace('/', os.sep)
+
+def _list_zip(archive_path):
+    """List a zip archive by reading its central directory."""
+    with zipfile.ZipFile(f'{archive_path}') as zip_file:
+        return False, [(_to_os_path(zi.filename.rstrip('/')), zi.file_size,
+                        None if zi.is_dir() else zi.CRC, zi.is_dir())
+                       for zi in zip_file.infolist()]
+
+class _7zHeaderReader:
+    """Parses the (decoded) header of a 7z archive - only what's needed to
+    list its contents is kept. See 7zFormat.txt in the 7-Zip sources."""
+    _k_end, _k_header, _k_archive_props, _k_add_streams, _k_main_streams, \
+        _k_files, _k_pack_info, _k_unpack_info, _k_substreams, _k_size, \
+        _k_crc, _k_folder, _k_unpack_sizes, _k_num_unpack_stream, \
+        _k_empty_stream, _k_empty_file, _k_anti, _k_name = range(18)
+    _k_win_attrs, _k_encoded_header, _k_dummy = 0x15, 0x17, 0x19
+    _dir_attribute = 0x10 # FILE_ATTRIBUTE_DIRECTORY
+
+    def __init__(self, header_data: bytes):
+        self._data = header_data
+        self._pos = 0
+        # Streams info
+        self.pack_pos = 0
+        self.pack_sizes = []
+        self.folders = []
+        self.folder_unpack_sizes = []
+        self.folder_crcs = []
+        self.substream_counts = []
+        self.substream_sizes = []
+        self.substream_crcs = []
+
+    def _byte(self):
+        self._pos += 1
+        return self._data[self._pos - 1]
+
+    def _bytes(self, num):
+        self._pos += num
+        if self._pos > len(self._data):
+            raise EOFError('7z header ended unexpectedly')
+        return self._data[self._pos - num:self._pos]
+
+    def _number(self):
+        first_byte, mask, num_val = self._byte(), 0x80, 0
+        for i in range(8):
+            if not first_byte & mask:
+                return num_val | ((first_byte & (mask - 1)) << (8 * i))
+            num_val |= self._byte() << (8 * i)
+            mask >>= 1
+        return num_val
+
+    def _bits(self, num_items):
+        bit_vector, bit_byte, mask = [], 0, 0
+        for _i in range(num_items):
+            if not mask:
+                bit_byte, mask = self._byte(), 0x80
+            bit_vector.append(bool(bit_byte & mask))
+            mask >>= 1
+        return bit_vector
+
+    def _defined_bits(self, num_items):
+        return [True] * num_items if self._byte() else self._bits(num_items)
+
+    def _digests(self, num_items):
+        return [struct.unpack('<I', self._bytes(4))[0] if d else None
+                for d in self._defined_bits(num_items)]
+
+    def _expect(self, prop_id):
+        if (got_id := self._byte()) != prop_id:
+            raise _UnsupportedArchive(f'Expected 7z property {prop_id}, got '
+                                      f'{got_id}')
+
+    def read_streams_info(self):
+        while (prop_id := self._byte()) != self._k_end:
+            if prop_id == self._k_pack_info:
+                self._read_pack_info()
+            elif prop_id == self._k_unpack_info:
+                self._read_unpack_info()
+            elif prop_id == self._k_substreams:
+                self._read_substreams_info()
+            else:
+                raise _UnsupportedArchive(f'Unknown 7z streams property '
+                                          f'{prop_id}')
+
+    def _read_pack_info(self):
+        self.pack_pos = self._number()
+        num_pack_streams = self._number()
+        while (prop_id := self._byte()) != self._k_end:
+            if prop_id == self._k_size:
+                self.pack_sizes = [self._number() for _i in
+                                   range(num_pack_streams)]
+            elif prop_id == self._k_crc:
+                self._digests(num_pack_streams)
+            else:
+                raise _UnsupportedArchive(f'Unknown 7z pack property '
+                                          f'{prop_id}')
+
+    def _read_unpack_info(self):
+        self._expect(self._k_folder)
+        num_folders = self._number()
+        if self._byte(): # external
+            raise _UnsupportedArchive('External 7z folders')
+        self.folders = [self._read_folder() for _i in range(num_folders)]
+        self._expect(self._k_unpack_sizes)
+        self.folder_unpack_sizes = [[self._number() for _o in range(
+            num_out)] for (_coders, num_out) in self.folders]
+        self.folder_crcs = [None] * num_folders
+        while (prop_id := self._byte()) != self._k_end:
+            if prop_id == self._k_crc:
+                self.folder_crcs = self._digests(num_folders)
+            else:
+                raise _UnsupportedArchive(f'Unknown 7z unpack property '
+                                          f'{prop_id}')
+        # Unless told otherwise, each folder holds one (whole) stream
+        self.substream_counts = [1] * num_folders
+
+    def _read_folder(self):
+        coders, total_in, total_out = [], 0, 0
+        for _i in range(self._number()):
+            coder_flags = self._byte()
+            if coder_flags & 0x80:
+                raise _UnsupportedArchive('Alternative 7z coder methods')
+            codec_id = bytes(self._bytes(coder_flags & 0x0F))
+            num_in = num_out = 1
+            if coder_flags & 0x10: # complex coder
+                num_in, num_out = self._number(), self._number()
+            coder_props = b''
+            if coder_flags & 0x20:
+                coder_props = bytes(self._bytes(self._number()))
+            coders.append((codec_id, coder_props))
+            total_in += num_in
+            total_out += num_out
+        num_bind_pairs = total_out - 1
+        for _i in range(2 * num_bind_pairs):
+            self._number()
+        if (num_packed := total_in - num_bind_pairs) > 1:
+            for _i in range(num_packed):
+                self._number()
+        return coders, total_out
+
+    def _folder_unpack_size(self, folder_dex):
+        # The main (last) output stream holds the folder's unpacked data
+        return self.folder_unpack_sizes[folder_dex][-1]
+
+    def _read_substreams_info(self):
+        num_folders = len(self.folders)
+        prop_id = self._byte()
+        if prop_id == self._k_num_unpack_stream:
+            self.substream_counts = [self._number() for _i in
+                                     range(num_folders)]
+            prop_id = self._byte()
+        has_sizes = prop_id == self._k_size
+        self.substream_sizes = []
+        for folder_dex, num_substreams in enumerate(self.substream_counts):
+            if not num_substreams: continue
+            folder_sizes = [self._number() for _i in range(
+                num_substreams - 1)] if has_sizes else []
+            folder_sizes.append(self._folder_unpack_size(folder_dex) - sum(
+                folder_sizes))
+            self.substream_sizes.extend(folder_sizes)
+        if has_sizes:
+            prop_id = self._byte()
+        # Folders holding a single stream with a known CRC don't list it again
+        known_crcs = [self.folder_crcs[f] if c == 1 else None for f, c in
+                      enumerate(self.substream_counts) for _i in range(c)]
+        self.substream_crcs = known_crcs
+        while prop_id != self._k_end:
+            if prop_id == self._k_crc:
+                num_unknown = sum(c for f, c in enumerate(
+                    self.substream_counts) if c != 1 or
+                                  self.folder_crcs[f] is None)
+                read_crcs = iter(self._digests(num_unknown))
+                self.substream_crcs = [
+                    next(read_crcs) if (c != 1 or self.folder_crcs[f] is None)
+                    else self.folder_crcs[f] for f, c in enumerate(
+                        self.substream_counts) for _i in range(c)]
+            else:
+                raise _UnsupportedArchive(f'Unknown 7z substreams property '
+                                          f'{prop_id}')
+            prop_id = self._byte()
+
+    def stream_sizes_crcs(self):
+        """Return the sizes and CRCs of all (sub)streams, in order."""
+        if not self.substream_sizes: # no substreams info
+            sizes = [self._folder_unpack_size(f) for f, c in enumerate(
+                self.substream_counts) if c]
+            return sizes, [self.folder_crcs[f] for f, c in enumerate(
+                self.substream_counts) if c]
+        crcs = self.substream_crcs or [None] * len(self.substream_sizes)
+        return self.substream_sizes, crcs
+
+    def is_solid(self):
+        return any(c > 1 for c in self.substream_counts)
+
+    def read_header(self):
+        """Read a plain header, returning the archive's entries as (path,
+        size, crc, is_dir) tuples."""
+        entries = []
+        while (prop_id := self._byte()) != self._k_end:
+            if prop_id == self._k_archive_props:
+                while self._byte() != self._k_end:
+                    self._bytes(self._number())
+            elif prop_id == self._k_add_streams:
+                raise _UnsupportedArchive('Additional 7z streams')
+            elif prop_id == self._k_main_streams:
+                self.read_streams_info()
+            elif prop_id == self._k_files:
+                entries = self._read_files_info()
+            else:
+                raise _UnsupportedArchive(f'Unknown 7z header property '
+                                          f'{prop_id}')
+        return entries
+
+    def _read_files_info(self):
+        num_files = self._number()
+        empty_streams = [False] * num_files
+        empty_files = []
+        names = []
+        attributes = [None] * num_files
+        while (prop_id := self._byte()) != self._k_end:
+            prop_end = self._number() + self._pos
+            if prop_id == self._k_empty_stream:
+                empty_streams = self._bits(num_files)
+            elif prop_id == self._k_empty_file:
+                empty_files = self._bits(sum(empty_streams))
+            elif prop_id == self._k_name:
+                if self._byte(): # external
+                    raise _UnsupportedArchive('External 7z file names')
+                names = bytes(self._data[self._pos:prop_end]).decode(
+                    'utf-16-le').split('\0')[:num_files]
+            elif prop_id == self._k_win_attrs:
+                defined = self._defined_bits(num_files)
+                if self._byte(): # external
+                    raise _UnsupportedArchive('External 7z attributes')
+                attributes = [struct.unpack('<I', self._bytes(4))[0] if d
+                              else None for d in defined]
+            self._pos = prop_end # skip times, anti items, padding, etc.
+        if len(names) != num_files:
+            raise _UnsupportedArchive('Missing 7z file names')
+        stream_sizes, stream_crcs = self.stream_sizes_crcs()
+        entries, stream_dex, empty_dex = [], 0, 0
+        for file_dex, file_name in enumerate(names):
+            file_attrs = attributes[file_dex]
+            if empty_streams[file_dex]:
+                is_empty_file = (empty_dex < len(empty_files) and
+                                 empty_files[empty_dex])
+                empty_dex += 1
+                is_dir = (not is_empty_file if file_attrs is None else
+                          bool(file_attrs & self._dir_attribute))
+                entries.append((_to_os_path(file_name), 0, None, is_dir))
+            else:
+                entries.append((_to_os_path(file_name),
+                                stream_sizes[stream_dex],
+                                stream_crcs[stream_dex], False))
+                stream_dex += 1
+        return entries
+
+def _decode_7z_folder(ins, pack_offset, pack_size, coders, unpack_size):
+    """Decode a 7z folder that uses a single LZMA/LZMA2/Copy coder - which is
+    what 7-Zip uses for encoded headers."""
+    if len(coders) != 1:
+        raise _UnsupportedArchive('Multi-coder 7z header')
+    codec_id, coder_props = coders[0]
+    ins.seek(pack_offset)
+    packed = ins.read(pack_size)
+    if codec_id == b'\x00': # Copy
+        return packed
+    if codec_id == b'\x03\x01\x01': # LZMA
+        lc_lp_pb = coder_props[0]
+        lzma_filter = {'id': lzma.FILTER_LZMA1,
+            'dict_size': struct.unpack('<I', coder_props[1:5])[0],
+            'lc': lc_lp_pb % 9, 'lp': (lc_lp_pb // 9) % 5,
+            'pb': lc_lp_pb // 45}
+    elif codec_id == b'\x21': # LZMA2
+        dict_byte = coder_props[0]
+        lzma_filter = {'id': lzma.FILTER_LZMA2, 'dict_size':
+            0xFFFFFFFF if dict_byte == 40 else
+            (2 | (dict_byte & 1)) << (dict_byte // 2 + 11)}
+    else:
+        raise _UnsupportedArchive(f'Unsupported 7z header coder '
+                                  f'{codec_id.hex()}')
+    decompressor = lzma.LZMADecompressor(lzma.FORMAT_RAW,
+                                         filters=[lzma_filter])
+    unpacked = decompressor.decompress(packed, unpack_size)
+    if len(unpacked) != unpack_size:
+        raise _UnsupportedArchive('Truncated 7z header')
+    return unpacked
+
+def _list_7z(archive_path):
+    """List a 7z archive by reading (and, if needed, decoding) its header."""
+    with open(archive_path, 'rb') as ins:
+        sig_header = ins.read(32)
+        if sig_header[:6] != b"7z\xbc\xaf'\x1c":
+            raise _UnsupportedArchive('Not a 7z archive')
+        next_offset, next_size, next_crc = struct.unpack('<QQI',
+                                                         sig_header[12:32])
+        ins.seek(32 + next_offset)
+        header_data = ins.read(next_size)
+        if len(header_data) != next_size or crc32(header_data) != next_crc:
+            raise _UnsupportedArchive('Corrupted 7z header')
+        if not header_data: # empty archive
+            return False, []
+        while header_data[0] == _7zHeaderReader._k_encoded_header:
+            encoded = _7zHeaderReader(header_data)
+            encoded._pos = 1
+            encoded.read_streams_info()
+            (coders, _num_out), = encoded.folders
+            header_data = _decode_7z_folder(ins,
+                32 + encoded.pack_pos, sum(encoded.pack_sizes), coders,
+                encoded._folder_unpack_size(0))
+            if (header_crc := encoded.folder_crcs[0]) is not None and crc32(
+                    header_data) != header_crc:
+                raise _UnsupportedArchive('Corrupted encoded 7z header')
+    header_reader = _7zHeaderReader(header_data)
+    header_reader._expect(_7zHeaderReader._k_header)
+    entries = header_reader.read_header()
+    return header_reader.is_solid(), entries
+
+_native_listers = {'.7z': _list_7z, '.zip': _list_zip}
@@ -361,6 +361,7 @@
     'bash.installers.ignore_fomods': False,
     'bash.installers.validate_fomods': True,
     'bash.installers.removeEmptyDirs': True,
+    'bash.installers.quickDataScan': False,
     'bash.installers.skipScreenshots': False,
     'bash.installers.skipScriptSources': False,
     'bash.installers.skipImages': False,
@@ -49,7 +49,8 @@
 from ..bass import Store
 from ..bolt import FName, LogFile, SubProgress, deprint, round_size
 from ..bosh import InstallerConverter, converters
-from ..exception import CancelError, SkipError, StateError, XMLParsingError
+from ..exception import BSAError, CancelError, SkipError, StateError, \
+    XMLParsingError
 from ..gui import BusyCursor, copy_text_to_clipboard
 from ..wbtemp import cleanup_temp_dir
 
@@ -66,6 +67,7 @@
            u'InstallerArchive_Unpack', u'InstallerProject_ReleasePack',
            u'Installer_CopyConflicts', u'Installer_SyncFromData' ,
            u'InstallerProject_OmodConfig', u'Installer_ListStructure',
+           'InstallerProject_PackBsa',
            u'Installer_Espm_SelectAll', u'Installer_Espm_DeselectAll',
            u'Installer_Espm_List', u'Installer_Espm_Rename',
            u'Installer_Espm_Reset', u'Installer_Espm_ResetAll',
@@ -1296,6 +1298,47 @@ class InstallerProject_ReleasePack(InstallerProject_Pack):
               'archive. Does not package development files.')
     release = True
 
+#------------------------------------------------------------------------------
+class InstallerProject_PackBsa(AppendableLink, _SingleProject):
+    """Pack the assets of a project into a BSA."""
+    _text = _dialog_title = _('Pack Assets to %(bsa_ext)s…') % {
+        'bsa_ext': bush.game.Bsa.bsa_extension}
+    _help = _('Pack the assets of this project into a new %(bsa_ext)s in '
+              'the root of the project. The loose assets are left in '
+              'place.') % {'bsa_ext': bush.game.Bsa.bsa_extension}
+
+    def _append(self, window):
+        return bosh.bsa_files.get_bsa_type(bush.game.fsName).supports_packing
+
+    @balt.conversation
+    def Execute(self):
+        bsa_ext = bush.game.Bsa.bsa_extension
+        installer = self._selected_info
+        msg = _('Name the %(bsa_ext)s that the assets of %(sel_proj)s should '
+                'get packed into:') % {'bsa_ext': bsa_ext,
+                                       'sel_proj': self._selected_item}
+        bsa_name = self._askFilename(msg, self._selected_item + bsa_ext,
+            base_dir=installer.abs_path, allowed_exts={bsa_ext},
+            use_default_ext=False)
+        if not bsa_name: return
+        try:
+            with balt.Progress(self._text) as progress:
+                num_packed = installer.pack_to_bsa(bsa_name, SubProgress(
+                    progress, 0, 0.9))
+                if num_packed:
+                    installer.do_update(force_update=True, progress=(
+                        SubProgress(progress, 0.9, 1.0)))
+                    self.idata.refresh_ns()
+        except BSAError as e:
+            self._showError(f'{e}')
+            return
+        if not num_packed:
+            self._showInfo(_('%(sel_proj)s has no assets that can be packed '
+                             'into a %(bsa_ext)s.') % {
+                'sel_proj': self._selected_item, 'bsa_ext': bsa_ext})
+            return
+        self.window.RefreshUI(detail_item=self._selected_item)
+
 #------------------------------------------------------------------------------
 class _InstallerConverter_Link(_ArchiveOnly):
 
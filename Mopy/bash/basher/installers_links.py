@@ -44,7 +44,7 @@
            u'Installers_AutoWizard', u'Installers_AutoRefreshProjects',
            'Installers_SkipVanillaContent',
            u'Installers_ApplyEmbeddedBCFs', u'Installers_BsaRedirection',
-           u'Installers_RemoveEmptyDirs',
+           u'Installers_RemoveEmptyDirs', 'Installers_QuickDataScan',
            u'Installers_ShowInactiveConflicts',
            u'Installers_ShowLowerConflicts',
            u'Installers_ShowActiveBSAConflicts',
@@ -533,6 +533,18 @@ class Installers_RemoveEmptyDirs(BoolLink):
         'data_folder': bush.game.mods_dir}
     _bl_key = 'bash.installers.removeEmptyDirs'
 
+#------------------------------------------------------------------------------
+class Installers_QuickDataScan(BoolLink):
+    """Toggles option to only rescan changed directories on file scan."""
+    _text = _('Quick %(data_folder)s Scan') % {
+        'data_folder': bush.game.mods_dir}
+    _help = _('Toggles whether or not Wrye Bash will skip directories in the '
+              '%(data_folder)s folder that did not change since the last '
+              'scan. Files edited in place are only picked up by a full '
+              'refresh when this is enabled.') % {
+        'data_folder': bush.game.mods_dir}
+    _bl_key = 'bash.installers.quickDataScan'
+
 #------------------------------------------------------------------------------
 # Sorting Links ---------------------------------------------------------------
 #------------------------------------------------------------------------------
@@ -227,6 +227,7 @@ def InitInstallerLinks():
         inst_settings_menu.links.append_link(SeparatorLink())
         inst_settings_menu.links.append_link(Installers_BsaRedirection())
         inst_settings_menu.links.append_link(Installers_RemoveEmptyDirs())
+        inst_settings_menu.links.append_link(Installers_QuickDataScan())
         InstallersList.column_links.append_link(inst_settings_menu)
     if True: #--Conflict Settings
         cflt_settings_menu = MenuLink(_('Conflict Settings..'))
@@ -316,6 +317,7 @@ def InitInstallerLinks():
         project_menu = Installer_ProjectMenu()
         project_menu.links.append_link(InstallerProject_Pack())
         project_menu.links.append_link(InstallerProject_ReleasePack())
+        project_menu.links.append_link(InstallerProject_PackBsa())
         project_menu.links.append_link(Installer_SkipRefresh())
         project_menu.links.append_link(InstallerProject_OmodConfig())
         InstallersList.context_links.append_link(project_menu)
@@ -386,6 +388,7 @@ def InitInstallerLinks():
     settings_menu.append_link(SeparatorLink())
     settings_menu.append_link(Installers_BsaRedirection())
     settings_menu.append_link(Installers_RemoveEmptyDirs())
+    settings_menu.append_link(Installers_QuickDataScan())
     settings_menu.append_link(SeparatorLink())
     settings_menu.append_link(Installers_SkipVanillaContent())
     settings_menu.append_link(Installers_GlobalSkips())
@@ -1249,17 +1249,11 @@ def Execute(self):
         try:
             with balt.Progress(_('Deleted Records'), abort=True) as progress:
                 progress.setFull(len(all_present_minfs))
-                load_progress = SubProgress(progress, 0, 0.7)
-                load_progress.setFull(len(all_present_minfs))
-                all_extracted_data = {}
-                for i, (fn, present_minf) in enumerate(
-                        all_present_minfs.items()):
-                    if fn == game_master_name:
-                        continue # The game master can't have deleted records
-                    mod_progress = SubProgress(load_progress, i, i + 1)
-                    ext_data = ModHeaderReader.extract_mod_data(present_minf,
-                                                                mod_progress)
-                    all_extracted_data[fn] = ext_data
+                # The game master can't have deleted records
+                all_extracted_data = ModHeaderReader.extract_mods_data(
+                    {fn: present_minf for fn, present_minf
+                     in all_present_minfs.items() if fn != game_master_name},
+                    SubProgress(progress, 0, 0.7))
                 if all_extracted_data:
                     scan_progress = SubProgress(progress, 0.7, 0.9)
                     scan_progress.setFull(len(all_extracted_data))
@@ -30,14 +30,14 @@
 from .dialogs import DeleteBPPartsEditor
 from .. import balt, bass, bolt, bosh, bush, env, wrye_text
 from ..balt import Resources
-from ..bolt import GPath_no_norm, SubProgress
+from ..bolt import FName, GPath_no_norm, SubProgress
 from ..exception import BoltError, BPConfigError, CancelError, FileEditError, \
     SkipError
-from ..gui import BusyCursor, CancelButton, CheckListBox, DeselectAllButton, \
-    DialogWindow, EventResult, FileOpen, HLayout, HorizontalLine, Label, \
-    LayoutOptions, OkButton, OpenButton, RevertButton, RevertToSavedButton, \
-    SaveAsButton, SelectAllButton, Stretch, VLayout, showError, askYes, \
-    showWarning, FileSave
+from ..gui import BusyCursor, CancelButton, CheckBox, CheckListBox, \
+    DeselectAllButton, DialogWindow, EventResult, FileOpen, HLayout, \
+    HorizontalLine, Label, LayoutOptions, OkButton, OpenButton, RevertButton, \
+    RevertToSavedButton, SaveAsButton, SelectAllButton, Stretch, VLayout, \
+    showError, askYes, showOk, showWarning, FileSave
 from ..patcher.patch_files import PatchFile
 from ..wbtemp import TempDir
 
@@ -110,6 +110,9 @@ def __init__(self, parent, bashed_patch: PatchFile, bashed_patches_out,
         self.defaultTipText = _(u'Items that are new since the last time this '
                                 u'patch was built are displayed in bold.')
         self.gTipText = Label(self,self.defaultTipText)
+        self._force_rebuild = CheckBox(self, _('Force Rebuild'),
+            chkbx_tooltip=_('Build the patch even if nothing it depends on '
+                            'has changed since it was last built.'))
         #--Events
         self.gPatchers.on_mouse_leaving.subscribe(self._mouse_leaving)
         self.gPatchers.on_mouse_motion.subscribe(self.handle_mouse_motion)
@@ -129,7 +132,8 @@ def __init__(self, parent, bashed_patch: PatchFile, bashed_patches_out,
                 self.gRevertConfig, self.gRevertToDefault,
             ]),
             HLayout(spacing=4, items=[
-                Stretch(), self.gExecute, self.gSelectAll, self.gDeselectAll,
+                self._force_rebuild, Stretch(), self.gExecute,
+                self.gSelectAll, self.gDeselectAll,
                 CancelButton(self),
             ]),
         ]).apply_to(self)
@@ -175,9 +179,20 @@ def PatchExecute(self):
             #--Save configs
             config = self.__config()
             self.patchInfo.set_table_prop('bash.patch.configs', config)
+            patchFile = self.bashed_patch
+            #--Skip the build if nothing the patch depends on has changed.
+            # There is no partial rebuild - any change rebuilds everything
+            build_state = patchFile.build_state(config, self._game_files(),
+                                                SubProgress(progress, 0, 0.1))
+            if not self._force_rebuild.is_checked and \
+                    patchFile.is_build_current(self.patchInfo.get_table_prop(
+                        'bash.patch.build_state'), build_state, bosh.modInfos):
+                progress.Destroy()
+                progress = None
+                self._show_current_build(patch_name)
+                return
             #--Do it
             log = bolt.LogFile(io.StringIO())
-            patchFile = self.bashed_patch
             enabled_patchers = [p.get_patcher_instance(patchFile) for p in
                                 self._gui_patchers if p.isEnabled] ##: what happens if empty
             patchFile.init_patchers_data(enabled_patchers, SubProgress(progress, 0, 0.1)) #try to speed this up!
@@ -278,6 +293,7 @@ def PatchExecute(self):
             balt.playSound(self.parent, bass.inisettings['SoundSuccess'])
             balt.show_log(self.parent, shown_log, patch_name, wrye_log=True,
                           asDialog=True)
+            bp_outputs = {}
             for bp_file in bp_files_to_save:
                 bp_fname = bp_file.fileInfo.fn_key
                 # We have to parse the new infos first, since the masters may
@@ -292,7 +308,13 @@ def PatchExecute(self):
                     # stuff - new setting, so no backwards compat concerns
                     info.set_table_prop('bp_split_parent', str(patch_name))
                 info.set_table_prop('doc', readme_html)
+                bp_outputs[str(bp_fname)] = info.calculate_crc()[0]
                 self._bps.append(bp_fname)
+            # Remember what this build depended on, so that rebuilding it
+            # without any changes can be skipped
+            build_state['outputs'] = bp_outputs
+            bosh.modInfos[patch_name].set_table_prop('bash.patch.build_state',
+                                                     build_state)
         except CancelError:
             pass
         except BPConfigError as e: # User configured BP incorrectly
@@ -305,8 +327,40 @@ def PatchExecute(self):
             self._error(f'{e}')
             raise
         finally:
+            self.bashed_patch.end_build()
             if progress: progress.Destroy()
 
+    def _game_files(self):
+        """Return the files outside of the plugins and csvs that the output
+        of the patch depends on: the game INIs, which is where INI tweaks get
+        applied, and the sources of the strings files of localized plugins."""
+        game_files = {f'{i.abs_path}': i.abs_path for i in bosh.gameInis}
+        i_lang = bosh.oblivionIni.get_ini_language(
+            bush.game.Ini.default_game_lang)
+        for p_minf in self.bashed_patch.all_plugins.values():
+            if getattr(p_minf.header.flags1, 'localized', False):
+                game_files.update((f'{p}', p) for p in
+                                  p_minf.strings_sources(i_lang))
+        return game_files
+
+    def _show_current_build(self, patch_name):
+        """Show the log of the last build of an up-to-date patch."""
+        bp_fnames = self.patchInfo.get_table_prop('bash.patch.build_state')[
+            'outputs']
+        self._bps.extend(map(FName, bp_fnames))
+        balt.playSound(self.parent, bass.inisettings['SoundSuccess'])
+        readme_html = self.patchInfo.get_table_prop('doc')
+        if readme_html and readme_html.exists():
+            readme = readme_html.root + '.txt'
+            shown_log = (readme_html if balt.web_viewer_available() else
+                         readme)
+            balt.show_log(self.parent, shown_log, patch_name, wrye_log=True,
+                          asDialog=True)
+        else:
+            showOk(self, _('Nothing %(bp_name)s depends on has changed since '
+                           'it was last built, so it was not rebuilt.') % {
+                'bp_name': patch_name}, title=_('Bashed Patch Up To Date'))
+
     def _error(self, e_msg):
         balt.playSound(self.parent, bass.inisettings['SoundError'])
         bolt.deprint('Exception during Bashed Patch building:', traceback=True)
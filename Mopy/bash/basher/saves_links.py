@@ -861,10 +861,10 @@ class Save_Unbloat(OneItemLink):
     def Execute(self):
         #--File Info
         with balt.Progress(_(u'Scanning for Bloat')) as progress:
-            #--Scan and report
-            saveFile = _saves.SaveFile(self._selected_info)
-            saveFile.load(SubProgress(progress,0,0.8))
-            createdCounts,nullRefCount = saveFile.findBloating(SubProgress(progress,0.8,1.0))
+            #--Scan and report - streaming, so that we don't have to load the
+            # whole save just to find out that it's not bloated
+            with _saves.SaveFileView(self._selected_info) as save_view:
+                createdCounts, nullRefCount = save_view.findBloating(progress)
         #--Dialog
         if not createdCounts and not nullRefCount:
             self._showOk(_(u'No bloating found.'), self._selected_item)
@@ -884,7 +884,10 @@ def Execute(self):
             return
         #--Remove bloating
         with balt.Progress(_('Removing Bloat')) as progress:
-            nums = saveFile.removeBloating(createdCounts,True,SubProgress(progress,0,0.9))
+            saveFile = _saves.SaveFile(self._selected_info)
+            saveFile.load(SubProgress(progress, 0, 0.5))
+            nums = saveFile.removeBloating(createdCounts, True,
+                                           SubProgress(progress, 0.5, 0.9))
             progress(0.9,_('Saving…'))
             saveFile.safeSave()
         msg = [_('Uncreated Objects: %(num_uncreated_objs)d'),
@@ -37,12 +37,13 @@
 import subprocess
 import sys
 import textwrap
+import threading
 import traceback as _traceback
 import webbrowser
 from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager, redirect_stdout
 from enum import Enum
-from functools import partial
 from itertools import chain
 from keyword import iskeyword
 from operator import attrgetter
@@ -882,6 +883,55 @@ def GPathPurge():
             # meanin the object is not reference anywhere else
             del _gpaths[key]
 
+#------------------------------------------------------------------------------
+_crc_block_size = 2097152 # 2MB at a time
+
+def file_crc(file_path, _cancelled: threading.Event | None = None):
+    """Calculate and return the CRC32 of the specified file. Returns None if
+    _cancelled got set before we were done."""
+    crc = 0
+    with open(file_path, 'rb') as ins:
+        while block := ins.read(_crc_block_size):
+            if _cancelled is not None and _cancelled.is_set():
+                return None
+            crc = crc32(block, crc)
+    return crc
+
+def threaded_crcs(key_paths: dict, max_threads=8):
+    """Calculate the CRC32 of each of the specified files (a dict mapping
+    any key to the path of a file) using a bounded pool of threads - both
+    file reads and zlib release the GIL, so several files are read and hashed
+    at once. Yields (key, crc) tuples as the files are done, crc being None
+    if the file could not be read. Closing the generator early (e.g. due to
+    a CancelError raised by a progress dialog) cancels all pending files and
+    stops the ones being hashed."""
+    if len(key_paths) < 2: # not worth starting threads
+        for crc_key, crc_path in key_paths.items():
+            try:
+                yield crc_key, file_crc(crc_path)
+            except OSError:
+                deprint(f'Failed to calculate crc for {crc_path}',
+                        traceback=True)
+                yield crc_key, None
+        return
+    cancelled = threading.Event()
+    num_threads = min(max_threads, os.cpu_count() or 1, len(key_paths))
+    crc_pool = ThreadPoolExecutor(num_threads, thread_name_prefix='crc')
+    try:
+        crc_futures = {crc_pool.submit(file_crc, crc_path, cancelled):
+            (crc_key, crc_path) for crc_key, crc_path in key_paths.items()}
+        for crc_fut in as_completed(crc_futures):
+            crc_key, crc_path = crc_futures[crc_fut]
+            try:
+                yield crc_key, crc_fut.result()
+            except OSError:
+                deprint(f'Failed to calculate crc for {crc_path}',
+                        traceback=True)
+                yield crc_key, None
+    finally:
+        cancelled.set()
+        crc_pool.shutdown(wait=True, cancel_futures=True)
+
 #------------------------------------------------------------------------------
 _conv_seps = None
 class Path(os.PathLike):
@@ -1109,11 +1159,7 @@ def stat(self):
     @property
     def crc(self):
         """Calculates and returns crc value for self."""
-        crc = 0
-        with self.open(u'rb') as ins:
-            while block := ins.read(2097152): # 2MB at a time
-                crc = crc32(block, crc)
-        return crc
+        return file_crc(self._s)
 
     #--Path stuff -------------------------------------------------------
     #--New Paths, subpaths
@@ -2380,19 +2426,12 @@ def __call__(self,state,message=u''):
         self.state = state
 
 #------------------------------------------------------------------------------
-def readCString(ins, file_path):
-    """Read null terminated string, dropping the final null byte."""
-    byte_list = []
-    for b in iter(partial(ins.read, 1), b''):
-        if b == b'\0': break
-        byte_list.append(b)
-    else:
-        raise exception.FileError(file_path,
-                                  u'Reached end of file while expecting null')
-    return b''.join(byte_list)
-
 class StringTable(dict):
-    """For reading .STRINGS, .DLSTRINGS, .ILSTRINGS files."""
+    """For reading .STRINGS, .DLSTRINGS, .ILSTRINGS files. Loading a file only
+    parses its id -> offset directory - each string is decoded the first time
+    it is looked up. The dict holds the strings decoded so far, but lookups,
+    len, iteration and the keys/values/items views cover all loaded strings,
+    decoding them as needed."""
     encodings = {
         # Encoding to fall back to if UTF-8 fails, based on language
         # Default is 1252 (Western European), so only list languages
@@ -2400,6 +2439,12 @@ class StringTable(dict):
         u'russian': u'cp1251',
     }
 
+    def __init__(self):
+        super().__init__()
+        # (path, file contents, strings start, formatted, backup encoding,
+        # id -> offset dict) for each loaded file, in load order
+        self._lazy_files = []
+
     def loadFile(self, path, progress, lang=u'english'):
         formatted = path.cext != u'.strings'
         backupEncoding = self.encodings.get(lang.lower(), u'cp1252')
@@ -2408,53 +2453,106 @@ def loadFile(self, path, progress, lang=u'english'):
             # what we expect at all
             from .env import canonize_ci_path
             canon_path = canonize_ci_path(path)
+            # Read the whole file rather than mapping it - a mapping would
+            # keep the file open for as long as lazily loaded records may
+            # look up strings in it, which blocks replacing it on Windows
+            # (e.g. when re-extracting strings files from BSAs)
             with open(canon_path, u'rb') as ins:
-                ins.seek(0, os.SEEK_END)
-                eof = ins.tell()
-                ins.seek(0)
-                if eof < 8:
-                    deprint(f"Warning: Strings file '{canon_path}' file size "
-                            f"({canon_path}) is less than 8 bytes. 8 bytes "
-                            f"are the minimum required by the expected "
-                            f"format, assuming the Strings file is empty.")
-                    return
-                numIds,dataSize = unpack_many(ins, u'=2I')
-                progress.setFull(max(numIds,1))
-                stringsStart = 8 + (numIds*8)
-                if stringsStart != eof-dataSize:
-                    deprint(f"Warning: Strings file '{canon_path}' dataSize "
-                            f"element ({dataSize}) results in a string start "
-                            f"location of {eof - dataSize}, but the expected "
-                            f"location is {stringsStart}")
-                id_ = -1
-                offset = -1
-                for x in range(numIds):
-                    try:
-                        progress(x)
-                        id_,offset = unpack_many(ins, u'=2I')
-                        pos = ins.tell()
-                        ins.seek(stringsStart + offset)
-                        if formatted:
-                            value = unpack_str32(ins) # TODO(ut): unpack_str32_null
-                            # seems needed, strings are null terminated
-                            value = cstrip(value)
-                        else:
-                            # drops the null byte
-                            value = readCString(ins, canon_path)
-                        try:
-                            value = value.decode('utf-8')
-                        except UnicodeDecodeError:
-                            value = value.decode(backupEncoding)
-                        ins.seek(pos)
-                        self[id_] = value
-                    except:
-                        deprint('\n'.join(
-                            ['Error reading string file:', f'id: {id_}',
-                             f'offset: {offset}', f'filePos: {ins.tell()}']))
-                        raise
+                strs_map = ins.read()
+            eof = len(strs_map)
+            if eof < 8:
+                deprint(f"Warning: Strings file '{canon_path}' file size "
+                        f"({canon_path}) is less than 8 bytes. 8 bytes "
+                        f"are the minimum required by the expected "
+                        f"format, assuming the Strings file is empty.")
+                return
+            numIds, dataSize = struct.unpack_from(u'=2I', strs_map)
+            progress.setFull(max(numIds,1))
+            stringsStart = 8 + (numIds*8)
+            if stringsStart != eof-dataSize:
+                deprint(f"Warning: Strings file '{canon_path}' dataSize "
+                        f"element ({dataSize}) results in a string start "
+                        f"location of {eof - dataSize}, but the expected "
+                        f"location is {stringsStart}")
+            str_offsets = dict(struct.iter_unpack(u'=2I',
+                                                  strs_map[8:stringsStart]))
         except:
             deprint(u'Error loading string file:', path.stail, traceback=True)
             return
+        if str_offsets:
+            # Strings of later files win, forget any decoded from earlier ones
+            if self:
+                for id_ in str_offsets.keys() & super().keys():
+                    del self[id_]
+            self._lazy_files.append((canon_path, strs_map, stringsStart,
+                formatted, backupEncoding, str_offsets))
+        progress(numIds)
+
+    def __missing__(self, id_):
+        for strs_path, strs_map, strings_start, formatted, backup_encoding, \
+                str_offsets in reversed(self._lazy_files):
+            if (offset := str_offsets.get(id_)) is not None:
+                break
+        else:
+            raise KeyError(id_)
+        pos = strings_start + offset
+        try:
+            if formatted:
+                str_len, = struct.unpack_from(u'=I', strs_map, pos)
+                # strings are null terminated, drop the null byte
+                value = cstrip(strs_map[pos + 4:pos + 4 + str_len])
+            else:
+                if (end_pos := strs_map.find(b'\0', pos)) == -1:
+                    raise exception.FileError(strs_path, u'Reached end of '
+                        u'file while expecting null')
+                value = strs_map[pos:end_pos]
+            try:
+                value = value.decode('utf-8')
+            except UnicodeDecodeError:
+                value = value.decode(backup_encoding)
+        except (exception.FileError, struct.error, UnicodeDecodeError):
+            deprint('\n'.join([f'Error reading string file {strs_path}:',
+                f'id: {id_}', f'offset: {offset}', f'filePos: {pos}']),
+                    traceback=True)
+            raise KeyError(id_)
+        self[id_] = value
+        return value
+
+    def get(self, id_, default=None):
+        try:
+            return self[id_]
+        except KeyError:
+            return default
+
+    def __contains__(self, id_):
+        return super().__contains__(id_) or any(
+            id_ in lazy_file[5] for lazy_file in self._lazy_files)
+
+    def __bool__(self):
+        return bool(self._lazy_files) or super().__len__() > 0
+
+    def _all_ids(self):
+        """Return a dict whose keys are the ids of all loaded strings,
+        whether decoded or not."""
+        all_ids = dict.fromkeys(super().keys())
+        for lazy_file in self._lazy_files:
+            all_ids.update(dict.fromkeys(lazy_file[5]))
+        return all_ids
+
+    def __len__(self):
+        return len(self._all_ids())
+
+    def __iter__(self):
+        return iter(self._all_ids())
+
+    # The views use the methods above, so they decode strings as needed
+    def keys(self): return collections.abc.KeysView(self)
+    def values(self): return collections.abc.ValuesView(self)
+    def items(self): return collections.abc.ItemsView(self)
+
+    def clear(self):
+        super().clear()
+        self._lazy_files = []
 
 #------------------------------------------------------------------------------
 _esub_component = re.compile(r'\$(\d+)\(([^)]+)\)')
@@ -33,14 +33,17 @@
 import time
 from collections import defaultdict, deque, OrderedDict
 from collections.abc import Iterable, Callable
+from contextlib import closing
 from dataclasses import dataclass, field
 from functools import wraps
 from itertools import chain
+from operator import itemgetter
 from typing import final
 
 # bosh-local imports - maybe work towards dropping (some of) these?
 from . import bsa_files, converters, cosaves
-from ._mergeability import is_esl_capable, isPBashMergeable, is_overlay_capable
+from ._mergeability import is_esl_capable, isPBashMergeable, \
+    is_overlay_capable, merge_needs_load
 from .converters import InstallerConverter
 from .cosaves import PluggyCosave, xSECosave
 from .mods_metadata import get_tags_from_dir, process_tags, read_dir_tags, \
@@ -51,7 +54,7 @@
 from ..bolt import AFile, AFileInfo, DataDict, FName, FNDict, GPath, \
     ListInfo, Path, deprint, dict_sort, forward_compat_path_to_fn, \
     forward_compat_path_to_fn_list, os_name, struct_error, top_level_files, \
-    OrderedLowerDict, attrgetter_cache
+    OrderedLowerDict, SubProgress, attrgetter_cache
 from ..brec import FormIdReadContext, FormIdWriteContext, RecordHeader, \
     RemapWriteContext
 from ..exception import ArgumentError, BoltError, BSAError, CancelError, \
@@ -399,17 +402,20 @@ class ModInfo(FileInfo):
         x[1:] for x in bush.game.espm_extensions) + '))'
     _key_to_attr = {'allowGhosting': 'mod_allow_ghosting',
         'autoBashTags': 'mod_auto_bash_tags',
+        'bash.patch.build_state': 'mod_bp_build_state',
         'bash.patch.configs': 'mod_bp_config', 'bashTags': 'mod_bash_tags',
         'bp_split_parent': 'mod_bp_split_parent', 'crc': 'mod_crc',
         'crc_mtime': 'mod_crc_mtime', 'crc_size': 'mod_crc_size',
         'doc': 'mod_doc', 'docEdit': 'mod_editing_doc', 'group': 'mod_group',
         'ignoreDirty': 'mod_ignore_dirty', 'installer': 'mod_owner_inst',
-        'mergeInfo': 'mod_merge_info', 'rating': 'mod_rating'}
+        'mergeInfo': 'mod_merge_info', 'rating': 'mod_rating',
+        'tes4_cache': 'mod_tes4_cache'}
     _ignore_on_revert = frozenset([#'allowGhosting', 'bash.patch.configs',
         'bp_split_parent', # 'doc', 'docEdit', 'group', 'installer', 'rating'
         # 'autoBashTags', 'bashTags', ##: reset bashTags on reverting?
         # ignore mergeInfo/crc cache so we recalculate (resets ignoreDirty - ?)
-        'crc', 'crc_mtime', 'crc_size', 'ignoreDirty', 'mergeInfo'])
+        'crc', 'crc_mtime', 'crc_size', 'ignoreDirty', 'mergeInfo',
+        'tes4_cache'])
 
     def __init__(self, fullpath, load_cache=False, itsa_ghost=None, **kwargs):
         # list of string bsas sorted by search order for localized plugins -
@@ -540,24 +546,37 @@ def _recalc_overlay(self):
         self._is_overlay = self.has_overlay_flag()
 
     # CRCs --------------------------------------------------------------------
-    def calculate_crc(self, recalculate=False):
+    def calculate_crc(self, recalculate=False, *, path_crc=None):
+        """Return the crc of this plugin and the crc we had cached for it,
+        recalculating it if needed. If path_crc is given, it is the freshly
+        calculated crc of the file (see ModInfos.refresh_crcs)."""
         cached_crc = self.get_table_prop(u'crc')
         recalculate = recalculate or cached_crc is None or \
             self.ftime != self.get_table_prop('crc_mtime') or \
             self.fsize != self.get_table_prop(u'crc_size')
-        path_crc = cached_crc
-        if recalculate:
+        if not recalculate:
+            return cached_crc, cached_crc
+        if path_crc is None:
             path_crc = self.abs_path.crc
-            if path_crc != cached_crc:
-                self.set_table_prop(u'crc', path_crc)
-                self.set_table_prop(u'ignoreDirty', False)
-            self.set_table_prop('crc_mtime', self.ftime)
-            self.set_table_prop(u'crc_size', self.fsize)
+        if path_crc != cached_crc:
+            self.set_table_prop(u'crc', path_crc)
+            self.set_table_prop(u'ignoreDirty', False)
+        self.set_table_prop('crc_mtime', self.ftime)
+        self.set_table_prop(u'crc_size', self.fsize)
         return path_crc, cached_crc
 
     def cached_mod_crc(self): # be sure it's valid before using it!
         return self.get_table_prop(u'crc')
 
+    def valid_cached_crc(self):
+        """Return the crc we have cached for this plugin if it is still
+        valid, else None. Unlike calculate_crc, never touches the file or our
+        table."""
+        if self.ftime == self.get_table_prop('crc_mtime') and \
+                self.fsize == self.get_table_prop('crc_size'):
+            return self.get_table_prop('crc')
+        return None
+
     def crc_string(self):
         try:
             return f'{self.cached_mod_crc():08X}'
@@ -572,6 +591,8 @@ def setmtime(self, set_time: int | float = 0.0, crc_changed=False):
             self.set_table_prop('crc_mtime', set_to)
         else:
             self.calculate_crc(recalculate=True)
+            # the file was edited in place, its stats can't be trusted
+            self.set_table_prop('tes4_cache', None)
 
     def _get_masters(self):
         """Return the plugin masters, in the order listed in its header."""
@@ -733,9 +754,24 @@ def set_auto_tagged(self, auto_tagged):
     #--Header Editing ---------------------------------------------------------
     def readHeader(self):
         """Read header from file and set self.header attribute."""
+        # The raw header record of unchanged plugins is cached in our table,
+        # so we don't have to open them at all on startup
+        stat_key = (self.fsize, self.ftime, self.ctime)
+        tes4_cache = self.get_table_prop('tes4_cache')
+        if tes4_cache is not None and tes4_cache[0] == stat_key:
+            tes4_reader = FormIdReadContext(self.fn_key,
+                                            io.BytesIO(tes4_cache[1]))
+        else:
+            tes4_cache = None
+            tes4_reader = FormIdReadContext.from_info(self)
         try:
-            with FormIdReadContext.from_info(self) as ins:
+            with tes4_reader as ins:
                 self.header = ins.plugin_header
+                if tes4_cache is None:
+                    tes4_size = ins.tell()
+                    ins.seek(0)
+                    self.set_table_prop('tes4_cache',
+                                        (stat_key, ins.read(tes4_size)))
         except struct_error as rex:
             raise ModError(self.fn_key, f'Struct.error: {rex}')
         if bush.game.Esp.warn_older_form_versions:
@@ -895,6 +931,15 @@ def getStringsPaths(self, lang):
                 paths.update(map(out_path.join, assets))
         return paths
 
+    def strings_sources(self, lang):
+        """Return the paths of the loose strings files of this plugin and of
+        the BSAs getStringsPaths may extract them from. Only use for
+        localized plugins."""
+        loose_paths = [l for f in self._string_files_paths(lang) if
+                       (l := self.info_dir.join(f)).is_file()]
+        return [*loose_paths,
+                *(b.abs_path for b in self.str_bsas_sorted or ())]
+
     def isMissingStrings(self, available_bsas, bsa_lo_inis,
                          ci_cached_strings_paths, i_lang):
         """True if the mod says it has .STRINGS files, but the files are
@@ -1263,7 +1308,8 @@ class SaveInfo(FileInfo):
     _cosave_ui_string = {PluggyCosave: u'XP', xSECosave: u'XO'} # ui strings
     _valid_exts_re = r'(\.(?:' + '|'.join(
         [bush.game.Ess.ext[1:], bush.game.Ess.ext[1:-1] + 'r', 'bak']) + '))'
-    _key_to_attr = {'info': 'save_notes'}
+    _key_to_attr = {'header_cache': 'save_header_cache', 'info': 'save_notes'}
+    _ignore_on_revert = frozenset(['header_cache'])
     _co_saves: _CosaveDict
 
     def __init__(self, fullpath, load_cache=False, **kwargs):
@@ -1301,10 +1347,20 @@ def is_save_enabled(self):
 
     def readHeader(self):
         """Read header from file and set self.header attribute."""
-        try:
-            self.header = get_save_header_type(bush.game.fsName)(self)
-        except SaveHeaderError as e:
-            raise SaveFileError(self.fn_key, e.args[0]) from e
+        header_type = get_save_header_type(bush.game.fsName)
+        # The header fields of unchanged saves are cached in our table, so
+        # we don't have to open (and decompress) them on every refresh
+        stat_key = (self.fsize, self.ftime, self.ctime)
+        header_cache = self.get_table_prop('header_cache')
+        if header_cache is not None and header_cache[0] == stat_key:
+            self.header = header_type.from_cached_fields(self, header_cache[1])
+        else:
+            try:
+                self.header = header_type(self)
+            except SaveHeaderError as e:
+                raise SaveFileError(self.fn_key, e.args[0]) from e
+            self.set_table_prop('header_cache',
+                                (stat_key, self.header.cached_fields()))
         self._reset_masters()
 
     def do_update(self, raise_on_error=False, **kwargs):
@@ -2318,6 +2374,10 @@ def refresh(self, refresh_infos=True, booting=False, unlock_lo=False):
         rdata = super().refresh(booting=booting) if refresh_infos else \
             self._rdata_type()
         mods_changes = bool(rdata)
+        if booting or rdata.to_del:
+            # Deleted and renamed plugins leave their record index entries
+            # behind - plugins may also have been deleted while we were closed
+            ModHeaderReader.prune_record_index(self)
         self._refresh_bash_tags()
         # If refresh_infos is False and mods are added _do_ manually refresh
         ldiff = self.refreshLoadOrder(forceRefresh=mods_changes or
@@ -2383,6 +2443,7 @@ def _refresh_mod_inis_and_strings(self):
         self.missing_strings = {k for k, v in self.items() if
             v.isMissingStrings(av_bsas, hi_to_lo, ci_cached_strings_paths,
                                i_lang)}
+        bsaInfos.save_asset_lists() # we probably parsed some BSAs above
         self.new_missing_strings = self.missing_strings - oldBad
         return self.missing_strings ^ oldBad
 
@@ -2488,7 +2549,10 @@ def _refreshMergeable(self):
                 # we have not yet run for this plugin
                 rescan_mods.add(fn_mod)
         if rescan_mods:
-            self.rescanMergeable(rescan_mods) ##: maybe re-add progress?
+            # Keep the reverse load order for the rescan too, dependents need
+            # to be checked before their masters
+            self.rescanMergeable(sorted(rescan_mods, reverse=True,
+                key=load_order.cached_lo_index)) ##: maybe re-add progress?
         difMergeable = (oldMergeable ^ {*chain.from_iterable(
             self._mergeable_by_type.values())}) & set(self)
         return rescan_mods | difMergeable
@@ -2505,48 +2569,78 @@ def rescanMergeable(self, names, progress=bolt.Progress(),
         # The checks that are actually required for this game
         required_checks = {m: c for m, c in all_known_checks.items()
                            if m in bush.game.mergeability_checks}
+        # Dependents need to be checked before their masters, see
+        # isPBashMergeable
+        names = load_order.get_ordered(names)[::-1]
+        # The expensive, per-plugin parts of the checks - loading the plugin
+        # for the MERGE check and scanning its record headers for the
+        # ESL/Overlay checks - don't depend on the results for other plugins,
+        # so compute them in worker processes and store them in the record
+        # index. The checks themselves then run here, in order
+        wanted_facets = {}
+        for p in names:
+            if p.lower() in bush.game.bethDataFiles: continue
+            p_facets = set()
+            if required_checks.keys() & {MergeabilityCheck.ESL_CHECK,
+                                         MergeabilityCheck.OVERLAY_CHECK}:
+                p_facets.update(('fids_outside_esl_range', 'new_records'))
+            if (MergeabilityCheck.MERGE in required_checks and
+                    merge_needs_load(self[p], self, return_results)):
+                p_facets.add('merge')
+            if p_facets:
+                wanted_facets[p] = (self[p], p_facets)
         with progress:
-            progress.setFull(max(len(names),1))
-            result, tagged_no_merge = {}, set()
-            for i, fileName in enumerate(names):
-                all_reasons = (None if not return_results else
-                               {m: [] for m in bush.game.mergeability_checks})
-                progress(i, fileName)
-                fileInfo = self[fileName]
-                cs_name = fileName.lower()
-                check_results = {}
-                for merg_type, merg_check in required_checks.items():
-                    reasons = (None if not return_results else
-                               all_reasons[merg_type])
-                    if cs_name in bush.game.bethDataFiles:
-                        # Fail all mergeability checks for vanilla plugins
-                        if return_results:
-                            reasons.append(_('Is Vanilla Plugin.'))
-                        check_results[merg_type] = False
-                    else:
-                        try:
-                            check_results[merg_type] = merg_check(
-                                fileInfo, self, reasons)
-                        except Exception: # as e
-                            # deprint(f'Error scanning mod {fileName} ({e})')
-                            # # Assume it's not mergeable
-                            # check_results[merg_type] = False
-                            raise
-                # Special handling for MERGE: NoMerge-tagged plugins
-                if (fileName in self.mergeable_plugins and
-                        'NoMerge' in fileInfo.getBashTags()):
-                    tagged_no_merge.add(fileName)
+            progress.setFull(2)
+            ModHeaderReader.index_facets(wanted_facets,
+                                         SubProgress(progress, 0, 1))
+            return self._rescan_mergeable(names, SubProgress(progress, 1, 2),
+                                          return_results, required_checks)
+
+    def _rescan_mergeable(self, names, progress, return_results,
+                          required_checks):
+        """Run the required checks on the specified plugins, in order. See
+        rescanMergeable."""
+        progress.setFull(max(len(names),1))
+        result, tagged_no_merge = {}, set()
+        for i, fileName in enumerate(names):
+            all_reasons = (None if not return_results else
+                           {m: [] for m in bush.game.mergeability_checks})
+            progress(i, fileName)
+            fileInfo = self[fileName]
+            cs_name = fileName.lower()
+            check_results = {}
+            for merg_type, merg_check in required_checks.items():
+                reasons = (None if not return_results else
+                           all_reasons[merg_type])
+                if cs_name in bush.game.bethDataFiles:
+                    # Fail all mergeability checks for vanilla plugins
                     if return_results:
-                        all_reasons[MergeabilityCheck.MERGE].append(_(
-                            'Technically mergeable, but has NoMerge tag.'))
-                result[fileName] = all_reasons is not None and {
-                    m: (check_results[m], r) for m, r in all_reasons.items()}
-                self._update_mergeable(fileName, check_results)
-                # Only store the enum values (i.e. the ints) in our settings
-                # files, we are moving away from pickling non-std classes
-                fileInfo.set_table_prop('mergeInfo', (fileInfo.fsize, {
-                    k.value: v for k, v in check_results.items()}))
-            return result, tagged_no_merge
+                        reasons.append(_('Is Vanilla Plugin.'))
+                    check_results[merg_type] = False
+                else:
+                    try:
+                        check_results[merg_type] = merg_check(
+                            fileInfo, self, reasons)
+                    except Exception: # as e
+                        # deprint(f'Error scanning mod {fileName} ({e})')
+                        # # Assume it's not mergeable
+                        # check_results[merg_type] = False
+                        raise
+            # Special handling for MERGE: NoMerge-tagged plugins
+            if (fileName in self.mergeable_plugins and
+                    'NoMerge' in fileInfo.getBashTags()):
+                tagged_no_merge.add(fileName)
+                if return_results:
+                    all_reasons[MergeabilityCheck.MERGE].append(_(
+                        'Technically mergeable, but has NoMerge tag.'))
+            result[fileName] = all_reasons is not None and {
+                m: (check_results[m], r) for m, r in all_reasons.items()}
+            self._update_mergeable(fileName, check_results)
+            # Only store the enum values (i.e. the ints) in our settings
+            # files, we are moving away from pickling non-std classes
+            fileInfo.set_table_prop('mergeInfo', (fileInfo.fsize, {
+                k.value: v for k, v in check_results.items()}))
+        return result, tagged_no_merge
 
     def _update_mergeable(self, fileName,
                           check_results: dict[MergeabilityCheck | int, bool]):
@@ -2585,10 +2679,13 @@ def refresh_crcs(self, mods=None, progress=None):
         with (progress := progress or bolt.Progress()):
             mods = (self if mods is None else mods)
             if mods: progress.setFull(len(mods))
-            for dex, mod_key in enumerate(mods):
-                progress(dex, _('Calculating crc:') + f'\n{mod_key}')
-                inf = self[mod_key]
-                pairs[mod_key] = inf.calculate_crc(recalculate=True)
+            with closing(bolt.threaded_crcs({mod_key: self[mod_key].abs_path
+                    for mod_key in mods})) as crc_results:
+                for dex, (mod_key, path_crc) in enumerate(crc_results):
+                    progress(dex, _('Calculating crc:') + f'\n{mod_key}')
+                    # on failure, let calculate_crc raise the error
+                    pairs[mod_key] = self[mod_key].calculate_crc(
+                        recalculate=True, path_crc=path_crc)
         return pairs
 
     #--Refresh File
@@ -3427,6 +3524,14 @@ def do_update(self, raise_on_error=False, **kwargs):
             def readHeader(self):  # just reset the cache
                 self._assets = self.__class__._assets
 
+            @property
+            def assets(self):
+                if self._assets is None: # try the asset lists cached on disk
+                    self._assets = bsaInfos.cached_assets(self)
+                    if self._assets is None:
+                        bsaInfos.cache_assets(self, super().assets)
+                return super().assets
+
             def _reset_bsa_mtime(self):
                 if bush.game.Bsa.allow_reset_timestamps and inisettings[
                     u'ResetBSATimestamps']:
@@ -3434,6 +3539,10 @@ def _reset_bsa_mtime(self):
                     if self.ftime != default_mtime:
                         self.setmtime(default_mtime)
         super().__init__(BSAInfo)
+        # Maps BSA names to their stat key and assets - see cached_assets
+        self.__asset_lists = None
+        self.__asset_lists_changed = False
+        self.__asset_index = None
 
     def new_info(self, fileName, _in_refresh=False, owner=None,
                  notify_bain=False, **kwargs):
@@ -3458,6 +3567,77 @@ def new_info(self, fileName, _in_refresh=False, owner=None,
     @property
     def bash_dir(self): return dirs[u'modsBash'].join(u'BSA Data')
 
+    def save_pickle(self):
+        super().save_pickle()
+        self.save_asset_lists()
+
+    # Asset lists and index ---------------------------------------------------
+    def _get_asset_lists(self):
+        if self.__asset_lists is None:
+            self.__asset_lists = bolt.PickleDict(self.bash_dir.join(
+                'Assets.dat'), load_pickle=True).pickled_data
+        return self.__asset_lists
+
+    def cached_assets(self, bsa_inf) -> frozenset[str] | None:
+        """Return the assets of the specified BSA cached on disk, or None if
+        the BSA changed since they were cached. Spares us opening (and parsing
+        the names of) every BSA on every run."""
+        try:
+            stat_key, asset_list = self._get_asset_lists()[str(
+                bsa_inf.fn_key)]
+        except KeyError:
+            return None
+        if stat_key != (bsa_inf.fsize, bsa_inf.ftime, bsa_inf.ctime):
+            return None
+        return frozenset(asset_list)
+
+    def cache_assets(self, bsa_inf, bsa_assets: frozenset[str]):
+        """Cache the assets of the specified BSA - saved to disk on the next
+        save_asset_lists."""
+        self._get_asset_lists()[str(bsa_inf.fn_key)] = (
+            (bsa_inf.fsize, bsa_inf.ftime, bsa_inf.ctime), tuple(bsa_assets))
+        self.__asset_lists_changed = True
+
+    def save_asset_lists(self):
+        """Save the cached asset lists if they changed, dropping the ones of
+        BSAs that are gone."""
+        if not self.__asset_lists_changed: return
+        pd = bolt.PickleDict(self.bash_dir.join('Assets.dat')) # don't load!
+        pd.pickled_data.update((k, v) for k, v in self.__asset_lists.items()
+                               if k in self)
+        pd.save()
+        self.__asset_lists_changed = False
+
+    def get_asset_index(self, bsa_lo: dict):
+        """Return a dict mapping each asset of the BSAs in bsa_lo (a dict of
+        BSA infos to their load order, see ModInfos.get_bsa_lo) to the list
+        of the BSAs that contain it, in load order, plus the set of BSAs that
+        failed to parse. Only rebuilt if the BSAs or their load order changed.
+
+        Assets are lowercase and use the OS path separator."""
+        index_key = sorted(((b, b_order, b.fsize, b.ftime) for b, b_order in
+                            bsa_lo.items()), key=itemgetter(1))
+        if self.__asset_index is not None and \
+                self.__asset_index[0] == index_key:
+            return self.__asset_index[1:]
+        asset_index = {}
+        failed_bsas = set()
+        for bsa_inf, *_rest in index_key:
+            try:
+                bsa_assets = bsa_inf.assets
+            except BSAError:
+                deprint(f'Error parsing {bsa_inf}', traceback=True)
+                failed_bsas.add(bsa_inf)
+                continue
+            for asset in bsa_assets:
+                try:
+                    asset_index[asset].append(bsa_inf)
+                except KeyError:
+                    asset_index[asset] = [bsa_inf]
+        self.save_asset_lists()
+        self.__asset_index = (index_key, asset_index, failed_bsas)
+        return asset_index, failed_bsas
+
     # BSA Redirection ---------------------------------------------------------
     _aii_name = 'ArchiveInvalidationInvalidated!.bsa'
     _bsa_redirectors = {_aii_name.lower(), '..\\obmm\\bsaredirection.bsa'}
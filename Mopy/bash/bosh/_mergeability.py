@@ -26,7 +26,7 @@
 from .. import bush
 from ..bolt import sig_to_str
 from ..exception import ModError
-from ..mod_files import LoadFactory, ModFile, ModHeaderReader
+from ..mod_files import ModHeaderReader
 __exit = lambda x: True # trick to exit early on non-verbose mode
 
 def _pbash_mergeable_no_load(modInfo, minfos, reasons):
@@ -67,8 +67,17 @@ def _pbash_mergeable_no_load(modInfo, minfos, reasons):
     # don't show up as mergeable.
     return False if reasons else True
 
+def merge_needs_load(modInfo, minfos, verbose):
+    """Return True if isPBashMergeable needs to load the specified plugin. In
+    non-verbose mode, only plugins that pass the checks which don't need
+    loading them get loaded."""
+    return bush.game.Esp.canBash and (
+        verbose or _pbash_mergeable_no_load(modInfo, minfos, None))
+
 def isPBashMergeable(modInfo, minfos, reasons):
-    """Returns True or error message indicating whether specified mod is mergeable."""
+    """Returns True or error message indicating whether specified mod is
+    mergeable. Whether its dependents are mergeable must have been determined
+    already - see ModInfos.rescanMergeable."""
     if not _pbash_mergeable_no_load(modInfo, minfos, reasons) and \
             reasons is None:
         return False  # non verbose mode
@@ -77,36 +86,28 @@ def isPBashMergeable(modInfo, minfos, reasons):
         _('Wrye Bash does not currently support loading plugins for '
           '%(game_name)s.') % {'game_name': bush.game.display_name}):
         return False
-    #--Load test: use generic MreRecord (without unpacking). ModFile.load will
-    # unpack the header which is enough for record.flags1|fid checks
-    merge_types_fact = LoadFactory(False, generic=bush.game.mergeable_sigs)
-    modFile = ModFile(modInfo, merge_types_fact)
-    try:
-        modFile.load_plugin(loadStrings=False, catch_errors=False)
-    except ModError as error:
-        if _exit(f'{error}.'): return False
+    #--Load test: usually precomputed in worker processes, see
+    # ModInfos.rescanMergeable
+    merge_facts = ModHeaderReader.merge_facts(modInfo)
+    if (load_error := merge_facts['load_error']) and _exit(f'{load_error}.'):
+        return False
     #--Skipped over types?
-    if modFile.topsSkipped and _exit(
+    if merge_facts['tops_skipped'] and _exit(
             _('Wrye Bash does not support the following record types: '
               '%(unsupported_rec_types)s.') % {
-                'unsupported_rec_types': _join_sigs(modFile.topsSkipped)}):
+                'unsupported_rec_types': _join_sigs(
+                    merge_facts['tops_skipped'])}):
         return False
     #--Empty mod
-    elif not modFile.tops and _exit(_('This plugin is empty.')):
+    elif merge_facts['is_empty'] and _exit(_('This plugin is empty.')):
         return False
     #--New record
-    newblocks = []
-    self_name = modInfo.fn_key
-    for top_sig, block in modFile.tops.items():
-        for candidate_rec in block.iter_records(): # skip deleted/ignored
-            if candidate_rec.group_key().mod_fn == self_name:
-                if reasons is None: return False
-                newblocks.append(top_sig)
-                break
+    if (newblocks := merge_facts['new_rec_sigs']) and reasons is None:
+        return False
     if newblocks: reasons.append(
         _('This plugin has new records in the following groups: '
           '%(new_rec_groups)s.') % {'new_rec_groups': _join_sigs(newblocks)})
-    dependent = _dependent(self_name, minfos)
+    dependent = _dependent(modInfo.fn_key, minfos)
     if dependent and _exit(_('This plugin is a master of the following non-mergeable '
               'plugins: %(non_mergeable_plugins)s.') % {
                 'non_mergeable_plugins': ', '.join(sorted(dependent))}):
@@ -118,11 +119,11 @@ def _join_sigs(rec_sigs):
 
 def _dependent(minfo_key, minfos):
     """Get mods for which modInfo is a master mod (excluding BPs and
-    mergeable)."""
-    dependent = [mname for mname, info in minfos.items() if not info.isBP() and
-                 minfo_key in info.masterNames and mname not in
-                 minfos.mergeable_plugins]
-    return dependent
+    mergeable). Uses the reverse master map kept up to date by
+    ModInfos._recalc_dependents instead of going through all plugins."""
+    return [mname for mname in minfos.dependents.get(minfo_key, ()) if
+            mname not in minfos.mergeable_plugins and
+            not minfos[mname].isBP()]
 
 def is_esl_capable(modInfo, _minfos, reasons):
     """Determine whether or not the specified mod can be converted to a light
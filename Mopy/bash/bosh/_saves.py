@@ -25,6 +25,8 @@
 coded for rest of the games."""
 # TODO: Oblivion only - we need to support rest of games - help needed
 import array
+import mmap
+import weakref
 from collections import Counter, defaultdict
 from io import BytesIO
 from itertools import repeat, starmap
@@ -307,7 +309,8 @@ def insCopy(buff, siz, backSize=0):
             createdNum = unpack_int(ins)
             with ModReader(self.fileInfo.fn_key, ins) as modReader:
                 for count in range(createdNum):
-                    progress(ins.tell(), _('Reading created…'))
+                    if not count & 0xFF: # progress is not cheap, throttle it
+                        progress(ins.tell(), _('Reading created…'))
                     record = MreRecord(unpack_header(modReader), modReader)
                     self.created[record.fid] = record
                 #--Pre-records: Quickkeys, reticule, interface, regions
@@ -318,7 +321,8 @@ def insCopy(buff, siz, backSize=0):
                 self.preRecords = buff.getvalue()
                 #--Records
                 for count in range(recordsNum):
-                    progress(ins.tell(), _('Reading records…'))
+                    if not count & 0xFF:
+                        progress(ins.tell(), _('Reading records…'))
                     rec_id, *atts, siz = unpack_many(ins, '=IBIBH')
                     self.fid_recNum[rec_id] = (*atts, ins.read(siz))
                 #--Temp Effects, fids, worldids
@@ -540,36 +544,12 @@ def getMaster(modIndex):
                     f'{cumSize // 1024:6d} kb')
 
     def findBloating(self,progress=None):
-        """Analyzes file for bloating. Returns (createdCounts,nullRefCount)."""
-        nullRefCount = 0
-        createdCounts = Counter()
-        progress = progress or bolt.Progress()
-        progress.setFull(len(self.created) + len(self.fid_recNum))
-        #--Created objects
-        progress(0,_(u'Scanning created objects'))
-        for citem in self.created.values():
-            if u'full' in citem.__class__.__slots__:
-                full = citem.full
-            else:
-                full = citem.getSubString(b'FULL')
-            if full:
-                createdCounts[(citem._rec_sig, full)] += 1
-            progress.plus()
-        for k in list(createdCounts):
-            minCount = (50,100)[k[0] == b'ALCH']
-            if createdCounts[k] < minCount:
-                del createdCounts[k]
-        #--Change records
-        progress(len(self.created),_(u'Scanning change records.'))
-        fids = self.fids
-        for rec_id, (rec_kind, rec_flgs, _version, rdata) in \
-                self.fid_recNum.items():
-            if rec_kind == 49 and rec_id >> 24 == 0xFF and (rec_flgs & 2):
-                iref, = struct_unpack(u'I', rdata[4:8])
-                if iref >> 24 != 0xFF and fids[iref] == 0:
-                    nullRefCount += 1
-            progress.plus()
-        return createdCounts,nullRefCount
+        """Analyzes file for bloating. Returns (createdCounts,nullRefCount).
+        See SaveFileView.findBloating for a version that does not need the
+        save to be loaded."""
+        return _find_bloating(self.created.values(), len(self.created),
+            ((rec_id, *rec) for rec_id, rec in self.fid_recNum.items()),
+            len(self.fid_recNum), self.fids, progress)
 
     def removeBloating(self,uncreateKeys,removeNullRefs=True,progress=None):
         """Removes duplicated created items and null refs."""
@@ -644,6 +624,157 @@ def get_npc(self, pc_fid=7):
         npc = SreNPC(recFlags, data)
         return npc, version
 
+#------------------------------------------------------------------------------
+def _find_bloating(created_recs, created_num, change_recs, records_num, fids,
+        progress=None, *, __unpacker=int_unpacker):
+    """Single pass implementation of findBloating - created_recs and
+    change_recs are iterables over the created records and over the change
+    records, the latter as (rec_id, rec_kind, flags, version, data) tuples."""
+    nullRefCount = 0
+    createdCounts = Counter()
+    progress = progress or bolt.Progress()
+    progress.setFull(max(created_num + records_num, 1))
+    #--Created objects
+    progress(0,_(u'Scanning created objects'))
+    for count, citem in enumerate(created_recs):
+        if u'full' in citem.__class__.__slots__:
+            full = citem.full
+        else:
+            full = citem.getSubString(b'FULL')
+        if full:
+            createdCounts[(citem._rec_sig, full)] += 1
+        if not count & 0xFF: # progress is not cheap, throttle it
+            progress(count)
+    for k in list(createdCounts):
+        minCount = (50,100)[k[0] == b'ALCH']
+        if createdCounts[k] < minCount:
+            del createdCounts[k]
+    #--Change records
+    progress(created_num,_(u'Scanning change records.'))
+    for count, (rec_id, rec_kind, rec_flgs, _version, rdata) in enumerate(
+            change_recs, start=created_num):
+        if rec_kind == 49 and rec_id >> 24 == 0xFF and (rec_flgs & 2):
+            iref, = __unpacker(rdata[4:8])
+            if iref >> 24 != 0xFF and fids[iref] == 0:
+                nullRefCount += 1
+        if not count & 0xFF:
+            progress(count)
+    return createdCounts,nullRefCount
+
+class SaveFileView(object):
+    """Read-only, streaming view of a Tes4 save file. Unlike SaveFile.load,
+    which reads the whole save into memory and builds every created record,
+    this maps the file and walks its created and change record tables in
+    place, materializing only the records the caller iterates over. Must be
+    used as a context manager, nothing it hands out is valid outside of it."""
+
+    def __init__(self, saveInfo):
+        self.fileInfo = saveInfo
+        self.header = None # type: OblivionSaveHeader | None
+        #--The FormID array of the save, as a view cast to uint32s
+        self.fids = None # type: memoryview | None
+        self._save_view = None # type: memoryview | None
+        self._reader = None # type: ModReader | None
+        self._created_num = self._created_pos = 0
+        self._records_num = self._records_pos = 0
+        # The change record generators handed out - each may hold a view into
+        # the save while suspended
+        self._change_iters = weakref.WeakSet()
+
+    def __enter__(self):
+        with self.fileInfo.abs_path.open('rb') as ins:
+            save_map = mmap.mmap(ins.fileno(), 0, access=mmap.ACCESS_READ)
+        self._reader = ModReader(self.fileInfo.fn_key, save_map,
+                                 len(save_map)).__enter__()
+        self._save_view = memoryview(save_map)
+        try:
+            self._find_tables(save_map)
+        except:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        # The mapping can't be closed while there are views into it - close
+        # any change record generators left suspended (e.g. by an exception)
+        # first, so that they release the record they are holding
+        for change_iter in list(self._change_iters):
+            change_iter.close()
+        if self.fids is not None:
+            self.fids.release()
+            self.fids = None
+        self._save_view.release()
+        self._save_view = None
+        self._reader.__exit__(exc_type, exc_value, exc_traceback)
+        self._reader = None
+
+    def _find_tables(self, ins):
+        """Read the header and skip over everything but the record tables and
+        the FormID array, remembering where they start - see SaveFile.load
+        for the layout."""
+        self.header = OblivionSaveHeader(self.fileInfo, ins=ins)
+        fidsPointer, self._records_num = unpack_many(ins, '2I')
+        ins.seek(8 * 4, 1) # pre-globals
+        ins.seek(8 * unpack_short(ins), 1) # globals
+        for x in range(4): # pre-created
+            ins.seek(unpack_short(ins), 1)
+        ins.seek(4, 1)
+        self._created_num = unpack_int(ins)
+        self._created_pos = ins.tell()
+        for x in range(self._created_num):
+            unpack_header(self._reader).skip_blob(self._reader)
+        for x in range(4): # pre-records
+            ins.seek(unpack_short(ins), 1)
+        self._records_pos = ins.tell()
+        ins.seek(fidsPointer)
+        fids_end = fidsPointer + 4 + 4 * unpack_int(ins)
+        if fids_end > len(self._save_view):
+            raise ModError(self.fileInfo.fn_key, 'FormID array from Mars.')
+        self.fids = self._save_view[fidsPointer + 4:fids_end].cast('I')
+
+    def iter_created(self):
+        """Yield the created records (ALCH, SPEL, ENCH, etc.) one by one, as
+        generic MreRecords - like the values of SaveFile.created, but only
+        one of them is around at any time."""
+        reader = self._reader
+        rec_pos = self._created_pos
+        for count in range(self._created_num):
+            reader.seek(rec_pos)
+            record = MreRecord(unpack_header(reader), reader)
+            rec_pos = reader.tell()
+            yield record
+
+    def iter_change_records(self):
+        """Yield (rec_id, rec_kind, flags, version, data) tuples for the change
+        records - like the items of SaveFile.fid_recNum, except that data is a
+        view into the save, which is released once the next record is
+        requested or the view is exited."""
+        change_iter = self._iter_change_records()
+        self._change_iters.add(change_iter)
+        return change_iter
+
+    def _iter_change_records(self, *,
+            __unpacker=structs_cache['=IBIBH'].unpack_from):
+        save_view = self._save_view
+        rec_pos = self._records_pos
+        for count in range(self._records_num):
+            rec_id, rec_kind, rec_flgs, version, siz = __unpacker(save_view,
+                                                                  rec_pos)
+            rec_pos += 12
+            rdata = save_view[rec_pos:rec_pos + siz]
+            rec_pos += siz
+            try:
+                yield rec_id, rec_kind, rec_flgs, version, rdata
+            finally:
+                rdata.release()
+
+    def findBloating(self, progress=None):
+        """Same as SaveFile.findBloating, but in a single pass over the save
+        with constant memory use."""
+        return _find_bloating(self.iter_created(), self._created_num,
+            self.iter_change_records(), self._records_num, self.fids,
+            progress)
+
 #------------------------------------------------------------------------------
 class _SaveData:
     """Encapsulate common SaveFile manipulations."""
@@ -23,6 +23,7 @@
 """BAIN backbone classes."""
 from __future__ import annotations
 
+import array
 import collections
 import copy
 import io
@@ -33,13 +34,14 @@
 import time
 from collections import defaultdict
 from collections.abc import Iterable
+from contextlib import closing
 from functools import partial
 from itertools import chain, groupby
 from operator import attrgetter, itemgetter
-from zlib import crc32
 
 from . import DataStore, InstallerConverter, ModInfos, bain_image_exts, \
     best_ini_files, data_tracking_stores, RefrData, Corrupted
+from .bsa_files import get_bsa_type
 from .. import archives, bass, bolt, bush, env
 from ..archives import compress7z, defaultExt, extract7z, list_archive, \
     readExts
@@ -57,6 +59,50 @@
 
 _fnames = Iterable[FName] | None
 
+# Installers.dat helpers - store the installers' file tables in columns, a
+# handful of big objects being much faster to (un)pickle than many tuples
+_TABLE_ATTRS = frozenset(('fileSizeCrcs', 'src_sizeCrcDate'))
+
+def _pack_file_table(table):
+    """Pack a list of (path, size, crc) tuples or a dict of path ->
+    (size, crc, date) tuples into the paths joined by NUL plus one array per
+    remaining field. Raises TypeError/OverflowError for unpackable values."""
+    if is_dict := isinstance(table, dict):
+        paths, rows = list(table), list(table.values())
+    else:
+        paths, rows = [r[0] for r in table], [r[1:] for r in table]
+    cols = [*zip(*rows)] or [()] * (3 if is_dict else 2)
+    return is_dict, '\0'.join(paths), *(
+        array.array(typecode, col) for typecode, col in zip('qId', cols))
+
+def _unpack_file_table(packed):
+    """Inverse of _pack_file_table."""
+    is_dict, paths, *cols = packed
+    paths = paths.split('\0') if paths else []
+    if is_dict:
+        return bolt.LowerDict(zip(paths, zip(*cols)))
+    return [*zip(paths, *cols)]
+
+class _FileTable:
+    """An installer file table that is kept packed as loaded from
+    Installers.dat until it is first accessed, when it is unpacked in place.
+    Installers whose tables are never accessed pickle them as loaded."""
+    __slots__ = ('_packed_attr',)
+
+    def __set_name__(self, owner, name):
+        self._packed_attr = f'_{name}'
+
+    def __get__(self, instance, owner=None):
+        if instance is None: return self
+        table = getattr(instance, self._packed_attr)
+        if type(table) is tuple: # still packed
+            table = _unpack_file_table(table)
+            setattr(instance, self._packed_attr, table)
+        return table
+
+    def __set__(self, instance, table):
+        setattr(instance, self._packed_attr, table)
+
 # Walk Data and project dir helpers - we don't want to refactor the common walk
 # logic and pass a function to be called for each file - lots of overhead
 def _remove_empty_dirs(root_dir):
@@ -95,27 +141,65 @@ def _scandir_walk(apath, *, __root_len=None, __folders_times=None):
     return size_apath_date, __folders_times
 
 def _walk_data_dirs(apath, siz_apath_mtime, new_sizeCrcDate, root_len,
-                    oldGet, remove_empty):
+                    oldGet, remove_empty, old_tree, new_tree, stable_before):
     """Recursively walk the top directories of the Data/ dir. See
     _scandir_walk for a similar pattern -  note complications like
-    empty dirs handling."""
+    empty dirs handling.
+
+    old_tree and new_tree map directories (relative to the Data/ dir) to
+    their mtime and the names of the files and subdirectories in them. If a
+    directory's mtime did not change since it was cached in old_tree, its
+    cached listing is used and its files are not stat'ed again - files
+    edited in place without touching their directory are only picked up by
+    a full refresh. Directories modified after stable_before are not cached
+    as their mtime may not reflect all changes yet. new_tree is None if
+    listings should not be cached at all (quick Data scan disabled)."""
     ##: add Subprogress for super accurate and slow progress bars
-    nodes = [*os.scandir(apath)]
-    if not nodes:
+    rel_dir = apath[root_len:]
+    cached = None
+    if new_tree is not None:
+        dir_mtime = os.stat(apath).st_mtime
+        if (cached := old_tree.get(rel_dir)) and cached[0] != dir_mtime:
+            cached = None
+    if cached:
+        nodes, file_names, dir_names = None, *cached[1:]
+    else:
+        nodes = [*os.scandir(apath)]
+        dir_names, file_names = [], []
+        for dirent in nodes:
+            (dir_names if dirent.is_dir() else file_names).append(dirent.name)
+    if new_tree is not None:
+        new_tree[rel_dir] = (dir_mtime if dir_mtime < stable_before else None,
+                             file_names, dir_names)
+    if not file_names and not dir_names:
         return 0, 0
     has_files = 0
     possible_empty = []
-    for dirent in nodes:
-        if dirent.is_dir():
-            subdir_files = _walk_data_dirs(dirent.path, siz_apath_mtime,
-                new_sizeCrcDate, root_len, oldGet, remove_empty)
-            if subdir_files:
-                has_files = True
-            elif remove_empty:
-                possible_empty.append(dirent.path)
-        else:
-            # we don't delete folders that contain files (even 0-size ones)
+    for dir_name in dir_names:
+        subdir_files = _walk_data_dirs(os.path.join(apath, dir_name),
+            siz_apath_mtime, new_sizeCrcDate, root_len, oldGet, remove_empty,
+            old_tree, new_tree, stable_before)
+        if subdir_files:
             has_files = True
+        elif remove_empty:
+            possible_empty.append(os.path.join(apath, dir_name))
+    # we don't delete folders that contain files (even 0-size ones)
+    if file_names: has_files = True
+    if nodes is None: # unchanged directory, only stat files we know nothing of
+        for file_name in file_names:
+            rpFile = os.path.join(rel_dir, file_name)
+            if old_scd := oldGet(rpFile):
+                new_sizeCrcDate[rpFile] = old_scd
+                continue
+            asFile = os.path.join(apath, file_name)
+            try:
+                st = os.stat(asFile)
+            except FileNotFoundError:
+                continue
+            siz_apath_mtime[rpFile] = (st.st_size, asFile, st.st_mtime)
+    else:
+        for dirent in nodes:
+            if dirent.is_dir(): continue
             rpFile = dirent.path[root_len:]
             oSize, oCrc, oDate = oldGet(rpFile) or (0, 0, 0.0)
             lstat_size, date = (st := dirent.stat()).st_size, st.st_mtime
@@ -148,6 +232,8 @@ class Installer(ListInfo):
         'missingFiles', 'mismatchedFiles', 'project_refreshed', 'unSize',
         'espms', 'underrides', 'hasWizard', 'espmMap', 'hasReadme', 'hasBCF',
         'hasBethFiles', 'has_fomod_conf')
+    fileSizeCrcs = _FileTable()
+    src_sizeCrcDate = _FileTable()
 
     #--Package analysis/porting.
     type_string = _('Unrecognized')
@@ -236,18 +322,14 @@ def calc_crcs(to_calc, rootName, new_sizeCrcDate, progress):
         progress_msg = f'{rootName}\n' + _('Calculating CRCs…') + '\n'
         progress(0, progress_msg)
         progress.setFull(len(to_calc))
-        for i, (rpFile, (siz, asFile, date)) in enumerate(dict_sort(to_calc)):
-            progress(i, progress_msg + rpFile)
-            final_crc = 0
-            try:
-                with open(asFile, u'rb') as ins:
-                    while block := ins.read(2097152): # 2MB at a time
-                        final_crc = crc32(block, final_crc)
-            except OSError:
-                deprint(
-                    f'Failed to calculate crc for {asFile} - please report '
-                    f'this, and the following traceback:', traceback=True)
-            new_sizeCrcDate[rpFile] = (siz, final_crc, date) # crc = 0 on error
+        calculated = {}
+        with closing(bolt.threaded_crcs({rpFile: asFile for rpFile, (
+                _siz, asFile, _date) in to_calc.items()})) as crc_results:
+            for i, (rpFile, final_crc) in enumerate(crc_results):
+                progress(i, progress_msg + rpFile)
+                calculated[rpFile] = final_crc or 0 # crc = 0 on error
+        for rpFile, (siz, _asFile, date) in dict_sort(to_calc):
+            new_sizeCrcDate[rpFile] = (siz, calculated[rpFile], date)
 
     #--Initialization, etc ----------------------------------------------------
     def __init__(self, fn_key, **kwargs):
@@ -312,7 +394,17 @@ def initDefault(self):
         self.mismatchedFiles = set()
 
     @property
-    def num_of_files(self): return len(self.fileSizeCrcs)
+    def num_of_files(self):
+        if type(table := self._fileSizeCrcs) is tuple: # don't unpack it
+            return len(table[2])
+        return len(table)
+
+    def _iter_file_sizes_crcs(self):
+        """Iterate over fileSizeCrcs without unpacking it."""
+        if type(table := self._fileSizeCrcs) is tuple:
+            paths = table[1].split('\0') if table[1] else []
+            return zip(paths, *table[2:])
+        return table
 
     @staticmethod
     def number_string(number, marker_string=u''):
@@ -416,6 +508,22 @@ def __reduce__(self):
         """Used by pickler to save object state."""
         raise NotImplementedError(f'{type(self)} must define __reduce__')
 
+    def _persistent_values(self):
+        """Yield the values of the persistent attributes for pickling, with
+        the file tables packed. Tables that were never unpacked are yielded as
+        loaded, the rest are packed again."""
+        for att in self.persistent:
+            if att not in _TABLE_ATTRS:
+                yield getattr(self, att)
+                continue
+            att_val = getattr(self, f'_{att}')
+            if att_val and type(att_val) is not tuple:
+                try:
+                    att_val = _pack_file_table(att_val)
+                except (TypeError, OverflowError): # pickle it as is
+                    pass
+            yield att_val
+
     def __setstate__(self,values):
         """Used by unpickler to recreate object."""
         try:
@@ -432,7 +540,7 @@ def get_hide_dir(self): ##: Copy-pasted from InstallersData.hidden_dir!
 
     def __setstate(self,values):
         for a, v in zip(self.persistent, values[1:]):
-            setattr(self, a, v)
+            setattr(self, a, v) # file tables are unpacked when accessed
         rescan = False
         ##: This is a whole load of backwards compat code - should be dropped
         # at some point in the (more or less far, depending on when the code
@@ -458,7 +566,8 @@ def __setstate(self,values):
             value_type=lambda v: FName('%s' % v))  # Path -> FName
         if isinstance(self, _InstallerPackage):
             self._file_key = bass.dirs['installers'].join(self.fn_key)
-            if not isinstance(self.src_sizeCrcDate, bolt.LowerDict):
+            # packed tables unpack to a LowerDict
+            if not isinstance(self._src_sizeCrcDate, (tuple, bolt.LowerDict)):
                 self.src_sizeCrcDate = bolt.LowerDict(
                     (u'%s' % x, y) for x, y in self.src_sizeCrcDate.items())
             if not isinstance(self.dirty_sizeCrc, bolt.LowerDict):
@@ -802,7 +911,9 @@ def refreshDataSizeCrc(self, checkOBSE=False, *, splitExt=os.path.splitext,
                 for filename, sizeCrc in self.ci_dest_sizeCrc.items():
                     if filename not in dirty_sizeCrc:
                         dirty_sizeCrc[filename] = sizeCrc
-            self.ci_dest_sizeCrc.clear()
+            # don't clear in place - InstallersData._sync_dest_index relies on
+            # ci_dest_sizeCrc being replaced whenever it changes
+            self.ci_dest_sizeCrc = bolt.LowerDict()
             return dest_src
         archiveRoot = self.fn_key.fn_body if self._valid_exts_re else \
             self.fn_key
@@ -854,7 +965,7 @@ def refreshDataSizeCrc(self, checkOBSE=False, *, splitExt=os.path.splitext,
         fm_dict = self.extras_dict.get('fomod_dict_v2', {})
         module_config = os.path.join(u'fomod', u'moduleconfig.xml')
         iprocess = Installer._attributes_process
-        for full, cached_size, crc in self.fileSizeCrcs:
+        for full, cached_size, crc in self._iter_file_sizes_crcs():
             if rootIdex: # exclude all files that are not under root_dir
                 if not full.startswith(root_path): continue
             full_rel = full[rootIdex:]
@@ -1012,7 +1123,8 @@ def refreshDataSizeCrc(self, checkOBSE=False, *, splitExt=os.path.splitext,
     def _find_root_index(self, _os_sep=os_sep, skips_start=_silentSkipsStart):
         # basically just care for skips and complex/simple packages
         # Sort file names as (dir_path, filename) pairs
-        self.fileSizeCrcs.sort(key=lambda x: os.path.split(x[0].lower()))
+        self.fileSizeCrcs = sorted(self.fileSizeCrcs,
+                                   key=lambda x: os.path.split(x[0].lower()))
         #--Find correct starting point to treat as BAIN package
         self.extras_dict.pop(u'root_path', None)
         self.fileRootIdex = 0
@@ -1435,7 +1547,7 @@ def initDefault(self):
     def __reduce__(self):
         from . import InstallerMarker as boshInstallerMarker
         return boshInstallerMarker, (self.fn_key,), ('%s' % self.fn_key,
-            *(getattr(self, a) for a in self.persistent))
+            *self._persistent_values())
 
     @property
     def num_of_files(self): return -1
@@ -1502,7 +1614,7 @@ def validate_filename_str(cls, name_str, allowed_exts=archives.writeExts,
     def __reduce__(self):
         from . import InstallerArchive as boshInstallerArchive
         return boshInstallerArchive, (self.fn_key,), (f'{self.fn_key}',
-                *(getattr(self, a) for a in self.persistent))
+                *self._persistent_values())
 
     #--File Operations --------------------------------------------------------
     def _fs_refresh(self, progress, stat_tuple, **kwargs):
@@ -1668,6 +1780,11 @@ class InstallerProject(_InstallerPackage):
     """Represents a directory/build installer entry."""
     type_string = _('Project')
     is_project = True
+    # The Data subfolders that the games load assets from BSAs for - see
+    # pack_to_bsa
+    _bsa_asset_dirs = frozenset(('grass', 'interface', 'lodsettings',
+        'materials', 'meshes', 'music', 'scripts', 'seq', 'shadersfx', 'sound',
+        'strings', 'textures', 'trees', 'vis'))
 
     @staticmethod
     def _new_name(base_name, count):
@@ -1676,7 +1793,7 @@ def _new_name(base_name, count):
     def __reduce__(self):
         from . import InstallerProject as boshInstallerProject
         return boshInstallerProject, (self.fn_key,), ('%s' % self.fn_key,
-            *(getattr(self, a) for a in self.persistent))
+            *self._persistent_values())
 
     # AFile API - InstallerProject is a folder not a file, special handling
     def do_update(self, raise_on_error=False, force_update=False, **kwargs):
@@ -1771,6 +1888,21 @@ def _install(self, dest_src, progress):
     def sync_from_data(self, delta_files: set[CIstr], progress):
         return self._do_sync_data(self.abs_path, delta_files, progress)
 
+    def pack_to_bsa(self, bsa_fname: FName, progress):
+        """Pack the assets this project would install into a new archive of
+        the game's BSA type, named bsa_fname and written to the root of the
+        project. Only assets in folders that the game loads from BSAs get
+        packed, the loose assets are left in place. Returns the number of
+        packed assets."""
+        src_join = self.abs_path.join
+        asset_sources = {dest: src_join(src).s for dest, src in
+                         self.refreshDataSizeCrc().items() if dest.split(
+                             os.sep, 1)[0].lower() in self._bsa_asset_dirs}
+        if asset_sources:
+            get_bsa_type(bush.game.fsName)(src_join(bsa_fname)).pack_assets(
+                asset_sources, progress=progress)
+        return len(asset_sources)
+
     @staticmethod
     def _list_package(apath, log):
         def walkPath(folder, depth):
@@ -1821,12 +1953,19 @@ def __init__(self):
         #--Persistent data
         self.dictFile = bolt.PickleDict(self.bash_dir.join(u'Installers.dat'))
         self.data_sizeCrcDate = bolt.LowerDict()
+        # maps Data/ subdirectories to their mtime and listing - see
+        # _walk_data_dirs. Only kept while the quick Data scan is enabled
+        self.data_dir_tree = {}
         from . import converters
         self.converters_data = converters.ConvertersData(bass.dirs['bainData'],
             bass.dirs[u'converters'], bass.dirs[u'dupeBCFs'],
             bass.dirs[u'corruptBCFs'], bass.dirs[u'installers'])
         #--Volatile
         self.ci_underrides_sizeCrc = bolt.LowerDict() # underridden files
+        # inverted index of the packages' ci_dest_sizeCrc: maps each
+        # destination file to a dict of package name -> (size, crc)
+        self._dest_index = bolt.LowerDict()
+        self._indexed_dests = {} # package name -> indexed ci_dest_sizeCrc
         self.hasChanged = False
         self.loaded = False
         self.lastKey = FName(u'==Last==')
@@ -1926,19 +2065,21 @@ def irefresh(self, progress=None, what=u'DIONSC', fullRefresh=False,
             refresh_info.redraw.update(reordered)
             changes |= bool(reordered)
         if 'N' in what or changes:
-            #--dict mapping all should-be-installed files to their attributes
-            norm_sizeCrc = bolt.LowerDict()
-            for package in (x for x in self.sorted_values() if x.is_active):
-                norm_sizeCrc.update(package.ci_dest_sizeCrc)
+            self._sync_dest_index()
             # Populate self.ci_underrides_sizeCrc with all underridden files -
             # files installed in data dir, but from a lower loading installer
             # (or manually)
             ci_underrides_sizeCrc = bolt.LowerDict()
-            for path, sizeCrc in norm_sizeCrc.items():
+            for path, pkg_sizeCrc in self._dest_index.items():
                 try:
-                    if sizeCrc != (data_sc := self.data_sizeCrcDate[path][:2]):
-                        ci_underrides_sizeCrc[path] = data_sc
-                except KeyError: pass # file is not installed in data dir
+                    data_sc = self.data_sizeCrcDate[path][:2]
+                except KeyError: continue # file is not installed in data dir
+                # the should-be-installed version comes from the highest
+                # ordered active package
+                active_sc = [(inst.order, sizeCrc) for pkg, sizeCrc in
+                             pkg_sizeCrc.items() if (inst := self[pkg]).is_active]
+                if active_sc and max(active_sc)[1] != data_sc:
+                    ci_underrides_sizeCrc[path] = data_sc
             changes |= self.ci_underrides_sizeCrc != ci_underrides_sizeCrc
             self.ci_underrides_sizeCrc = ci_underrides_sizeCrc
         if 'S' in what or changes:
@@ -1951,6 +2092,23 @@ def irefresh(self, progress=None, what=u'DIONSC', fullRefresh=False,
         if changes: self.hasChanged = True
         return refresh_info
 
+    def _sync_dest_index(self):
+        """Bring self._dest_index up to date. Only packages whose
+        ci_dest_sizeCrc was replaced (or that were added or removed) since the
+        last sync are reindexed, so this is cheap when nothing changed."""
+        dest_index, indexed = self._dest_index, self._indexed_dests
+        for pkg in [k for k, v in indexed.items() if
+                    k not in self or self[k].ci_dest_sizeCrc is not v]:
+            for ci_dest in indexed.pop(pkg):
+                pkg_sizeCrc = dest_index[ci_dest]
+                del pkg_sizeCrc[pkg]
+                if not pkg_sizeCrc: del dest_index[ci_dest]
+        for pkg, installer in self.items():
+            if pkg not in indexed:
+                indexed[pkg] = dest_sc = installer.ci_dest_sizeCrc
+                for ci_dest, sizeCrc in dest_sc.items():
+                    dest_index.setdefault(ci_dest, {})[pkg] = sizeCrc
+
     def refresh_ns(self, *args, **kwargs):
         self.irefresh(*args, **kwargs, what='NS')
 
@@ -1970,6 +2128,7 @@ def __load(self, progress):
         pickle = pickl_data.get(u'sizeCrcDate', {})
         self.data_sizeCrcDate = bolt.LowerDict(pickle) if not isinstance(
             pickle, bolt.LowerDict) else pickle
+        self.data_dir_tree = pickl_data.pop('dataDirTree', {})
         # fixup: all markers had their fn_key attribute set to '===='
         for fn_inst, inst in list(self.items()):
             if inst.is_marker:
@@ -1984,7 +2143,11 @@ def save_pickle(self):
         if self.hasChanged:
             self.dictFile.pickled_data[u'installers'] = self._data
             self.dictFile.pickled_data[u'sizeCrcDate'] = self.data_sizeCrcDate
-            self.dictFile.vdata[u'version'] = 2
+            if self.data_dir_tree:
+                self.dictFile.pickled_data['dataDirTree'] = self.data_dir_tree
+            else:
+                self.dictFile.pickled_data.pop('dataDirTree', None)
+            self.dictFile.vdata['version'] = 3 # packed file tables
             self.dictFile.save()
             self.converters_data.save()
             self.hasChanged = False
@@ -2327,10 +2490,19 @@ def _refresh_from_data_dir(self, progress, recalculate_all_crcs):
         progress.setFull(1 + len(dirs_paths))
         #--Remove empty dirs?
         remove_empty = bass.settings['bash.installers.removeEmptyDirs']
+        #--Only rescan directories that changed? Not on a full refresh
+        if not bass.settings['bash.installers.quickDataScan']:
+            old_tree, new_tree = {}, None # don't build the tree at all
+        else:
+            old_tree = {} if recalculate_all_crcs else self.data_dir_tree
+            new_tree = {}
+        # allow for coarse directory mtime resolution (FAT has 2 seconds)
+        stable_before = time.time() - 2
         for dex, (top_dir, dir_path) in enumerate(dict_sort(dirs_paths)):
             progress(dex, f'{progress_msg}{top_dir}')
             has_files = _walk_data_dirs(dir_path, siz_apath_mtime,
-                new_sizeCrcDate, root_len, oldGet, remove_empty)
+                new_sizeCrcDate, root_len, oldGet, remove_empty, old_tree,
+                new_tree, stable_before)
             if remove_empty and not has_files:
                 GPath_no_norm(dir_path).removedirs(raise_error=False)
         #--Force update?
@@ -2348,6 +2520,7 @@ def _refresh_from_data_dir(self, progress, recalculate_all_crcs):
         Installer.calc_crcs(siz_apath_mtime, dirname, new_sizeCrcDate,
                             progress)
         self.data_sizeCrcDate = new_sizeCrcDate
+        self.data_dir_tree = {} if new_tree is None else new_tree
         self.update_for_overridden_skips(progress=progress) #after final_update
         #--Done
         return change
@@ -2995,13 +3168,20 @@ def find_conflicts(self, src_installer, active_bsas=None, bsa_cause=None,
             # Calculate all conflicts and save them in lower_bsa and higher_bsa
             asset_to_bsa, src_assets = self.find_src_assets(src_installer,
                                                             active_bsas)
+            # conflicting assets from this installer active bsas - look them
+            # up in the asset index of all active BSAs
+            from . import bsaInfos
+            asset_index, failed_bsas = bsaInfos.get_asset_index(active_bsas)
+            bsa_conflicts = defaultdict(set)
+            for src_asset in src_assets:
+                for b_inf in asset_index.get(src_asset, ()):
+                    bsa_conflicts[b_inf].add(src_asset)
             remaining_bsas = copy.copy(active_bsas)
             def _process_bsa_conflicts(b_inf, b_source):
-                try: # conflicting assets from this installer active bsas
-                    curConflicts = b_inf.assets & src_assets
-                except BSAError:
+                if b_inf in failed_bsas:
                     self._parse_error(b_inf, b_source)
                     return
+                curConflicts = bsa_conflicts.get(b_inf)
                 # We've used this BSA for a conflict, don't use it again
                 del remaining_bsas[b_inf]
                 if curConflicts:
@@ -3042,21 +3222,27 @@ def _sort_bsa_conflicts(bsa_conflict):
                 return active_bsas[bsa_conflict[1]]
             lower_bsa.sort(key=_sort_bsa_conflicts)
             higher_bsa.sort(key=_sort_bsa_conflicts)
-        # Calculate loose conflicts
-        lower_loose, higher_loose = [], []
-        for package, installer in self.sorted_pairs():
-            if installer.order == srcOrder or not (
+        # Calculate loose conflicts - look up the packages that install each
+        # of the source files in the inverted index
+        self._sync_dest_index()
+        inst_conflicts = defaultdict(list)
+        for ci_dest in mismatched:
+            src_sc = src_sizeCrc.get(ci_dest)
+            for package, sizeCrc in self._dest_index.get(ci_dest, {}).items():
+                if sizeCrc == src_sc: continue
+                installer = self[package]
+                if installer.order == srcOrder or not (
                         showInactive or installer.is_active): continue
-            if not showLower and installer.order < srcOrder: continue
-            curConflicts = bolt.sortFiles(
-                [x for x, y in installer.ci_dest_sizeCrc.items()
-                if x in mismatched and y != src_sizeCrc[x]])
-            if curConflicts:
-                if installer.order < srcOrder:
-                    conflict_type = lower_loose
-                else:
-                    conflict_type = higher_loose
-                conflict_type.append((installer, package, curConflicts))
+                if not showLower and installer.order < srcOrder: continue
+                inst_conflicts[installer].append(ci_dest)
+        lower_loose, higher_loose = [], []
+        for installer in sorted(inst_conflicts, key=attrgetter('order')):
+            if installer.order < srcOrder:
+                conflict_type = lower_loose
+            else:
+                conflict_type = higher_loose
+            conflict_type.append((installer, installer.fn_key,
+                                  bolt.sortFiles(inst_conflicts[installer])))
         return lower_loose, higher_loose, lower_bsa, higher_bsa
 
     def find_src_assets(self, src_installer, active_bsas):
@@ -34,7 +34,8 @@
 import os
 import typing
 import zlib
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from itertools import chain, groupby
 from operator import itemgetter
@@ -48,7 +49,9 @@
     struct_error, struct_unpack, structs_cache, unpack_byte, unpack_int
 from ..env import convert_separators
 from ..exception import BSACompressionError, BSADecodingError, \
-    BSADecompressionError, BSADecompressionSizeError, BSAError, BSAFlagError
+    BSADecompressionError, BSADecompressionSizeError, BSAError, \
+    BSAFlagError, DDSError
+from ..wbtemp import TempFile
 
 _bsa_encoding = 'cp1252' # rumor has it that's the files/folders names encoding
 path_sep = u'\\'
@@ -60,6 +63,54 @@ def _decode_path(byte_path: bytes, bsa_name: str):
     except UnicodeDecodeError:
         raise BSADecodingError(bsa_name, byte_path)
 
+def _encode_path(path: str, bsa_name: str):
+    try:
+        return path.encode(_bsa_encoding)
+    except UnicodeEncodeError:
+        raise BSAError(bsa_name, f'Unencodable path {path!r}')
+
+def _read_spans(bsa_file, spans, max_batch=1 << 24):
+    """Yield a buffer with the data of each (offset, size) span in turn.
+    Spans that are contiguous in the file are read in batches of up to
+    max_batch bytes, so the spans should be sorted by offset."""
+    batch_sizes = []
+    batch_start = batch_end = 0
+    for span_offset, span_size in spans:
+        if batch_sizes and (span_offset != batch_end or
+                span_offset + span_size - batch_start > max_batch):
+            yield from _slice_batch(bsa_file, batch_start, batch_sizes)
+            batch_sizes = []
+        if not batch_sizes: batch_start = span_offset
+        batch_sizes.append(span_size)
+        batch_end = span_offset + span_size
+    if batch_sizes:
+        yield from _slice_batch(bsa_file, batch_start, batch_sizes)
+
+def _slice_batch(bsa_file, batch_start, batch_sizes):
+    bsa_file.seek(batch_start)
+    batch = memoryview(bsa_file.read(sum(batch_sizes)))
+    pos = 0
+    for span_size in batch_sizes:
+        yield batch[pos:(pos := pos + span_size)]
+
+def _pack_records(pack_jobs, pack_record, max_threads=8, max_pending=64):
+    """Run pack_record on each of pack_jobs on a pool of threads - file
+    reads, zlib and lz4 release the GIL - and yield the results in order. At
+    most max_pending jobs are in flight, so only that many packed records are
+    held in memory."""
+    num_threads = min(max_threads, os.cpu_count() or 1)
+    pack_pool = ThreadPoolExecutor(num_threads, thread_name_prefix='bsa')
+    try:
+        pending = deque()
+        for job in pack_jobs:
+            pending.append(pack_pool.submit(pack_record, job))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pack_pool.shutdown(wait=True, cancel_futures=True)
+
 class _BsaCompressionType(object):
     """Abstractly represents a way of compressing and decompressing BSA
     records."""
@@ -309,20 +360,21 @@ def embed_filenames(self): return False
 # Records ---------------------------------------------------------------------
 class _HashedRecord(object):
     __slots__ = (u'record_hash',)
-    formats = [(u'Q', struct_calcsize(u'Q'))]
+    # BSAs use 64-bit hashes, BA2s 32-bit ones
+    hash_format = ('Q', struct_calcsize('Q'))
 
     def load_record(self, ins): # make this into a cls static factory?
-        f, f_size = _HashedRecord.formats[0]
+        f, f_size = self.hash_format
         self.record_hash, = struct_unpack(f, ins.read(f_size))
 
     def load_record_from_buffer(self, memview, start):
-        f, f_size = _HashedRecord.formats[0]
+        f, f_size = self.hash_format
         self.record_hash, = _unpack_from(f, memview, start)
         return start + f_size
 
     @classmethod
     def total_record_size(cls):
-        return _HashedRecord.formats[0][1]
+        return cls.hash_format[1]
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
@@ -434,6 +486,7 @@ class Ba2FileRecordGeneral(_BsaHashedRecord):
     # unused1 is always BAADF00D
     __slots__ = (u'file_extension', u'dir_hash', u'unknown1', u'offset',
                  u'packed_size', u'unpacked_size', u'unused1')
+    hash_format = ('I', struct_calcsize('I'))
     formats = [(f, struct_calcsize(f)) for f in (u'4s', u'I', u'I', u'Q', u'I',
                                                  u'I', u'I')]
 
@@ -443,6 +496,7 @@ class Ba2FileRecordTexture(_BsaHashedRecord):
     __slots__ = (u'file_extension', u'dir_hash', u'unknown_tex',
                  u'num_chunks', u'chunk_header_size', u'height', u'width',
                  u'num_mips', u'dxgi_format', u'cube_maps', u'tex_chunks')
+    hash_format = ('I', struct_calcsize('I'))
     formats = [(f, struct_calcsize(f)) for f in (u'4s', u'I', u'B', u'B', u'H',
                                                  u'H', u'H', u'B', u'B', u'H')]
 
@@ -494,6 +548,10 @@ class ABsa(AFile):
     _compression_type: _BsaCompressionType = _Bsa_zlib
     _folder_type = BSAFolder
     bsa_folders: defaultdict[str, _folder_type]
+    # Sound files are streamed straight from the archive, never compress them
+    _stored_extensions = frozenset(('.fuz', '.wav', '.xwm'))
+    # Whether we can write archives of this type - see pack_assets
+    supports_packing = False
 
     def __init__(self, fullpath, load_cache=False, names_only=True):
         super().__init__(fullpath)
@@ -549,52 +607,97 @@ def extract_assets(self, asset_paths, dest_folder, progress=None):
         :param progress: The progress callback to use. None if unwanted."""
         folder_files_dict = self._map_files_to_folders(asset_paths)
         del asset_paths # forget about this
-        # load the bsa - this should be reworked to load only needed records
-        self._load_bsa()
+        # load the bsa - only the file records of the folders we need
+        self._load_bsa(wanted_folders=folder_files_dict)
         folder_to_assets = self._map_assets_to_folders(folder_files_dict)
         # unload the bsa
         self.bsa_folders.clear()
-        # get the data from the file
-        global_compression = self.bsa_header.is_compressed()
+        compressed = self.bsa_header.is_compressed()
+        embed_names = self.bsa_header.embed_filenames()
+        self._extract_records(self._extract_jobs(folder_to_assets,
+            dest_folder, lambda record: [(record.raw_file_data_offset,
+                                          record.raw_data_size())]),
+            partial(self._extract_bsa_record, compressed, embed_names),
+            progress)
+
+    def _extract_bsa_record(self, global_compression, embed_names, out_path,
+                            record, rec_datas):
+        """Strip the embedded file name, decompress if needed and write out
+        the data of a file record. Runs in a worker thread."""
+        raw_data = rec_datas[0]
+        if embed_names: # discard filename - use len(filename) ?
+            raw_data = raw_data[raw_data[0] + 1:]
+        if global_compression != bool(record.compression_toggle()):
+            # This is a compressed record, so decompress it
+            uncompressed_size, = _unpack_from('I', raw_data)
+            try:
+                raw_data = self._compression_type.decompress_rec(
+                    raw_data[4:], uncompressed_size, self.bsa_name)
+            except BSAError:
+                # Ignore errors for Fallout - Misc.bsa - Bethesda probably
+                # used an old buggy zlib version when packing it (taken from
+                # BSArch sources)
+                if self.bsa_name == u'Fallout - Misc.bsa':
+                    return
+                raise
+        with open(out_path, 'wb') as out:
+            out.write(raw_data)
+
+    @staticmethod
+    def _extract_jobs(folder_to_assets, dest_folder, record_spans):
+        """Create the target directories and return a list of (folder,
+        out_path, record, spans) tuples sorted by the offset of the record
+        data in the BSA. record_spans returns the (offset, size) spans of the
+        data of a record."""
+        extract_jobs = []
+        for folder, file_records in folder_to_assets.items():
+            # BSA paths always have backslashes, so we need to convert them
+            # to the platform's path separators before we extract
+            target_dir = os.path.join(dest_folder, *folder.split(path_sep))
+            os.makedirs(target_dir, exist_ok=True)
+            extract_jobs.extend((folder, os.path.join(target_dir, filename),
+                rec, record_spans(rec)) for filename, rec in file_records)
+        extract_jobs.sort(key=lambda j: j[3][0][0] if j[3] else 0)
+        return extract_jobs
+
+    def _extract_records(self, extract_jobs, extract_record, progress,
+                         max_threads=8, max_pending=1 << 26):
+        """Read the data of extract_jobs (see _extract_jobs) from this BSA in
+        offset order and pass it to extract_record(out_path, record, datas)
+        on a pool of threads - zlib, lz4 and file writes release the GIL. At
+        most max_pending bytes of read data are waiting to be extracted."""
         if progress:
-            progress.setFull(len(folder_to_assets))
-        with open(self.abs_path, u'rb') as bsa_file:
-            for i, (folder, file_records) in enumerate(folder_to_assets.items()):
-                if progress:
-                    progress(i, f"{_('Extracting %(target_bsa)s…')}"
-                                f"\n{folder}" % {'target_bsa': self.bsa_name})
-                # BSA paths always have backslashes, so we need to convert them
-                # to the platform's path separators before we extract
-                target_dir = os.path.join(dest_folder, *folder.split(path_sep))
-                os.makedirs(target_dir, exist_ok=True)
-                for filename, record in file_records:
-                    data_size = record.raw_data_size()
-                    bsa_file.seek(record.raw_file_data_offset)
-                    if self.bsa_header.embed_filenames(): # use len(filename) ?
-                        filename_len = unpack_byte(bsa_file)
-                        bsa_file.seek(filename_len, 1) # discard filename
-                        data_size -= filename_len + 1
-                    if global_compression ^ record.compression_toggle():
-                        # This is a compressed record, so decompress it
-                        uncompressed_size = unpack_int(bsa_file)
-                        data_size -= 4
-                        try:
-                            raw_data = self._compression_type.decompress_rec(
-                                bsa_file.read(data_size), uncompressed_size,
-                                self.bsa_name)
-                        except BSAError:
-                            # Ignore errors for Fallout - Misc.bsa - Bethesda
-                            # probably used an old buggy zlib version when
-                            # packing it (taken from BSArch sources)
-                            if self.bsa_name == u'Fallout - Misc.bsa':
-                                continue
-                            else:
-                                raise
-                    else:
-                        # This is an uncompressed record, just read it
-                        raw_data = bsa_file.read(data_size)
-                    with open(os.path.join(target_dir, filename), 'wb') as out:
-                        out.write(raw_data)
+            progress.setFull(len(extract_jobs))
+        num_threads = min(max_threads, os.cpu_count() or 1)
+        pending = deque()
+        pending_size = 0
+        with open(self.abs_path, 'rb') as bsa_file:
+            extract_pool = ThreadPoolExecutor(num_threads,
+                                              thread_name_prefix='bsa')
+            try:
+                rec_datas = _read_spans(bsa_file, chain.from_iterable(
+                    j[3] for j in extract_jobs))
+                prev_folder = None
+                for i, (folder, out_path, record, spans) in enumerate(
+                        extract_jobs):
+                    if progress and folder != prev_folder:
+                        progress(i, f"{_('Extracting %(target_bsa)s…')}"
+                                    f"\n{folder}" % {
+                            'target_bsa': self.bsa_name})
+                        prev_folder = folder
+                    datas = [next(rec_datas) for _span in spans]
+                    pending.append((extract_pool.submit(extract_record,
+                        out_path, record, datas), datas_size := sum(
+                        len(d) for d in datas)))
+                    pending_size += datas_size
+                    while pending_size > max_pending:
+                        done_fut, done_size = pending.popleft()
+                        done_fut.result() # propagate errors
+                        pending_size -= done_size
+                for done_fut, _done_size in pending:
+                    done_fut.result()
+            finally:
+                extract_pool.shutdown(wait=True, cancel_futures=True)
 
     def _map_assets_to_folders(self, folder_files_dict):
         folder_to_assets = {}
@@ -612,8 +715,91 @@ def _map_assets_to_folders(self, folder_files_dict):
                 file_records.append((filename, filerecord))
         return folder_to_assets
 
+    @staticmethod
+    def _map_sources_to_folders(asset_sources):
+        """Group the (asset path, source path) items of asset_sources by the
+        folder of the asset path - folders use the BSA path separator."""
+        folder_sources = defaultdict(list)
+        for asset_path, source_path in asset_sources.items():
+            folder, _sep, filename = asset_path.replace(
+                '/', path_sep).rpartition(path_sep)
+            folder_sources[folder].append((filename, source_path))
+        return folder_sources
+
+    def pack_assets(self, asset_sources, compress=True, embed_names=False,
+                    progress=None):
+        """Writes a new archive containing the specified assets to the path
+        of this BSA, replacing it if it exists. The assets are read and
+        compressed on a pool of threads.
+
+        :param asset_sources: A dict mapping the paths of the assets in the
+            archive to the paths of the files to read them from.
+        :param compress: If True, compress the archive. Assets that do not
+            get any smaller are stored uncompressed.
+        :param embed_names: If True, embed the asset paths in the data of
+            the archive. Only supported by BSAs newer than Oblivion's.
+        :param progress: The progress callback to use. None if unwanted."""
+        folder_sources = self._map_sources_to_folders(asset_sources)
+        if progress:
+            progress.setFull(len(asset_sources))
+        with TempFile(base_dir=self.abs_path.shead) as tmp_path:
+            with open(tmp_path, 'wb') as out:
+                self._write_archive(out, folder_sources, compress,
+                                    embed_names, progress)
+            self.abs_path.replace_with_temp(tmp_path)
+        # forget what we knew about the previous archive
+        self._assets = None
+        self.bsa_folders.clear()
+        self.do_update()
+
+    def _pack_datas(self, pack_jobs, compress, progress, read_source=None):
+        """Yield the result of read_source - by default a (data,
+        uncompressed size, is compressed) tuple, see _read_source - for each
+        (folder, asset path, source path) tuple in pack_jobs, in order."""
+        read_source = read_source or self._read_source
+        prev_folder = None
+        for i, ((folder, _asset, _source), packed) in enumerate(zip(
+                pack_jobs, _pack_records(pack_jobs, partial(
+                    read_source, compress)))):
+            if progress and folder != prev_folder:
+                progress(i, f"{_('Packing %(target_bsa)s…')}\n{folder}" % {
+                    'target_bsa': self.bsa_name})
+                prev_folder = folder
+            yield packed
+
+    def _read_source(self, compress, pack_job):
+        """Read the source file of pack_job and compress its data if
+        compress is True and that makes it smaller. Runs in a worker
+        thread."""
+        _folder, asset_path, source_path = pack_job
+        with open(source_path, 'rb') as ins:
+            raw_data = ins.read()
+        return self._compress_data(compress, asset_path, raw_data)
+
+    def _compress_data(self, compress, asset_path, raw_data):
+        """Compress raw_data if compress is True, asset_path is not a
+        sound file and that makes it smaller. Returns a (data, uncompressed
+        size, is compressed) tuple."""
+        if compress and os.path.splitext(asset_path)[1].lower() not in \
+                self._stored_extensions:
+            packed_data = self._compression_type.compress_rec(raw_data,
+                                                              self.bsa_name)
+            if len(packed_data) < len(raw_data):
+                return packed_data, len(raw_data), True
+        return raw_data, len(raw_data), False
+
     # Abstract
-    def _load_bsa(self): raise NotImplementedError
+    def _write_archive(self, out, folder_sources, compress, embed_names,
+                       progress):
+        """Write an archive containing folder_sources (see
+        _map_sources_to_folders) to the out stream."""
+        raise NotImplementedError
+
+    def _load_bsa(self, wanted_folders=None):
+        """Load the file records of this BSA. If wanted_folders is given, a
+        container of lowercase folder paths using the OS path separator, the
+        file records of other folders may be skipped."""
+        raise NotImplementedError
     def _load_bsa_light(self): raise NotImplementedError
 
     # API - delegates to abstract methods above
@@ -651,16 +837,166 @@ class BSA(ABsa):
     are embedded."""
     file_record_type = BSAFileRecord
     folder_record_type = BSAFolderRecord
+    # The version of the BSAs we write
+    _pack_version = 104
+    supports_packing = True
+    # A dictionary mapping file extensions to hash components. Used when
+    # hashing file names for BSAs.
+    _bsa_ext_lookup = defaultdict(int, [('.kf', 0x80),
+        ('.nif', 0x8000), ('.dds', 0x8080), ('.wav', 0x80000000)])
+    # Maps the top level folders of assets to the file_flags of the header
+    _content_flags = {'meshes': 0x1, 'textures': 0x2, 'menus': 0x4,
+                      'sound': 0x8, 'shaders': 0x20, 'trees': 0x40,
+                      'fonts': 0x80}
+
+    @staticmethod
+    def calculate_hash(filename, is_folder=False):
+        """Calculates the hash used by BSAs for the provided file name - or
+        folder path, if is_folder is True.
+        Based on Timeslips code with cleanup and pythonization.
+
+        See here for more information:
+        https://en.uesp.net/wiki/Tes4Mod:Hash_Calculation"""
+        #--NOTE: fileName is NOT a Path object!
+        if is_folder: # folder names may contain dots
+            root, ext = filename.lower(), ''
+        else:
+            root, ext = os.path.splitext(filename.lower())
+        chars = [ord(x) for x in root]
+        hash_part_1 = chars[-1] | ((len(chars) > 2 and chars[-2]) or 0) << 8 \
+                      | len(chars) << 16 | chars[0] << 24
+        hash_part_1 |= BSA._bsa_ext_lookup[ext]
+        uint_mask, hash_part_2, hash_part_3 = 0xFFFFFFFF, 0, 0
+        for char in chars[1:-2]:
+            hash_part_2 = ((hash_part_2 * 0x1003F) + char) & uint_mask
+        for char in (ord(x) for x in ext):
+            hash_part_3 = ((hash_part_3 * 0x1003F) + char) & uint_mask
+        hash_part_2 = (hash_part_2 + hash_part_3) & uint_mask
+        return (hash_part_2 << 32) + hash_part_1
 
-    def _load_bsa(self):
+    @staticmethod
+    def _dump_folder_record(folder_hash, files_count, file_records_offset,
+                            _pack=structs_cache['=QII'].pack):
+        return _pack(folder_hash, files_count, file_records_offset)
+
+    def _write_archive(self, out, folder_sources, compress, embed_names,
+                       progress):
+        bsa_name = self.bsa_name
+        calc_hash = self.calculate_hash
+        embed_names = embed_names and self._pack_version > 103
+        # The game looks up folders and files by hash, so sort them by it
+        bsa_folders = []
+        for folder, sources in folder_sources.items():
+            if not folder:
+                raise BSAError(bsa_name, 'Cannot pack assets that are not in '
+                                         'a folder')
+            bsa_folders.append((calc_hash(folder, is_folder=True), folder,
+                sorted(((calc_hash(fname), fname, src) for fname, src in
+                        sources), key=itemgetter(0))))
+        bsa_folders.sort(key=itemgetter(0))
+        folder_names = [_encode_path(f, bsa_name) for _h, f, _s in bsa_folders]
+        file_names = [_encode_path(fname, bsa_name) for *_f, files in
+                      bsa_folders for _h, fname, _s in files]
+        if any(len(n) > 254 for n in chain(folder_names, file_names)):
+            raise BSAError(bsa_name, 'Asset paths must not be longer than 254 '
+                                     'characters')
+        total_file_name_length = sum(len(n) + 1 for n in file_names)
+        file_rec_struct = structs_cache['=QII']
+        # The folder records point to the file records of their folder - for
+        # some reason their offset includes the length of the file names
+        records_start = BsaHeader.header_size + len(
+            self._dump_folder_record(0, 0, 0)) * len(bsa_folders)
+        records_offset = records_start
+        folder_records = []
+        for (folder_hash, _f, files), folder_name in zip(bsa_folders,
+                                                        folder_names):
+            folder_records.append(self._dump_folder_record(folder_hash,
+                len(files), records_offset + total_file_name_length))
+            records_offset += len(folder_name) + 2 + file_rec_struct.size * \
+                              len(files)
+        archive_flags = BsaHeader._archive_flags()
+        archive_flags.include_directory_names = True
+        archive_flags.include_file_names = True
+        archive_flags.compressed_archive = compress
+        archive_flags.embed_file_names = embed_names
+        file_flags = 0
+        for folder in folder_sources:
+            folder = folder.lower()
+            if folder.startswith(f'sound{path_sep}voice'):
+                file_flags |= 0x10
+            else:
+                file_flags |= self._content_flags.get(
+                    folder.split(path_sep, 1)[0], 0x100)
+        out.write(structs_cache['=4s8I'].pack(BsaHeader.bsa_magic,
+            self._pack_version, BsaHeader.header_size, archive_flags,
+            len(bsa_folders), len(file_names),
+            sum(len(n) + 1 for n in folder_names), total_file_name_length,
+            file_flags))
+        out.writelines(folder_records)
+        # Reserve the space of the file records, we fill them in once we know
+        # the sizes and offsets of the data
+        out.write(b'\x00' * (records_offset - records_start))
+        out.writelines(n + b'\x00' for n in file_names)
+        pack_jobs = [(folder, f'{folder}{path_sep}{fname}', src)
+                     for _h, folder, files in bsa_folders
+                     for _fh, fname, src in files]
+        data_offset = out.tell()
+        file_records = []
+        uint_pack = structs_cache['I'].pack
+        for (_folder, asset_path, _src), (rec_data, raw_size,
+                is_compressed) in zip(pack_jobs, self._pack_datas(
+                pack_jobs, compress, progress)):
+            rec_size = len(rec_data)
+            if embed_names:
+                embedded_name = _encode_path(asset_path, bsa_name)
+                out.write(bytes((len(embedded_name),)))
+                out.write(embedded_name)
+                rec_size += len(embedded_name) + 1
+            if is_compressed:
+                out.write(uint_pack(raw_size))
+                rec_size += 4
+            out.write(rec_data)
+            if rec_size >= 0x40000000 or data_offset > 0xFFFFFFFF:
+                raise BSAError(bsa_name, f'{asset_path} is too large to be '
+                                         f'packed')
+            # The toggle bit flips the compression of the archive
+            if is_compressed != compress:
+                rec_size |= 0x40000000
+            file_records.append((rec_size, data_offset))
+            data_offset += rec_size & ~0x40000000
+        out.seek(records_start)
+        rec_dex = 0
+        for (_h, _f, files), folder_name in zip(bsa_folders, folder_names):
+            out.write(bytes((len(folder_name) + 1,)))
+            out.write(folder_name + b'\x00')
+            for file_hash, _fname, _src in files:
+                out.write(file_rec_struct.pack(file_hash,
+                                               *file_records[rec_dex]))
+                rec_dex += 1
+
+    def _load_bsa(self, wanted_folders=None):
         folder_records = [] # we need those to parse the folder names
         self.bsa_folders.clear()
         file_records = []
-        read_file_record = partial(self._read_file_records, file_records,
-                                   folders=self.bsa_folders)
-        file_names = self._read_bsa_file(folder_records, read_file_record)
-        names_record_index = file_records_index = 0
-        for folder_path, bsa_folder in self.bsa_folders.items():
+        # the folders we loaded and the index of their first file name
+        folders_names_index = []
+        names_count = 0
+        rs = self.file_record_type.total_record_size()
+        def _read_wanted_file_records(bsa_file, folder_path, folder_record):
+            nonlocal names_count
+            if wanted_folders is None or folder_path.lower().replace(
+                    path_sep, os.sep) in wanted_folders:
+                self._read_file_records(file_records, bsa_file, folder_path,
+                                        folder_record, folders=self.bsa_folders)
+                folders_names_index.append(
+                    (self.bsa_folders[folder_path], names_count))
+            else: # skip the file records of this folder
+                bsa_file.seek(rs * folder_record.files_count, 1)
+            names_count += folder_record.files_count
+        file_names = self._read_bsa_file(folder_records,
+                                         _read_wanted_file_records)
+        file_records_index = 0
+        for bsa_folder, names_record_index in folders_names_index:
             for __ in range(bsa_folder.folder_record.files_count):
                 rec = file_records[file_records_index]
                 file_records_index += 1
@@ -747,85 +1083,170 @@ class BA2(ABsa):
     bsa_header: Ba2Header
     _folder_type = Ba2Folder
     bsa_folders: defaultdict[str, _folder_type] # we need to repeat this
+    supports_packing = True
 
     def extract_assets(self, asset_paths, dest_folder, progress=None):
         # map files to folders
         folder_files_dict = self._map_files_to_folders(asset_paths)
         del asset_paths # forget about this
-        # load the bsa - this should be reworked to load only needed records
-        self._load_bsa()
-        my_header = self.bsa_header
-        is_dx10 = my_header.ba2_files_type == b'DX10'
+        self._load_bsa(wanted_folders=folder_files_dict)
+        is_dx10 = self.bsa_header.ba2_files_type == b'DX10'
         folder_to_assets = self._map_assets_to_folders(folder_files_dict)
         # unload the bsa
         self.bsa_folders.clear()
-        # get the data from the file
-        if progress:
-            progress.setFull(len(folder_to_assets))
-        with open(self.abs_path, u'rb') as bsa_file:
-            def _read_rec_or_chunk(record):
-                """Helper method, handles reading both compressed and
-                uncompressed records (or texture chunks)."""
-                bsa_file.seek(record.offset)
-                if record.packed_size:
-                    # This is a compressed record, so decompress it
-                    return self._compression_type.decompress_rec(
-                        bsa_file.read(record.packed_size),
-                        record.unpacked_size, self.bsa_name)
-                else:
-                    # This is an uncompressed record, just read it
-                    return bsa_file.read(record.unpacked_size)
-            def _build_dds_header(dds_file, record):
-                """Helper method, sets up a functional DDS header for the
-                specified DDS file based on the specified record."""
-                dds_file.dds_header.dw_height = record.height
-                dds_file.dds_header.dw_width = record.width
-                dds_file.dds_header.dw_mip_map_count = record.num_mips
-                dds_file.dds_header.dw_depth = 1
-                # 3 == DDS_DIMENSION_TEXTURE2D - PY3: enum!
-                dds_file.dds_dxt10.resource_dimension = 3
-                dds_file.dds_dxt10.array_size = 1
-                if record.cube_maps == 2049:
-                    dds_file.dds_header.dw_caps.DDSCAPS_COMPLEX = True
-                    # All but DDSCAPS2_VOLUME or'd together
-                    # Archive.exe sticks these into dwCaps, which is 100%
-                    # wrong, but that's DDS for you...
-                    dds_file.dds_header.dw_caps2 = 0xFE00
-                    # 0x4 == DDS_RESOURCE_MISC_TEXTURECUBE
-                    dds_file.dds_dxt10.misc_flag = 0x4
-                # This needs to be last, it uses the header's width and height
-                record.dxgi_format.setup_file(
-                    dds_file, use_legacy_formats=True)
-            for i, (folder, file_records) in enumerate(
-                    folder_to_assets.items()):
-                if progress:
-                    progress(i, f"{_('Extracting %(target_bsa)s…')}"
-                                f"\n{folder}" % {'target_bsa': self.bsa_name})
-                # BSA paths always have backslashes, so we need to convert them
-                # to the platform's path separators before we extract
-                target_dir = os.path.join(dest_folder, *folder.split(path_sep))
-                os.makedirs(target_dir, exist_ok=True)
-                for filename, f_record in file_records:
-                    if is_dx10:
-                        # We're dealing with a DX10 BA2, need to combine all
-                        # the texture chunks in the record first
-                        dds_data = b''
-                        for tex_chunk in f_record.tex_chunks:
-                            dds_data += _read_rec_or_chunk(tex_chunk)
-                        # Add a DDS header based on the data in the record,
-                        # then dump the resulting DDS file - cf. BSArch
-                        new_dds_file = DDSFile('')
-                        _build_dds_header(new_dds_file, f_record)
-                        new_dds_file.dds_contents = dds_data
-                        raw_data = new_dds_file.dump_file()
-                    else:
-                        # Otherwise, we're dealing with a GNRL BA2, just
-                        # read/decompress/write the record directly
-                        raw_data = _read_rec_or_chunk(f_record)
-                    with open(os.path.join(target_dir, filename), 'wb') as out:
-                        out.write(raw_data)
-
-    def _load_bsa(self):
+        def _rec_span(record):
+            return record.offset, record.packed_size or record.unpacked_size
+        if is_dx10:
+            # DX10 records consist of texture chunks, read all of them
+            def _record_spans(record):
+                return [*map(_rec_span, record.tex_chunks)]
+        else:
+            def _record_spans(record):
+                return [_rec_span(record)]
+        self._extract_records(self._extract_jobs(folder_to_assets,
+            dest_folder, _record_spans), partial(self._extract_ba2_record,
+            is_dx10), progress)
+
+    def _decompress_rec_or_chunk(self, record, rec_data):
+        """Helper method, handles both compressed and uncompressed records
+        (or texture chunks)."""
+        if record.packed_size:
+            # This is a compressed record, so decompress it
+            return self._compression_type.decompress_rec(rec_data,
+                record.unpacked_size, self.bsa_name)
+        # This is an uncompressed record, use it as is
+        return rec_data
+
+    def _extract_ba2_record(self, is_dx10, out_path, f_record, rec_datas):
+        """Decompress and write out the data of a file record. Runs in a
+        worker thread."""
+        if is_dx10:
+            # We're dealing with a DX10 BA2, need to combine all the texture
+            # chunks in the record first
+            dds_data = b''.join(map(self._decompress_rec_or_chunk,
+                                    f_record.tex_chunks, rec_datas))
+            # Add a DDS header based on the data in the record, then dump the
+            # resulting DDS file - cf. BSArch
+            new_dds_file = DDSFile('')
+            self._build_dds_header(new_dds_file, f_record)
+            new_dds_file.dds_contents = dds_data
+            raw_data = new_dds_file.dump_file()
+        else:
+            # Otherwise, we're dealing with a GNRL BA2, just
+            # decompress/write the record directly
+            raw_data = self._decompress_rec_or_chunk(f_record, rec_datas[0])
+        with open(out_path, 'wb') as out:
+            out.write(raw_data)
+
+    @staticmethod
+    def _build_dds_header(dds_file, record):
+        """Helper method, sets up a functional DDS header for the specified
+        DDS file based on the specified record."""
+        dds_file.dds_header.dw_height = record.height
+        dds_file.dds_header.dw_width = record.width
+        dds_file.dds_header.dw_mip_map_count = record.num_mips
+        dds_file.dds_header.dw_depth = 1
+        # 3 == DDS_DIMENSION_TEXTURE2D - PY3: enum!
+        dds_file.dds_dxt10.resource_dimension = 3
+        dds_file.dds_dxt10.array_size = 1
+        if record.cube_maps == 2049:
+            dds_file.dds_header.dw_caps.DDSCAPS_COMPLEX = True
+            # All but DDSCAPS2_VOLUME or'd together
+            # Archive.exe sticks these into dwCaps, which is 100% wrong, but
+            # that's DDS for you...
+            dds_file.dds_header.dw_caps2 = 0xFE00
+            # 0x4 == DDS_RESOURCE_MISC_TEXTURECUBE
+            dds_file.dds_dxt10.misc_flag = 0x4
+        # This needs to be last, it uses the header's width and height
+        record.dxgi_format.setup_file(dds_file, use_legacy_formats=True)
+
+    def _read_texture(self, compress, pack_job):
+        """Read the DDS file that is the source of pack_job, returning what
+        _read_source would for its pixel data - i.e. without the DDS headers,
+        which DX10 BA2s do not store - followed by a (height, width, number of
+        mipmaps, DXGI format index, cube maps) tuple for its file record.
+        Runs in a worker thread."""
+        _folder, asset_path, source_path = pack_job
+        dds_file = DDSFile(source_path)
+        try:
+            dds_file.load_file()
+            # Legacy DDS files are mapped to the equivalent DXGI format
+            dxgi_format = dds_file.dxgi_format
+        except (DDSError, struct_error) as e:
+            raise BSAError(self.bsa_name, f'{asset_path} is not a valid DDS '
+                                          f'file: {e}') from e
+        dds_header = dds_file.dds_header
+        if dds_header.dw_height > 0xFFFF or dds_header.dw_width > 0xFFFF:
+            raise BSAError(self.bsa_name, f'{asset_path} is too large to be '
+                                          f'packed')
+        is_cube_map = dds_header.dw_caps2.DDSCAPS2_CUBEMAP or (
+            dds_header.ddspf.needs_dxt10 and dds_file.dds_dxt10.misc_flag & 0x4)
+        return *self._compress_data(compress, asset_path,
+                                    dds_file.dds_contents), (
+            dds_header.dw_height, dds_header.dw_width,
+            max(dds_header.dw_mip_map_count, 1), dxgi_format.fmt_index,
+            2049 if is_cube_map else 2048)
+
+    def _write_archive(self, out, folder_sources, compress, embed_names,
+                       progress):
+        bsa_name = self.bsa_name
+        pack_jobs = sorted((folder, f'{folder}{path_sep}{fname}' if folder
+                            else fname, src)
+                           for folder, sources in folder_sources.items()
+                           for fname, src in sources)
+        # Archives of textures only get DX10 file records, which is what the
+        # game expects for its texture archives. Everything else goes into a
+        # general BA2
+        is_dx10 = bool(pack_jobs) and all(
+            asset_path[-4:].lower() == '.dds' for _f, asset_path, _s in
+            pack_jobs)
+        header_struct = structs_cache['=4sI4sIQ']
+        if is_dx10:
+            rec_struct = structs_cache['=I4sIBBHHHBBH']
+            # We write a single chunk holding all mipmaps for each texture
+            chunk_struct = structs_cache['=QIIHHI']
+            rec_size = rec_struct.size + chunk_struct.size
+            packed_datas = self._pack_datas(pack_jobs, compress, progress,
+                                            read_source=self._read_texture)
+        else:
+            rec_struct = structs_cache['=I4sIIQIII']
+            rec_size = rec_struct.size
+            packed_datas = self._pack_datas(pack_jobs, compress, progress)
+        data_offset = header_struct.size + rec_size * len(pack_jobs)
+        # Reserve the space of the header and the file records, we fill them
+        # in once we know the sizes and offsets of the data
+        out.write(b'\x00' * data_offset)
+        file_records = []
+        for (folder, asset_path, _src), (rec_data, raw_size, is_compressed,
+                *tex_info) in zip(pack_jobs, packed_datas):
+            out.write(rec_data)
+            file_stem, file_ext = os.path.splitext(
+                asset_path[len(folder) + 1 if folder else 0:])
+            rec_hashes = (_hash_ba2_string(file_stem),
+                          _encode_path(file_ext[1:], bsa_name),
+                          _hash_ba2_string(folder))
+            packed_size = len(rec_data) if is_compressed else 0
+            if is_dx10:
+                height, width, num_mips, dxgi_index, cube_maps = tex_info[0]
+                file_records.append(rec_struct.pack(*rec_hashes, 0, 1, 24,
+                    height, width, num_mips, dxgi_index, cube_maps))
+                file_records.append(chunk_struct.pack(data_offset,
+                    packed_size, raw_size, 0, num_mips - 1, 0xBAADF00D))
+            else:
+                file_records.append(rec_struct.pack(*rec_hashes, 0x00100100,
+                    data_offset, packed_size, raw_size, 0xBAADF00D))
+            data_offset += len(rec_data)
+        short_pack = structs_cache['H'].pack
+        for _folder, asset_path, _src in pack_jobs:
+            asset_name = _encode_path(asset_path, bsa_name)
+            out.write(short_pack(len(asset_name)))
+            out.write(asset_name)
+        out.seek(0)
+        out.write(header_struct.pack(Ba2Header.bsa_magic, 1,
+            b'DX10' if is_dx10 else b'GNRL', len(pack_jobs), data_offset))
+        out.writelines(file_records)
+
+    def _load_bsa(self, wanted_folders=None):
         with open(self.abs_path, u'rb') as bsa_file:
             # load the header from input stream
             my_header = self.bsa_header
@@ -850,6 +1271,9 @@ def _load_bsa(self):
             file_names_block = file_names_block[name_size + 2:]
             folder_dex = filename.rfind(path_sep)
             folder_name = '' if folder_dex == -1 else filename[:folder_dex]
+            if wanted_folders is not None and folder_name.lower().replace(
+                    path_sep, os.sep) not in wanted_folders:
+                continue
             self.bsa_folders[folder_name].folder_assets[
                 filename[folder_dex + 1:]] = file_records[index]
 
@@ -879,6 +1303,7 @@ def ba2_hash(self):
 
 class StarfieldBA2(BA2):
     bsa_header: StarfieldBa2Header
+    supports_packing = False
 
     @property
     def _compression_type(self):
@@ -891,6 +1316,12 @@ def _compression_type(self):
                    self.bsa_header.ba2_compression_type == 3 else
                 _Bsa_zlib)
 
+    def _write_archive(self, out, folder_sources, compress, embed_names,
+                       progress):
+        raise BSAError(self.bsa_name, 'Writing Starfield BA2s is not '
+            'supported - the meaning of some of their header fields is not '
+            'known yet')
+
 class MorrowindBsa(ABsa):
     bsa_header: MorrowindBsaHeader
 
@@ -964,33 +1395,7 @@ class OblivionBsa(BSA):
     file_record_type = BSAOblivionFileRecord
     _folder_type = BSAOblivionFolder
     bsa_folders: defaultdict[str, _folder_type] # for proper typing
-    # A dictionary mapping file extensions to hash components. Used by Oblivion
-    # when hashing file names for its BSAs.
-    _bsa_ext_lookup = defaultdict(int, [('.kf', 0x80),
-        ('.nif', 0x8000), ('.dds', 0x8080), ('.wav', 0x80000000)])
-
-    @staticmethod
-    def calculate_hash(filename):
-        """Calculates the hash used by Oblivion BSAs for the provided file
-        name.
-        Based on Timeslips code with cleanup and pythonization.
-
-        See here for more information:
-        https://en.uesp.net/wiki/Tes4Mod:Hash_Calculation"""
-        #--NOTE: fileName is NOT a Path object!
-        root, ext = os.path.splitext(filename.lower())
-        chars = [ord(x) for x in root]
-        hash_part_1 = chars[-1] | ((len(chars) > 2 and chars[-2]) or 0) << 8 \
-                      | len(chars) << 16 | chars[0] << 24
-        hash_part_1 |= OblivionBsa._bsa_ext_lookup[ext]
-        uint_mask, hash_part_2, hash_part_3 = 0xFFFFFFFF, 0, 0
-        for char in chars[1:-2]:
-            hash_part_2 = ((hash_part_2 * 0x1003F) + char) & uint_mask
-        for char in (ord(x) for x in ext):
-            hash_part_3 = ((hash_part_3 * 0x1003F) + char) & uint_mask
-        hash_part_2 = (hash_part_2 + hash_part_3) & uint_mask
-        return (hash_part_2 << 32) + hash_part_1
-
+    _pack_version = 103
     def undo_alterations(self, progress=Progress()):
         """Undoes any alterations that previously applied BSA Alteration may
         have done to this BSA by recalculating all mismatched hashes.
@@ -1014,7 +1419,7 @@ def undo_alterations(self, progress=Progress()):
                     if file_info.record_hash != rebuilt_hash:
                         bsa_file.seek(file_info.file_pos)
                         bsa_file.write(
-                            structs_cache[_HashedRecord.formats[0][0]].pack(
+                            structs_cache[file_info.hash_format[0]].pack(
                                 rebuilt_hash))
                         reset_count += 1
                 progress(progress.state + 1, f"{_('Rebuilding Hashes…')}"
@@ -1024,6 +1429,12 @@ def undo_alterations(self, progress=Progress()):
 class SkyrimSeBsa(BSA):
     folder_record_type = BSASkyrimSEFolderRecord
     _compression_type = _Bsa_lz4_frame
+    _pack_version = 105
+
+    @staticmethod
+    def _dump_folder_record(folder_hash, files_count, file_records_offset,
+                            _pack=structs_cache['=QIIQ'].pack):
+        return _pack(folder_hash, files_count, 0, file_records_offset)
 
 # Factory
 def get_bsa_type(game_fsName) -> type[ABsa]:
@@ -1034,14 +1445,9 @@ def get_bsa_type(game_fsName) -> type[ABsa]:
         case ('Enderal Special Edition' | 'Skyrim Special Edition' |
               'Skyrim VR'):
             return SkyrimSeBsa
-        ##: The _HashedRecord hackery here should go
         case 'Fallout4' | 'Fallout4VR':
-            # Hashes are I not Q in BA2s!
-            _HashedRecord.formats = [('I', struct_calcsize('I'))]
             return BA2
         case 'Starfield':
-            # Hashes are I not Q in BA2s!
-            _HashedRecord.formats = [('I', struct_calcsize('I'))]
             return StarfieldBA2
         case 'Morrowind':
             return MorrowindBsa
@@ -64,6 +64,8 @@
 _MAGIC_GRGB = b'GRGB'
 _MAGIC_YUY2 = b'YUY2'
 _MAGIC_BC6H = b'BC6H'
+_MAGIC_ATI1 = b'ATI1'
+_MAGIC_ATI2 = b'ATI2'
 
 class _CAPS_FLAGS(Flags):
     DDSCAPS_COMPLEX: bool = flag(3)    # 0x8
@@ -99,6 +101,7 @@ class _PF_FLAGS(Flags):
 
 # PY3: These are redundant, see above - IntFlag would help
 _DDPF_ALPHAPIXELS = _PF_FLAGS(0x1)
+_DDPF_ALPHA = _PF_FLAGS(0x2)
 _DDPF_FOURCC = _PF_FLAGS(0x4)
 _DDPF_RGB = _PF_FLAGS(0x40)
 _DDPF_LUMINANCE = _PF_FLAGS(0x20000)
@@ -276,8 +279,6 @@ def __repr__(self):
 # cf. https://docs.microsoft.com/en-us/windows/win32/api/dxgiformat/ne-dxgiformat-dxgi_format
 # and https://github.com/microsoft/DirectXTex/blob/master/DirectXTex/DirectXTexDDS.cpp
 # and https://github.com/microsoft/DirectXTex/blob/master/DirectXTex/DirectXTexUtil.cpp
-##: Mirror the bi-map set up in the link above, i.e. support converting from
-# legacy to DXGI format as well
 _DXGIFormat(u'DXGI_FORMAT_UNKNOWN')
 _DXGIFormat(u'DXGI_FORMAT_R32G32B32A32_TYPELESS', fmt_bpp=128)
 _DXGIFormat(u'DXGI_FORMAT_R32G32B32A32_FLOAT', fmt_bpp=128)
@@ -402,6 +403,28 @@ def __repr__(self):
 _DXGIFormat(u'DXGI_FORMAT_A8P8', fmt_bpp=16)
 _DXGIFormat(u'DXGI_FORMAT_B4G4R4A4_UNORM', _DDSPF_A4R4G4B4, fmt_bpp=16)
 _DXGIFormat._curr_index = 130 # The enum counter skips here
+
+# Maps the pixel formats of legacy (non-DXT10) DDS files to the equivalent
+# DXGI formats - the reverse of the mapping set up above
+def _legacy_pf_key(pixel_format: _DDSPixelFormat):
+    """Returns a key identifying the specified pixel format, ignoring any
+    flags that do not affect the layout of the pixels."""
+    if pixel_format.pf_flags.DDPF_FOURCC:
+        return pixel_format.pf_four_cc
+    layout_flags = int(pixel_format.pf_flags) & int(
+        _DDPF_RGB | _DDPF_LUMINANCE | _DDPF_ALPHA | _DDPF_ALPHAPIXELS)
+    return (layout_flags, pixel_format.pf_rgb_bit_count,
+            pixel_format.pf_r_bit_mask, pixel_format.pf_g_bit_mask,
+            pixel_format.pf_b_bit_mask, pixel_format.pf_a_bit_mask)
+
+_legacy_to_dxgi = {_legacy_pf_key(f._fmt_ddspf): f
+                   for f in _DXGIFormat.index_to_fmt.values() if f._fmt_ddspf}
+# Premultiplied alpha and the ATI FourCCs have no DXGI formats of their own
+for _alias_magic, _fmt_magic in ((_MAGIC_DXT2, _MAGIC_DXT3),
+        (_MAGIC_DXT4, _MAGIC_DXT5), (_MAGIC_ATI1, _MAGIC_BC4_UNORM),
+        (_MAGIC_ATI2, _MAGIC_BC5_UNORM)):
+    _legacy_to_dxgi[_alias_magic] = _legacy_to_dxgi[_fmt_magic]
+del _alias_magic, _fmt_magic
 _DXGIFormat(u'DXGI_FORMAT_P208', fmt_bpp=16)
 _DXGIFormat(u'DXGI_FORMAT_V208', fmt_bpp=16)
 _DXGIFormat(u'DXGI_FORMAT_V408', fmt_bpp=24)
@@ -615,6 +638,22 @@ def load_from_stream(self, ins):
         # Read and store the rest of the stream
         self.dds_contents = ins.read()
 
+    @property
+    def dxgi_format(self) -> _DXGIFormat:
+        """The DXGI format of this DDS file. For legacy DDS files without a
+        DXT10 header, this is the DXGI format equivalent to their pixel
+        format."""
+        dds_pf = self.dds_header.ddspf
+        if dds_pf.needs_dxt10:
+            return self.dds_dxt10.dxgi_format
+        try:
+            return _legacy_to_dxgi[_legacy_pf_key(dds_pf)]
+        except KeyError:
+            raise DDSError(f'Legacy pixel format with no DXGI equivalent '
+                           f'(flags: {int(dds_pf.pf_flags):#x}, FourCC: '
+                           f'{dds_pf.pf_four_cc!r}, bit count: '
+                           f'{dds_pf.pf_rgb_bit_count})')
+
     def dump_file(self):
         """Dumps this DDS file to a bytestring and returns the result."""
         out_data = self.dds_header.dump_header()
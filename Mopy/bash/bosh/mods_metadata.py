@@ -318,14 +318,8 @@ def checkMods(progress, modInfos, showModList=False, showCRC=False,
         try:
             # Extract data for all plugins (we'll need the context from all of
             # them, even the game master)
-            load_progress = SubProgress(progress, 0, 0.7)
-            load_progress.setFull(len(all_present_minfs))
-            all_extracted_data = {}
-            for i, (k, present_minf) in enumerate(all_present_minfs.items()):
-                mod_progress = SubProgress(load_progress, i, i + 1)
-                ext_data = ModHeaderReader.extract_mod_data(present_minf,
-                                                            mod_progress)
-                all_extracted_data[k] = ext_data
+            all_extracted_data = ModHeaderReader.extract_mods_data(
+                all_present_minfs, SubProgress(progress, 0, 0.7))
             # Run over all plugin data once for efficiency, collecting
             # information such as deleted records and overrides
             scan_progress = SubProgress(progress, 0.7, 0.9)
@@ -37,6 +37,7 @@
 from enum import Enum
 from functools import partial
 from itertools import repeat
+from types import MemberDescriptorType
 
 import lz4.block
 
@@ -239,6 +240,8 @@ class SaveFileHeader(object):
     # Same as _unpackers, but processed immediately after the screenshot is
     # read
     _unpackers_post_ss = {}
+    # The slots holding the (decoded) masters of the save
+    _master_slots = ('masters',)
 
     def __init__(self, save_inf, load_image=False, ins=None):
         self._save_info = save_inf
@@ -260,6 +263,43 @@ def read_save_header(self, load_image=False, ins=None):
             deprint(err_msg, traceback=True)
             raise SaveHeaderError(err_msg) from e
 
+    @classmethod
+    def _cacheable_slots(cls):
+        """All slots of this header type, except for the screenshot, the save
+        info and any slots overridden by properties (e.g. masters)."""
+        try:
+            return cls.__dict__['_cache_slots']
+        except KeyError:
+            cache_slots = {s: None for c in reversed(cls.__mro__) for s in
+                           c.__dict__.get('__slots__', ()) if isinstance(
+                    getattr(cls, s), MemberDescriptorType)}
+            for s in ('_save_info', 'ssData'):
+                del cache_slots[s]
+            cls._cache_slots = tuple(cache_slots)
+            return cls._cache_slots
+
+    def cached_fields(self) -> dict:
+        """Return the values of all fields of this header, except for the
+        screenshot, so that they can be stored by the save info."""
+        header_fields = {a: getattr(self, a) for a in self._cacheable_slots()
+                         if hasattr(self, a)}
+        for a in self._master_slots: # FNames are pickled as Paths
+            header_fields[a] = [*map(str, header_fields[a])]
+        return copy.deepcopy(header_fields)
+
+    @classmethod
+    def from_cached_fields(cls, save_inf, cached_fields: dict):
+        """Create a header for save_inf from the result of cached_fields,
+        without reading the save."""
+        header = cls.__new__(cls)
+        header._save_info = save_inf
+        header.ssData = None
+        for attr, val in copy.deepcopy(cached_fields).items():
+            setattr(header, attr, val)
+        for a in cls._master_slots:
+            setattr(header, a, [*map(FName, cached_fields[a])])
+        return header
+
     def _load_from_unpackers(self, ins, target_unpackers):
         for attr, (__pack, _unpack) in target_unpackers.items():
             setattr(self, attr, _unpack(ins))
@@ -441,6 +481,7 @@ def dump_header(self, out):
 class _AEslSaveHeader(SaveFileHeader):
     """Base class for save headers that may have ESLs."""
     __slots__ = ('masters_regular', 'masters_esl')
+    _master_slots = ('masters_regular', 'masters_esl')
 
     def _esl_block(self) -> bool:
         """Return True if this save file has an ESL block."""
@@ -34,10 +34,10 @@
 from typing import Any, BinaryIO
 
 from .basic_elements import MelBase, MelNull, MelNum, MelObject, \
-    MelSequential, MelStruct, MelGroups
+    MelSequential, MelStruct, MelGroups, _attr_assigner
 from .. import bush
 from ..bolt import attrgetter_cache, deprint, structs_cache, \
-    flatten_multikey_dict
+    flatten_multikey_dict, fast_cached_property
 from ..exception import ArgumentError, ModSizeError
 
 #------------------------------------------------------------------------------
@@ -392,15 +392,19 @@ def load_mel(self, record, ins, sub_type, size_, *debug_strs):
 
     def _load_array(self, record, ins, sub_type, size_, *debug_strs):
         append_entry = getattr(record, self.attr).append
-        entry_slots = self.array_element_attrs
+        entry_type = self._entry_type
         entry_size = self._element_size
         load_entry = self._element.load_mel
         for x in range(size_ // entry_size):
-            arr_entry = MelObject()
+            arr_entry = entry_type()
             append_entry(arr_entry)
-            arr_entry.__slots__ = entry_slots
             load_entry(arr_entry, ins, sub_type, entry_size, *debug_strs)
 
+    @fast_cached_property
+    def _entry_type(self):
+        """The slotted MelObject type we store each array entry in."""
+        return MelObject.with_slots(self._element.getSlotsUsed())
+
     def pack_subrecord_data(self, record):
         """Collects the actual data that will be dumped out."""
         array_val = getattr(record, self.attr)
@@ -483,8 +487,13 @@ def load_mel(self, record, ins, sub_type, size_, *debug_strs):
         unpacked_val = ins.unpack(target_unpacker, size_, *debug_strs)
         unpacked_val = self._pre_process_unpacked(unpacked_val)
         # Set the attributes according to the values we just unpacked
-        for att, val in zip(self.attrs, unpacked_val):
-            setattr(record, att, val)
+        self._assign_processed(record, unpacked_val)
+
+    @fast_cached_property
+    def _assign_processed(self):
+        """Like _assign_unpacked, but for values that have already been run
+        through _pre_process_unpacked."""
+        return _attr_assigner(self.attrs)
 
     def _pre_process_unpacked(self, unpacked_val):
         """You may override this if you need to change the unpacked value in
@@ -32,18 +32,63 @@
     int_unpacker, null1
 from .. import bolt, bush, exception
 from ..bolt import Rounder, attrgetter_cache, decoder, encode, sig_to_str, \
-    struct_calcsize, struct_error, structs_cache
+    struct_calcsize, struct_error, structs_cache, fast_cached_property
 
 #------------------------------------------------------------------------------
 class MelObject(object):
-    """An empty class used by group and structure elements for data storage."""
+    """An empty class used by group and structure elements for data storage.
+    Never instantiated directly - elements use slotted subclasses created via
+    with_slots, so that each of the (many) instances is compact."""
+    __slots__ = ()
+    # Slots that hold internal state and don't take part in comparisons
+    _internal_slots = frozenset()
+    # (base class, slots) -> slotted subclass, see with_slots
+    _slotted_types = {}
+    # class -> the slots compared by __eq__, see _slot_values
+    _compared_slots = {}
+
+    @classmethod
+    def with_slots(cls, obj_slots) -> type[MelObject]:
+        """Return a subclass of this class with the specified __slots__ -
+        elements should create their data storage objects via this."""
+        obj_slots = tuple(dict.fromkeys(obj_slots)) # unique, keep order
+        try:
+            return MelObject._slotted_types[(cls, obj_slots)]
+        except KeyError:
+            slotted_type = MelObject._slotted_types[(cls, obj_slots)] = type(
+                cls.__name__, (cls,), {'__slots__': obj_slots,
+                                       '__module__': cls.__module__})
+            return slotted_type
+
+    def _slot_values(self, *, __unset=object()):
+        """Return a dict mapping our (set) attributes to their values - the
+        slots of our class and all its bases, plus anything in our __dict__
+        if we have one (i.e. a subclass did not define __slots__)."""
+        obj_type = type(self)
+        try:
+            compared_slots = MelObject._compared_slots[obj_type]
+        except KeyError:
+            compared_slots = MelObject._compared_slots[obj_type] = tuple(
+                dict.fromkeys(
+                    s for t in reversed(obj_type.__mro__)
+                    for s in t.__dict__.get('__slots__', ())
+                    if s not in obj_type._internal_slots and
+                    s not in ('__dict__', '__weakref__')))
+        slot_values = {a: v for a in compared_slots if
+                       (v := getattr(self, a, __unset)) is not __unset}
+        if obj_dict := getattr(self, '__dict__', None):
+            slot_values.update(obj_dict)
+        return slot_values
+
     def __eq__(self,other):
         """Operator: =="""
-        return isinstance(other,MelObject) and self.__dict__ == other.__dict__
+        return isinstance(other, MelObject) and (
+            self._slot_values() == other._slot_values())
 
     def __ne__(self,other):
         """Operator: !="""
-        return not isinstance(other,MelObject) or self.__dict__ != other.__dict__
+        return not isinstance(other, MelObject) or (
+            self._slot_values() != other._slot_values())
 
     def __hash__(self):
         raise TypeError(f'unhashable type: {type(self)}')
@@ -391,10 +436,13 @@ def getSlotsUsed(self):
     def setDefault(self,record):
         setattr(record, self.attr, None)
 
+    @fast_cached_property
+    def _mel_object_type(self):
+        return MelObject.with_slots([s for element in self.elements for s in
+                                     element.getSlotsUsed()])
+
     def getDefault(self):
-        target = MelObject()
-        target.__slots__ = [s for element in self.elements for s in
-                            element.getSlotsUsed()]
+        target = self._mel_object_type()
         for element in self.elements:
             element.setDefault(target)
         return target
@@ -688,9 +736,14 @@ def setDefault(self, record, *, __nones=repeat(None)):
             setattr(record, att, value)
 
     def load_mel(self, record, ins, sub_type, size_, *debug_strs):
-        unpacked = ins.unpack(self._unpacker, size_, *debug_strs)
-        for att, val, action in zip(self.attrs, unpacked, self.actions):
-            setattr(record, att, action(val) if action is not None else val)
+        self._assign_unpacked(record,
+            ins.unpack(self._unpacker, size_, *debug_strs))
+
+    @fast_cached_property
+    def _assign_unpacked(self):
+        """A function assigning a tuple of values we unpacked to our attributes
+        on the specified record, applying our actions."""
+        return _attr_assigner(self.attrs, self.actions)
 
     def pack_subrecord_data(self, record, *, __attrgetters=attrgetter_cache):
         values = [__attrgetters[a](record) for a in self.attrs]
@@ -773,6 +826,22 @@ def _expand_formats(elements, struct_formats):
                               f'match elements ({elements})')
         return expanded_fmts
 
+def _attr_assigner(attrs, actions=()):
+    """Compile a function that assigns a tuple of values to the specified
+    attributes of an object, applying actions to the values that have one.
+    Avoids looping over setattr in hot paths like MelStruct.load_mel."""
+    if not attrs:
+        return lambda obj, vals: None
+    val_names = [f'_v{i}' for i in range(len(attrs))]
+    assigns = [f'obj.{a} = {v}' if i >= len(actions) or actions[i] is None
+               else f'obj.{a} = _acts[{i}]({v})'
+               for i, (a, v) in enumerate(zip(attrs, val_names))]
+    func_src = '\n    '.join(['def _assign(obj, vals, _acts=_acts):',
+                               f'{", ".join(val_names)}, = vals', *assigns])
+    func_ns = {'_acts': tuple(actions)}
+    exec(func_src, func_ns)
+    return func_ns['_assign']
+
 #------------------------------------------------------------------------------
 class MelFixedString(MelStruct):
     """Subrecord that stores a string of a constant length. Just a wrapper
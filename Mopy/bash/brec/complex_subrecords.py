@@ -595,27 +595,35 @@ def mapFids(self, record, function, save_fids=False):
 #------------------------------------------------------------------------------
 # Sits up here because the effects stuff down below needs it
 # Helpers ---------------------------------------------------------------------
+class _MelHackyObject(MelObject):
+    """Forwards efix_param_info to the record owning this object."""
+    __slots__ = ('_parent_record',)
+    _internal_slots = frozenset(__slots__)
+
+    @property
+    def efix_param_info(self):
+        return self._parent_record.efix_param_info
+
+    @efix_param_info.setter
+    def efix_param_info(self, new_efix_info):
+        self._parent_record.efix_param_info = new_efix_info
+
 class _MelObmeScitGroup(MelGroup):
     """Fun HACK for the whole family. We need to carry efix_param_info into
     this group, since '../' syntax is not yet supported (see MelPerkParamsGroups
     for another part of the code that's suffering from this). And we can't
     simply not put this in a group, because a bunch of code relies on a group
     called 'scriptEffect' existing..."""
+    @bolt.fast_cached_property
+    def _mel_object_type(self):
+        return _MelHackyObject.with_slots([s for element in self.elements for
+            s in element.getSlotsUsed() if s != 'efix_param_info'])
+
     def load_mel(self, record, ins, sub_type, size_, *debug_strs):
         target = getattr(record, self.attr)
         if target is None:
-            class _MelHackyObject(MelObject):
-                @property
-                def efix_param_info(self):
-                    return record.efix_param_info
-                @efix_param_info.setter
-                def efix_param_info(self, new_efix_info):
-                    record.efix_param_info = new_efix_info
-            target = _MelHackyObject()
-            for element in self.elements:
-                element.setDefault(target)
-            target.__slots__ = [s for element in self.elements for s in
-                                element.getSlotsUsed()]
+            target = self.getDefault()
+            target._parent_record = record
             setattr(record, self.attr, target)
         self.loaders[sub_type].load_mel(target, ins, sub_type, size_,
             *debug_strs)
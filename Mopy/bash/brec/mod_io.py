@@ -22,6 +22,7 @@
 # =============================================================================
 """Houses very low-level classes for reading and writing bytes in plugin
 files."""
+import mmap
 import os
 from io import BytesIO
 
@@ -249,6 +250,13 @@ def __init__(self, inName, ins, ins_size=None):
         self.strings = {}
         self.hasStrings = False
         self.debug_offset = 0
+        # Decompressed data of compressed records, keyed by the file offset
+        # of their (compressed) data - may be filled in ahead of time by
+        # whoever set up this reader, see ModFile.load_plugin
+        self.decompressed_records: dict[int, bytes] = {}
+        # Set by from_path if we're reading a memory-mapped file
+        self._mapped_ins: mmap.mmap | None = None
+        self._mapped_view: memoryview | None = None
 
     # with statement
     def __enter__(self):
@@ -258,7 +266,7 @@ def __enter__(self):
         return self
     def __exit__(self, exc_type, exc_value, exc_traceback):
         utils_constants.FORM_ID = self.form_id_type
-        self.ins.close()
+        self.close()
 
     def load_tes4(self, do_unpack_tes4=True):
         """Load the plugin file "header" record - generally has 'TES4'
@@ -277,7 +285,27 @@ def load_tes4(self, do_unpack_tes4=True):
     @classmethod
     def from_info(cls, mod_info):
         """Boilerplate for creating a ModReader wrapping a mod_info."""
-        return cls(mod_info.fn_key, mod_info.abs_path.open('rb'))
+        return cls.from_path(mod_info.fn_key, mod_info.abs_path)
+
+    @classmethod
+    def from_path(cls, in_name, in_path):
+        """Create a ModReader reading the file at the specified path. The file
+        is memory-mapped instead of being read through a buffered file object,
+        so the OS page cache serves as our buffer and unpack can work on
+        slices of the mapping directly, without copying them first."""
+        ins = open(in_path, 'rb')
+        try:
+            mapped_ins = mmap.mmap(ins.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # Empty files can't be mapped
+            return cls(in_name, ins)
+        except:
+            ins.close()
+            raise
+        ins.close() # the mapping keeps its own handle to the file
+        mapped_reader = cls(in_name, mapped_ins, len(mapped_ins))
+        mapped_reader._mapped_ins = mapped_ins
+        mapped_reader._mapped_view = memoryview(mapped_ins)
+        return mapped_reader
 
     def setStringTable(self, string_table):
         self.hasStrings = bool(string_table)
@@ -308,6 +336,10 @@ def tell_debug(self):
 
     def close(self):
         """Close file."""
+        if self._mapped_view is not None:
+            # The mapping can't be closed while there are views into it
+            self._mapped_view.release()
+            self._mapped_view = None
         self.ins.close()
 
     def atEnd(self, endPos=-1, *debug_strs):
@@ -330,6 +362,22 @@ def read(self, size, *debug_strs, file_offset=None):
             raise ModSizeError(self.inName, debug_strs, (target_size,), size)
         return self.ins.read(size)
 
+    def read_view(self, size, *debug_strs) -> bytes | memoryview:
+        """Like read, but if we're reading the memory-mapped file, return a
+        memoryview slice of the mapping instead of copying the data out of it.
+        The mapping can't be closed while such a view is alive, so only use
+        this for data that is consumed right away (e.g. decompressed) and
+        don't keep the view around."""
+        ins = self.ins
+        if ins is not self._mapped_ins:
+            return self.read(size, *debug_strs)
+        start_pos = ins.tell()
+        if (end_pos := start_pos + size) > self.size:
+            target_size = size - (end_pos - self.size)
+            raise ModSizeError(self.inName, debug_strs, (target_size,), size)
+        ins.seek(end_pos)
+        return self._mapped_view[start_pos:end_pos]
+
     def readLString(self, size, *debug_strs, __unpacker=int_unpacker):
         """Read translatable string. If the mod has STRINGS files, this is a
         uint32 to lookup the string in the string table. Otherwise, this is a
@@ -362,10 +410,16 @@ def readStrings(self, size, *debug_strs):
     def unpack(self, struct_unpacker, size, *debug_strs):
         """Read size bytes from the file and unpack according to format of
         struct_unpacker."""
-        endPos = self.ins.tell() + size
+        ins = self.ins
+        endPos = ins.tell() + size
         if endPos > self.size:
             raise ModReadError(self.inName, debug_strs, endPos, self.size)
-        return struct_unpacker(self.ins.read(size))
+        # Note that ins may have been swapped for a stream of decompressed
+        # record data (see MreRecord.__init__), so check the identity here
+        if ins is self._mapped_ins:
+            ins.seek(endPos)
+            return struct_unpacker(self._mapped_view[endPos - size:endPos])
+        return struct_unpacker(ins.read(size))
 
     def __repr__(self):
         return f'{type(self).__name__}({self.inName})'
@@ -269,6 +269,8 @@ def __new__(cls, name, bases, classdict):
         classdict['__slots__'] = (*slots, *melSet.getSlotsUsed()) if (
             melSet := classdict.get('melSet', ())) else slots
         new = super(RecordType, cls).__new__(cls, name, bases, classdict)
+        if '_unpacked_type' in classdict:
+            return new # lazy variant of a record type, see lazy_record_type
         if rsig := getattr(new, 'rec_sig', None):
             cls.sig_to_class[rsig] = new
             if new.melSet:
@@ -319,7 +321,8 @@ def __init__(self, header, ins=None, *, do_unpack=True):
             ins_ins, ins_size = ins.ins, ins.size
             ins_debug_offset = ins.debug_offset
             try: # swap the wrapped io stream with our (decompressed) data
-                ins.ins, ins.size = self.getDecompressed()
+                ins.ins, ins.size = self.getDecompressed(
+                    ins.decompressed_records.pop(file_offset, None))
                 ins.debug_offset = ins_debug_offset + file_offset
                 self.loadData(ins, ins.size, file_offset=file_offset)
             finally: # restore the wrapped stream to read next record
@@ -374,13 +377,20 @@ def keep_fids(self, keep_plugins):
         element, items coming from mods not in keep_plugins will be removed
         from the list."""
 
-    def getDecompressed(self, *, __unpacker=int_unpacker):
+    def getDecompressed(self, decompressed=None, *, __unpacker=int_unpacker):
         """Return (decompressed if necessary) record data wrapped in BytesIO.
-        Return also the length of the data."""
+        Return also the length of the data.
+
+        :param decompressed: If not None, our data decompressed ahead of time
+            (see ModReader.decompressed_records)."""
+        if decompressed is not None:
+            return io.BytesIO(decompressed), len(decompressed)
         if not self.flags1.compressed:
             return io.BytesIO(self.data), len(self.data)
         decompressed_size, = __unpacker(self.data[:4])
-        decomp = zlib.decompress(self.data[4:])
+        # Slicing a memoryview instead of the bytes avoids copying the data
+        with memoryview(self.data) as data_view:
+            decomp = zlib.decompress(data_view[4:])
         if len(decomp) != decompressed_size:
             raise exception.ModError(self.inName,
                 f'Mis-sized compressed data. Expected {decompressed_size}, '
@@ -499,6 +509,8 @@ def parse_csv_line(cls, csv_fields, index_dict, reuse=False):
 #------------------------------------------------------------------------------
 class MelRecord(MreRecord):
     """Mod record built from mod record elements."""
+    # Set while the record is loaded lazily, see _LazyRecord
+    __slots__ = ('_load_ctx',)
     #--Subclasses must define as MelSet(*mels)
     melSet: MelSet = None
     rec_sig: bytes = None
@@ -517,6 +529,12 @@ def __init__(self, header, ins=None, *, do_unpack=True):
             element.setDefault(self)
         MreRecord.__init__(self, header, ins, do_unpack=do_unpack)
 
+    def setChanged(self, value=True):
+        """Once we are changed our raw data is stale and getSize will have to
+        regenerate it anyway, so drop it to save memory."""
+        self.changed = value
+        if value: self.data = None
+
     def getTypeCopy(self):
         """Return a copy of self - we must be loaded, data will be discarded"""
         myCopy = copy.deepcopy(self)
@@ -607,3 +625,98 @@ def set_playable(self):
         """Set the _not playable flag_ to _False_ - there."""
         np_flag_attr, np_flag_name = self.not_playable_flag
         setattr(getattr(self, np_flag_attr), np_flag_name, False)
+
+#------------------------------------------------------------------------------
+# Attributes we can set on a lazy record without having to unpack it first
+_lazy_passthrough = {*MreRecord.__slots__, '_load_ctx', '__class__'}
+
+class _LazyRecord:
+    """Mixin for the lazy variants of MelRecord subclasses created by
+    lazy_record_type. A lazy record only reads its raw (possibly compressed)
+    data when loaded - unpacking it into attributes is deferred until one of
+    those is first accessed. At that point the instance turns into an instance
+    of the record type it is the lazy variant of (via __class__ assignment, so
+    both must share the same layout - hence the empty __slots__)."""
+    __slots__ = ()
+    _unpacked_type: type[MelRecord]
+
+    def __init__(self, header, ins=None, *, do_unpack=True):
+        lazy_type = type(self)
+        unpacked_type = self.__class__ = lazy_type._unpacked_type
+        if not ins or not do_unpack: # nothing to defer
+            unpacked_type.__init__(self, header, ins, do_unpack=do_unpack)
+            return
+        if unpacked_type.rec_sig != header.recType:
+            raise ValueError(f'Initialize {unpacked_type} with '
+                             f'header.recType {header.recType}')
+        file_offset = ins.tell()
+        MreRecord.__init__(self, header, ins, do_unpack=False)
+        # Don't hold on to data decompressed ahead of time next to our raw
+        # data - we may never get unpacked, and if we do we can decompress
+        # our raw data then
+        ins.decompressed_records.pop(file_offset, None)
+        # Remember what we need to interpret the raw data later on
+        self._load_ctx = (utils_constants.FORM_ID,
+                          ins.strings if ins.hasStrings else None)
+        self.__class__ = lazy_type
+
+    def _unpack_lazy(self):
+        """Turn into an instance of our unpacked type and load our data."""
+        form_id_type, string_table = self._load_ctx
+        self.__class__ = unpacked_type = self._unpacked_type
+        self._load_ctx = None
+        for element in unpacked_type.melSet.elements:
+            element.setDefault(self)
+        prev_form_id = utils_constants.FORM_ID
+        utils_constants.FORM_ID = form_id_type
+        try:
+            with ModReader(self.inName, *self.getDecompressed()) as reader:
+                reader.setStringTable(string_table)
+                self.loadData(reader, reader.size)
+        finally:
+            utils_constants.FORM_ID = prev_form_id
+
+    def __getattr__(self, attr):
+        # Only called for attributes that have not been set - i.e. the ones
+        # unpacking would set
+        self._unpack_lazy()
+        return getattr(self, attr)
+
+    def __setattr__(self, attr, value):
+        if attr not in _lazy_passthrough:
+            self._unpack_lazy() # or unpacking later would overwrite value
+        object.__setattr__(self, attr, value)
+
+    def __reduce_ex__(self, protocol):
+        self._unpack_lazy()
+        return self.__reduce_ex__(protocol)
+
+    def setChanged(self, value=True):
+        # We can't drop our raw data before we've unpacked it
+        self._unpack_lazy()
+        self.setChanged(value)
+
+    def getSubString(self, mel_sig_):
+        self._unpack_lazy() # __slots__ is empty on the lazy type
+        return self.getSubString(mel_sig_)
+
+_lazy_types: dict[type[MelRecord], type[MelRecord]] = {}
+
+def lazy_record_type(rec_type: type[MreRecord]) -> type[MreRecord]:
+    """Return the lazy variant of the specified record type (see _LazyRecord),
+    creating it if needed. Record types that can't be loaded lazily - complex
+    records and their children, the file header and records with custom
+    initialization - are returned as is."""
+    try:
+        return _lazy_types[rec_type]
+    except KeyError:
+        if (not issubclass(rec_type, MelRecord) or
+                rec_type.rec_sig not in RecordType.simpleTypes or
+                rec_type.__init__ is not MelRecord.__init__):
+            lazy_type = rec_type
+        else:
+            lazy_type = RecordType(f'Lazy{rec_type.__name__}',
+                (_LazyRecord, rec_type),
+                {'__slots__': (), '_unpacked_type': rec_type,
+                 '__module__': rec_type.__module__})
+        return _lazy_types.setdefault(rec_type, lazy_type)
@@ -25,12 +25,12 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from contextlib import suppress
+from contextlib import contextmanager, suppress
 from itertools import chain
 
 from .. import bolt, bush
 from ..bolt import Flags, attrgetter_cache, cstrip, decoder, flag, \
-    structs_cache, FName, fast_cached_property
+    structs_cache, FName
 from ..exception import StateError
 
 # no local imports, imported everywhere in brec
@@ -39,7 +39,19 @@
 class FormId:
     """Immutable class wrapping an (integer) plugin form ID. These must be
     instantiated in a ModReader context which injects the master table to
-    use for the long fid conversions. Base class performs no conversion."""
+    use for the long fid conversions. Base class performs no conversion.
+
+    Millions of these get created when loading plugins, so they are slotted.
+    long_fid is computed the first time it is accessed (see __getattr__).
+    Inside an interning() context it is also interned, so that all FormIds
+    pointing to the same record share it. That saves memory and lets
+    comparisons short-circuit on identity. Subclasses must define an empty
+    __slots__ and override _get_long_fid."""
+    __slots__ = ('short_fid', 'long_fid')
+    # (master, object index) -> the long fid tuple shared by all FormIds
+    # pointing to that record - only set inside an interning() context
+    _interned_long_fids: dict[tuple[FName, int], tuple[FName, int]] | None = \
+        None
 
     def __init__(self, int_val):
         if not isinstance(int_val, int):
@@ -61,8 +73,8 @@ def from_tuple(cls, fid_tuple):
             return cls.__master_formid_type[fid_tuple[0]](fid_tuple[1])
         except KeyError:
             class __FormId(cls):
-                @fast_cached_property
-                def long_fid(self):
+                __slots__ = ()
+                def _get_long_fid(self):
                     return fid_tuple[0], self.short_fid
                 @property
                 def mod_dex(self):
@@ -93,8 +105,34 @@ def from_masters(augmented_masters: tuple[FName, ...],
                 (augmented_masters, in_overlay_plugin)] = _FormID
         return form_id_type
 
-    @fast_cached_property
-    def long_fid(self):
+    @staticmethod
+    @contextmanager
+    def interning():
+        """Intern the long fids computed inside this context, e.g. while
+        building a Bashed Patch. The intern table is dropped when the
+        outermost such context exits, so it can't grow over a session."""
+        if FormId._interned_long_fids is not None: # nested, keep the table
+            yield
+            return
+        FormId._interned_long_fids = {}
+        try:
+            yield
+        finally:
+            FormId._interned_long_fids = None
+
+    def __getattr__(self, attr):
+        # Only called for unset attributes, i.e. long_fid on first access
+        if attr != 'long_fid':
+            raise AttributeError(f'{type(self).__name__!r} object has no '
+                                 f'attribute {attr!r}')
+        long_fid = self._get_long_fid()
+        if type(long_fid) is tuple and (
+                interned := FormId._interned_long_fids) is not None:
+            long_fid = interned.setdefault(long_fid, long_fid)
+        self.long_fid = long_fid
+        return long_fid
+
+    def _get_long_fid(self):
         """Don't map by default."""
         return self.short_fid
 
@@ -127,7 +165,9 @@ def __hash__(self):
 
     def __eq__(self, other):
         with suppress(AttributeError):
-            return self.long_fid == other.long_fid
+            # Interned long fids are usually the very same object
+            return ((long_fid := self.long_fid) is
+                    (other_fid := other.long_fid) or long_fid == other_fid)
         if other is None:
             return False
         elif isinstance(self.long_fid, type(other)):
@@ -136,7 +176,8 @@ def __eq__(self, other):
 
     def __ne__(self, other):
         with suppress(AttributeError):
-            return self.long_fid != other.long_fid
+            return ((long_fid := self.long_fid) is not
+                    (other_fid := other.long_fid) and long_fid != other_fid)
         if other is None:
             return True
         elif isinstance(self.long_fid, type(other)):
@@ -257,10 +298,11 @@ class _Tes4Fid(FormId):
     """The special formid of the plugin header record - aka 0. Also used
     as a MelStruct default and when we set the form id to "zero" in some
     edge cases."""
+    __slots__ = ()
+
     def dump(self): return 0
 
-    @fast_cached_property
-    def long_fid(self):
+    def _get_long_fid(self):
         return bush.game.master_fid(0).long_fid
 
 # cache an instance of Tes4 and export that to the rest of Bash
@@ -283,6 +325,8 @@ def long_fid(self):
 class _DummyFid(_Tes4Fid):
     """Used by setDefault (yak) - will blow on dump, make sure you replace
     it with a proper FormId."""
+    __slots__ = ()
+
     def dump(self):
         raise NotImplementedError('Dumping a dummy fid')
 DUMMY_FID = _DummyFid(0)
@@ -26,6 +26,7 @@
 import os
 import subprocess
 import sys
+import time
 from collections import deque
 from shutil import which
 
@@ -276,8 +277,35 @@ def mark_high_dpi_aware():
 def convert_separators(p):
     return p.replace(u'\\', u'/')
 
-##: A more performant implementation would maybe cache folder contents or
-# something similar, as it stands this is not usable for fixing BAIN on Linux
+# Maps directory paths to their mtime, the names of their entries and a dict
+# mapping the lowercase names of their entries to the real ones
+_ci_dir_index: dict[str, tuple[int, frozenset[str], dict[str, str]]] = {}
+
+def _ci_dir_listing(dir_path: str):
+    """Return the names of the entries of the specified directory and a dict
+    mapping their lowercase versions to them. Cached until the mtime of the
+    directory changes - directories modified in the last two seconds are not
+    cached, since their mtime may not reflect all changes yet (coarse mtime
+    resolution). Raises OSError if dir_path is not a directory."""
+    dir_mtime = os.stat(dir_path).st_mtime_ns
+    try:
+        cached_mtime, *dir_listing = _ci_dir_index[dir_path]
+        if cached_mtime == dir_mtime:
+            return dir_listing
+    except KeyError:
+        pass
+    dir_entries = os.listdir(dir_path)
+    lower_entries = {}
+    for dir_entry in dir_entries:
+        # Like a case-insensitive filesystem, the first match wins
+        lower_entries.setdefault(dir_entry.lower(), dir_entry)
+    entries = frozenset(dir_entries)
+    if dir_mtime < time.time_ns() - 2_000_000_000:
+        _ci_dir_index[dir_path] = (dir_mtime, entries, lower_entries)
+    else:
+        _ci_dir_index.pop(dir_path, None)
+    return entries, lower_entries
+
 def canonize_ci_path(ci_path: os.PathLike | str) -> _Path | None:
     if os.path.exists(ci_path):
         # Fast path, but GPath it as we haven't normpathed it yet
@@ -291,25 +319,20 @@ def canonize_ci_path(ci_path: os.PathLike | str) -> _Path | None:
         ci_remaining_parts.appendleft(ci_rem_part)
     constructed_path = path_prefix
     for ci_part in ci_remaining_parts:
-        new_ci_path = os.path.join(constructed_path, ci_part)
-        if os.path.exists(new_ci_path):
-            # If this part exists with the correct case, keep going
-            constructed_path = new_ci_path
-        else:
-            # Otherwise we have to list the entire folder and
-            # case-insensitively look for a match
-            ci_part_lower = ci_part.lower()
-            for candidate_file in os.listdir(constructed_path):
-                if candidate_file.lower() == ci_part_lower:
-                    # We found a matching file, construct the new path with the
-                    # right case and resume the outer loop
-                    constructed_path = os.path.join(constructed_path,
-                        candidate_file)
-                    break
-            else:
+        try:
+            dir_entries, lower_entries = _ci_dir_listing(constructed_path)
+        except OSError: # not a directory
+            return None
+        # If this part exists with the correct case, keep going. Otherwise
+        # look up its case-insensitive match
+        if ci_part not in dir_entries:
+            try:
+                ci_part = lower_entries[ci_part.lower()]
+            except KeyError:
                 # We can't find this part at all, so the whole path can't be
                 # found -> None
                 return None
+        constructed_path = os.path.join(constructed_path, ci_part)
     return _GPath_no_norm(constructed_path)
 
 def set_file_hidden(file_to_hide: str | os.PathLike, is_hidden=True):
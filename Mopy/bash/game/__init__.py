@@ -221,8 +221,8 @@ def master_fid(cls, object_id):
     def get_fid_class(augmented_masters, in_overlay_plugin):
         from ..brec import FormId
         class _FormID(FormId):
-            @fast_cached_property
-            def long_fid(self, *, __masters=augmented_masters):
+            __slots__ = ()
+            def _get_long_fid(self, *, __masters=augmented_masters):
                 try:
                     return __masters[self.mod_dex], self.short_fid & 0xFFFFFF
                 except IndexError:
@@ -3323,13 +3323,12 @@ def load_mel(self, record, ins, sub_type, size_, *debug_strs):
             # Copied and adjusted from MelArray. Yuck. See comment below
             # docstring for some ideas for getting rid of this
             append_entry = getattr(record, self.attr).append
-            entry_slots = self._element_old.attrs
+            entry_type = MelObject.with_slots(self._element_old.attrs)
             entry_size = struct_calcsize(u'3Bs3Bs3Bs3Bs')
             load_entry = self._element_old.load_mel
             for x in range(size_ // entry_size):
-                arr_entry = MelObject()
+                arr_entry = entry_type()
                 append_entry(arr_entry)
-                arr_entry.__slots__ = entry_slots
                 load_entry(arr_entry, ins, sub_type, entry_size, *debug_strs)
         else:
             _expected_sizes = (self._new_sizes[sub_type],
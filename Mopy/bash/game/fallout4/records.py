@@ -46,7 +46,7 @@
     MelLensShared, MelLighFade, MelLighLensFlare, MelLLChanceNone, \
     MelLLFlags, MelLLGlobal, MelLscrCameraPath, MelLscrNif, MelLscrRotation, \
     MelLString, MelLtexGrasses, MelLtexSnam, MelMatoPropertyData, \
-    MelMattShared, MelNextPerk, MelNodeIndex, MelNull, MelObject, \
+    MelMattShared, MelNextPerk, MelNodeIndex, MelNull, \
     MelObjectTemplate, MelPartialCounter, MelPerkData, AMreGlob, \
     MelPerkParamsGroups, MelRace, MelRandomTeleports, MelReadOnly, MelRecord, \
     MelRelations, MelSeasons, MelSequential, MelSet, MelShortName, MelVoice, \
@@ -1540,14 +1540,13 @@ def __init__(self):
 
     def _load_array(self, record, ins, sub_type, size_, *debug_strs):
         append_entry = getattr(record, self.attr).append
-        entry_slots = self.array_element_attrs
+        entry_type = self._entry_type
         # Form version 125 added the entry types to the end
         entry_size = 24 if record.header.form_version >= 125 else 20
         load_entry = self._real_loader.load_mel
         for x in range(size_ // entry_size):
-            arr_entry = MelObject()
+            arr_entry = entry_type()
             append_entry(arr_entry)
-            arr_entry.__slots__ = entry_slots
             load_entry(arr_entry, ins, sub_type, entry_size, *debug_strs)
 
 class MreFurn(AMreWithItems, AMreWithKeywords, _AMreWithProperties):
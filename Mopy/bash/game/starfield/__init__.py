@@ -27,7 +27,7 @@
 from ..store_mixins import SteamMixin, WindowsStoreMixin
 from ... import bolt
 from ..._games_lo import AsteriskGame
-from ...bolt import FName, fast_cached_property
+from ...bolt import FName
 
 class _AStarfieldGameInfo(PatchGame):
     """GameInfo override for Starfield."""
@@ -68,8 +68,8 @@ def get_fid_class(augmented_masters, in_overlay_plugin):
         overlay_threshold = len(augmented_masters) - 1
         from ...brec import FormId
         class _FormID(FormId):
-            @fast_cached_property
-            def long_fid(self, *, __masters=augmented_masters):
+            __slots__ = ()
+            def _get_long_fid(self, *, __masters=augmented_masters):
                 try:
                     if self.mod_dex >= overlay_threshold:
                         # Overlay plugins can't have new records (or
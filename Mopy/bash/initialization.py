@@ -272,7 +272,8 @@ def init_dirs(personal, localAppData, game_info):
     loot_user_path = loot_path.join('userlist.yaml')
     loot_tag_path = dirs['taglists'].join('taglist.yaml')
     global lootDb
-    lootDb = LOOTParser(loot_master_path, loot_user_path, loot_tag_path)
+    lootDb = LOOTParser(loot_master_path, loot_user_path, loot_tag_path,
+                        dirs['modsBash'].join('Masterlist.dat'))
     global bash_dirs_initialized
     bash_dirs_initialized = True
     return game_ini_path, init_warnings
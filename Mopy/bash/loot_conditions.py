@@ -26,6 +26,8 @@
 Recommended reading before working on this file:
 https://loot-api.readthedocs.io/en/latest/metadata/conditions.html."""
 
+from __future__ import annotations
+
 __author__ = 'Infernio'
 
 import operator
@@ -40,6 +42,18 @@
 # parameters along with modInfos currently imported locally
 from .load_order import cached_active_tuple, cached_is_active
 
+# Evaluation context - the results of the conditions evaluated so far and the
+# listings of the directories they looked at. See reset_eval_context
+_cond_results: dict[_ACondition | str, bool] = {}
+_dir_listings: dict[Path, list[str]] = {}
+
+def reset_eval_context():
+    """Forgets the results of all conditions evaluated so far and the
+    directory listings they used. Must be called whenever the files or the
+    load order they depend on may have changed."""
+    _cond_results.clear()
+    _dir_listings.clear()
+
 # Internal helpers
 def _process_path(file_path: str) -> Path:
     """Processes a file path, prepending the path to the Data folder and
@@ -95,10 +109,16 @@ def _read_binary_ver(binary_path):
     return '.'.join(map(str, binary_ver))
 
 def _iter_dir(parent_dir):
-    """Takes a path and returns an iterator of the filenames (as strings) of
-    files in that folder. .ghost extensions will be chopped off."""
-    return (f.fn_body if f.fn_ext == '.ghost' else f
-            for f in parent_dir.ilist())
+    """Takes a path and returns a list of the filenames (as strings) of
+    files in that folder. .ghost extensions will be chopped off. The listing
+    is reused until reset_eval_context is called."""
+    try:
+        return _dir_listings[parent_dir]
+    except KeyError:
+        _dir_listings[parent_dir] = listing = [
+            f.fn_body if f.fn_ext == '.ghost' else f
+            for f in parent_dir.ilist()]
+        return listing
 
 # Misc API
 def is_regex(string_to_check: str) -> bool:
@@ -156,7 +176,21 @@ class _ACondition(object):
     __slots__ = ()
 
     def evaluate(self) -> bool:
-        """Evaluates this condition, resolving it to a boolean value."""
+        """Evaluates this condition, resolving it to a boolean value. The
+        result is reused until reset_eval_context is called."""
+        try:
+            return _cond_results[self._cond_key()]
+        except KeyError:
+            result = _cond_results[self._cond_key()] = self._evaluate()
+            return result
+
+    def _cond_key(self):
+        """Returns the key of this condition's result in the evaluation
+        context."""
+        return self
+
+    def _evaluate(self) -> bool:
+        """Evaluates this condition, ignoring the evaluation context."""
         raise NotImplementedError
 
 class ConditionAnd(_ACondition):
@@ -168,7 +202,7 @@ def __init__(self, first_cond: _ACondition, second_cond: _ACondition):
         self.first_cond = first_cond
         self.second_cond = second_cond
 
-    def evaluate(self):
+    def _evaluate(self):
         return self.first_cond.evaluate() and self.second_cond.evaluate()
 
     def __repr__(self):
@@ -185,13 +219,21 @@ class ConditionFunc(_ACondition):
         - many_active
         - product_version
         - version"""
-    __slots__ = ('func_name', 'func_args')
+    __slots__ = ('func_name', 'func_args', '_func_key')
 
     def __init__(self, func_name: str, func_args: list):
         self.func_name = func_name
         self.func_args = func_args
+        self._func_key = None
 
-    def evaluate(self):
+    def _cond_key(self):
+        # The same function calls appear in the conditions of many plugins,
+        # so share their results
+        if self._func_key is None:
+            self._func_key = repr(self)
+        return self._func_key
+
+    def _evaluate(self):
         # Call the appropriate function, wrapping the error to make a nicer
         # error message if no appropriate function was found
         try:
@@ -226,7 +268,7 @@ class ConditionNot(_ACondition):
     def __init__(self, target_cond: _ACondition):
         self.target_cond = target_cond
 
-    def evaluate(self):
+    def _evaluate(self):
         return not self.target_cond.evaluate()
 
     def __repr__(self):
@@ -241,7 +283,7 @@ def __init__(self, first_cond: _ACondition, second_cond: _ACondition):
         self.first_cond = first_cond
         self.second_cond = second_cond
 
-    def evaluate(self):
+    def _evaluate(self):
         return self.first_cond.evaluate() or self.second_cond.evaluate()
 
     def __repr__(self):
@@ -267,8 +309,15 @@ def _fn_checksum(file_path: str, expected_crc: int) -> bool:
 
     :param file_path: The path of the file to check.
     :param expected_crc: The expected CRC32 value."""
+    from .bosh import modInfos
+    crc_path = _process_path(file_path)
     try:
-        return _process_path(file_path).crc == expected_crc
+        # Plugins usually have their CRC cached, no need to read them again
+        if crc_path.head == bass.dirs['mods'] and (
+                mod_inf := modInfos.get(crc_path.stail)) and (
+                cached_crc := mod_inf.valid_cached_crc()) is not None:
+            return cached_crc == expected_crc
+        return crc_path.crc == expected_crc
     except OSError:
         return False # Doesn't exist or is a directory
 
@@ -36,13 +36,14 @@
 import re
 from collections import deque
 from copy import deepcopy
+from zlib import crc32
 
 import yaml
 
-from .bolt import AFile, FName, FNDict, Path, deprint
+from .bolt import AFile, FName, FNDict, Path, PickleDict, deprint
 from .exception import BoltError, EvalError, LexerError, ParserError
 from .loot_conditions import Comparison, ConditionAnd, ConditionFunc, \
-    ConditionNot, ConditionOr, _ACondition, is_regex
+    ConditionNot, ConditionOr, _ACondition, is_regex, reset_eval_context
 
 # Typing
 _RTags = tuple[set[str], set[str]] # 'returned tags'
@@ -60,15 +61,19 @@
 # API
 metadata_version = '0.21' # The LOOT metadata version with which this
                           # implementation is compatible
+# Bump this whenever the layout of _PluginEntry changes, to discard compiled
+# masterlists cached by older versions
+_compiled_version = 1
 
 class LOOTParser(object):
     """The main frontend for interacting with LOOT's masterlists. Provides
     methods to parse masterlists and to retrieve information from them."""
     __slots__ = ('_cached_masterlist', '_cached_regexes', '_cached_merges',
-                 '_masterlist', '_userlist', '_taglist', '_tagCache')
+                 '_match_any_regex', '_masterlist', '_userlist', '_taglist',
+                 '_tagCache', '_compiled_path')
 
     def __init__(self, masterlist_path: Path, userlist_path: Path,
-            taglist_path: Path):
+            taglist_path: Path, compiled_path: Path | None = None):
         """Initialize a LOOTParser instance with the three specified
         masterlist paths. These will be cached via AFile and updated when
         refreshBashTags is called. Note that the order in which we read them
@@ -80,10 +85,15 @@ def __init__(self, masterlist_path: Path, userlist_path: Path,
         :param userlist_path: Optional, the path to the LOOT userlist that
             should be parsed and merged with the masterlist.
         :param taglist_path: the path to Bash's own cached masterlists - those
-            must always exist."""
+            must always exist.
+        :param compiled_path: Optional, the path to a file in which the
+            parsed and merged lists are cached, so that they only have to be
+            parsed again if their contents change."""
         self._cached_masterlist: dict[FName, _PluginEntry] = FNDict()
-        self._cached_regexes = {}
+        self._cached_regexes = []
+        self._match_any_regex = None
         self._cached_merges = {}
+        self._compiled_path = compiled_path
         deprint('Using these LOOT paths:')
         deprint(f' Masterlist: {masterlist_path}')
         deprint(f' Userlist: {userlist_path}')
@@ -127,7 +137,8 @@ def get_plugin_tags(self, plugin_name: FName, catch_errors=True) -> _RTags:
         """Retrieves added and removed tags for the specified plugin. If the
         plugin has no entry in the masterlist, two empty sets are returned.
         This method will evaluate any conditions that may be attached to the
-        tags, but the result will *not* be cached.
+        tags, but the result will *not* be cached - the results of the
+        conditions are, until refreshBashTags is called.
 
         :param plugin_name: The name of the plugin whose tags should be
             retrieved.
@@ -162,31 +173,67 @@ def load_lists(self, masterlist_path: Path,
         :param catch_errors: If False, no errors will be caught - you will have
             to handle them manually. Intended for unit tests."""
         try:
-            masterlist = _parse_list(masterlist_path)
-            if userlist_path:
-                userlist = None
-                # Userlists often end up in all kinds of wild formats, meaning
-                # they can cause all kinds of wild errors too - skip and
-                # complain if that happens
-                try:
-                    userlist = _parse_list(userlist_path)
-                except Exception:
-                    if not catch_errors:
-                        raise
-                    deprint(f'Failed to parse LOOT userlist {userlist_path}, '
-                            f'it likely has malformed syntax', traceback=True)
-                if userlist is not None:
-                    _merge_lists(masterlist, userlist)
+            lists_crc = tuple(_crc_list(p) for p in (masterlist_path,
+                                                     userlist_path) if p)
+            masterlist = self._load_compiled(lists_crc)
+            if masterlist is None:
+                masterlist = _parse_list(masterlist_path)
+                if userlist_path:
+                    userlist = None
+                    # Userlists often end up in all kinds of wild formats,
+                    # meaning they can cause all kinds of wild errors too -
+                    # skip and complain if that happens
+                    try:
+                        userlist = _parse_list(userlist_path)
+                    except Exception:
+                        if not catch_errors:
+                            raise
+                        deprint(f'Failed to parse LOOT userlist '
+                                f'{userlist_path}, it likely has malformed '
+                                f'syntax', traceback=True)
+                    if userlist is not None:
+                        _merge_lists(masterlist, userlist)
+                self._save_compiled(lists_crc, masterlist)
             self._cached_masterlist = masterlist
-            self._cached_regexes = [(re.compile(r, re.I).match, e) for r, e in
-                                    masterlist.items() if is_regex(r)]
+            regexes = [r for r in masterlist if is_regex(r)]
+            self._cached_regexes = [(re.compile(r, re.I).match, masterlist[r])
+                                    for r in regexes]
+            self._match_any_regex = _combine_regexes(regexes)
             self._cached_merges = {}
+            # Forget the conditions parsed for the tags of the old lists
+            _parsed_conditions.clear()
         except (re.error, TypeError, yaml.YAMLError):
             if not catch_errors:
                 raise
             deprint(f'Error when parsing LOOT masterlist {masterlist_path}, '
                     f'it likely has malformed syntax', traceback=True)
 
+    def _load_compiled(self, lists_crc) -> FNDict | None:
+        """Return the compiled masterlist cached for lists with the specified
+        CRCs, or None if there is no such masterlist."""
+        if not self._compiled_path: return None
+        compiled = PickleDict(self._compiled_path, load_pickle=True)
+        if compiled.vdata.get('version') != _compiled_version or \
+                compiled.pickled_data.get('lists_crc') != lists_crc:
+            return None
+        # FName keys are pickled as plain strings
+        return FNDict(compiled.pickled_data['plugins'])
+
+    def _save_compiled(self, lists_crc, masterlist: FNDict):
+        """Cache the specified compiled masterlist. Must be called before any
+        conditions of its entries are evaluated."""
+        if not self._compiled_path: return
+        compiled = PickleDict(self._compiled_path) # don't load!
+        compiled.vdata['version'] = _compiled_version
+        compiled.pickled_data['lists_crc'] = lists_crc
+        compiled.pickled_data['plugins'] = [(str(p), e) for p, e in
+                                            masterlist.items()]
+        try:
+            compiled.save()
+        except OSError:
+            deprint(f'Failed to save compiled LOOT masterlist to '
+                    f'{self._compiled_path}', traceback=True)
+
     def is_plugin_dirty(self, plugin_name: FName, mod_infos) -> bool:
         """Checks if the specified plugin is dirty according to the information
         inside the LOOT masterlist (or userlist, if it was parsed).
@@ -210,7 +257,17 @@ def _perform_merge(self, plugin_s: FName) -> _PluginEntry:
         main_entry = self._cached_masterlist.get(plugin_s)
         if main_entry:
             all_entries.append(main_entry)
-        for match_plugin, plugin_entry in self._cached_regexes:
+        regexes = self._cached_regexes
+        if self._match_any_regex:
+            # Most plugins match no regex at all. Otherwise, this finds the
+            # first regex that matches - the rest must be checked one by one
+            if not (regex_match := self._match_any_regex(plugin_s)):
+                regexes = ()
+            else:
+                first_dex = int(regex_match.lastgroup[1:])
+                all_entries.append(regexes[first_dex][1])
+                regexes = regexes[first_dex + 1:]
+        for match_plugin, plugin_entry in regexes:
             if match_plugin(plugin_s):
                 all_entries.append(plugin_entry)
         if not all_entries:
@@ -230,7 +287,10 @@ def _perform_merge(self, plugin_s: FName) -> _PluginEntry:
 
     # Old ConfigHelpers API -----------------------------
     def refreshBashTags(self):
-        """Reloads tag info if file dates have changed."""
+        """Reloads tag info if file dates have changed. Forgets the results
+        of evaluated conditions, since the files they check may have changed
+        too."""
+        reset_eval_context()
         if self._refresh_tags_cache():
             self._tagCache = {}
 
@@ -324,13 +384,23 @@ def eval_condition(self) -> bool:
         try:
             return self.tag_condition.evaluate()
         except AttributeError:
-            # Lazily parse the condition and cache it
-            self.tag_condition = _process_condition_string(self.tag_condition)
+            # Lazily parse the condition and cache it - share the parsed
+            # condition with all tags using the same condition string, so
+            # that it only gets evaluated once
+            try:
+                parsed_cond = _parsed_conditions[self.tag_condition]
+            except KeyError:
+                parsed_cond = _parsed_conditions[self.tag_condition] = \
+                    _process_condition_string(self.tag_condition)
+            self.tag_condition = parsed_cond
             return self.tag_condition.evaluate()
 
     def __repr__(self):
         return f'{self.tag_name} if {self.tag_condition!r}'
 
+# Maps condition strings to the conditions parsed from them
+_parsed_conditions: dict[str, _ACondition] = {}
+
 def _resolve_tags(tag_set: set[str | _ConditionalTag]) -> set[str]:
     """Convenience method to evaluate conditions for a set of tags (may
     contain both conditional and unconditional (i.e. just a string) tags)
@@ -653,6 +723,24 @@ def _merge_lists(first_list: dict[FName, _PluginEntry],
             # This plugin had no entry in the first list, just copy it cover
             first_list[plugin_name] = second_entry
 
+def _crc_list(list_path: Path) -> int:
+    """Return the CRC of the contents of the specified list."""
+    with list_path.open('rb') as ins:
+        return crc32(ins.read())
+
+def _combine_regexes(regexes: list[str]):
+    """Combine the specified regexes into a single one, whose lastgroup is
+    'r<index>' for the first of the regexes that matches. Returns its match
+    method, or None if the regexes can't be combined (e.g. because they use
+    backreferences, whose numbers would change)."""
+    if not regexes or any(re.search(r'\\\d|\(\?P=', r) for r in regexes):
+        return None
+    try:
+        return re.compile('|'.join(f'(?P<r{i}>{r})' for i, r in enumerate(
+            regexes)), re.I).match
+    except re.error:
+        return None
+
 def _parse_list(list_path: Path) -> dict[FName, _PluginEntry]:
     """Parses the specified masterlist or userlist and returns a FNDict
     mapping plugins to _PluginEntry instances. To parse the YAML, PyYAML is
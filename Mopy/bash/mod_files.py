@@ -23,19 +23,21 @@
 """This module houses the entry point for reading and writing plugin files
 through PBash (LoadFactory + ModFile) as well as some related classes."""
 
+import pickle
 from collections import defaultdict
 from collections.abc import Iterable
+from contextlib import suppress
 from zlib import decompress as zlib_decompress
 from zlib import error as zlib_error
 
-from . import bolt, bush, env
+from . import bass, bolt, bush, env, worker_pool
 from .bolt import MasterSet, SubProgress, decoder, deprint, sig_to_str, \
     struct_error, GPath_no_norm, FName, unpack_int
 # first import of brec for games with patchers - _dynamic_import_modules
 from .brec import ZERO_FID, FastModReader, FormIdReadContext, \
     FormIdWriteContext, MobBase, ModReader, MreRecord, RecHeader, \
     RecordHeader, RecordType, Subrecord, TopGrup, int_unpacker, null1, \
-    unpack_header, FormId, SubrecordBlob
+    unpack_header, FormId, SubrecordBlob, lazy_record_type
 from .exception import MasterMapError, ModError, ModReadError, StateError
 from .wbtemp import TempFile
 
@@ -81,15 +83,18 @@ class LoadFactory:
     """Encapsulate info on which record type we use to load which record
     signature."""
     grup_class = {} # map top record group signatures to class loading them
-    __slots__ = ('keepAll', 'topTypes', 'sig_to_type', 'all_sigs')
+    __slots__ = ('keepAll', 'topTypes', 'sig_to_type', 'all_sigs', 'lazy')
 
     def __init__(self, keepAll, *, by_sig: Iterable[bytes] = (),
-                 generic: Iterable[bytes] = ()):
+                 generic: Iterable[bytes] = (), lazy=False):
         """Pass a collection of signatures to load - either by their
         respective type or using generic MreRecord.
         :param by_sig: pass an iterable of top group signatures to unpack
-        :param generic: top group signatures to load as generic MreRecord"""
+        :param generic: top group signatures to load as generic MreRecord
+        :param lazy: if True, defer unpacking the by_sig records until their
+            attributes are first accessed - see lazy_record_type"""
         self.keepAll = keepAll
+        self.lazy = lazy
         self.topTypes = set()
         self.sig_to_type = defaultdict(lambda: MreRecord if keepAll else None)
         self.all_sigs = set()
@@ -107,8 +112,9 @@ def add_class(self, *by_sig, generic: Iterable[bytes] = ()):
             self.sig_to_type = {**dict.fromkeys(generic, MreRecord),
                                 **self.sig_to_type}
         if by_sig:
-            self.sig_to_type.update(
-                (k, RecordType.sig_to_class[k]) for k in by_sig)
+            rec_types = ((k, RecordType.sig_to_class[k]) for k in by_sig)
+            self.sig_to_type.update(((k, lazy_record_type(t)) for k, t in
+                rec_types) if self.lazy else rec_types)
         self.all_sigs = {*self.all_sigs, *all_sigs}
         #--Top type
         for class_sig in all_sigs:
@@ -117,6 +123,14 @@ def add_class(self, *by_sig, generic: Iterable[bytes] = ()):
             if class_sig in RecordHeader.top_grup_sigs:
                 self.topTypes.add(class_sig) # b'CELL' appears in both
 
+    def unpacked_sigs(self) -> frozenset[bytes]:
+        """Return the signatures of the records this factory unpacks right
+        away when loading them, i.e. not lazily and not as generic MreRecord.
+        Only the data of those gets decompressed while loading."""
+        return frozenset(s for s, t in self.sig_to_type.items() if
+            t is not MreRecord and (not self.lazy or
+                                    t is RecordType.sig_to_class[s]))
+
     def getTopClass(self, top_rec_type) -> type[MobBase | TopGrup] | None:
         """Return top block class for top block type, or None."""
         try:
@@ -151,6 +165,47 @@ def __missing__(self, top_grup_sig):
                                                 top_grup_sig)
         return self[top_grup_sig]
 
+def decompress_records(plugin_name: str, plugin_path: str,
+        decompress_sigs: frozenset[bytes]) -> dict[int, bytes]:
+    """Decompress the data of the compressed records with the specified
+    signatures in the specified plugin - pass the unpacked_sigs of the
+    LoadFactory the plugin is going to be loaded with, the data of other
+    records would never be used. Meant to run in a worker process (see
+    PatchFile.scanLoadMods), the result can be passed to ModFile.load_plugin.
+
+    :return: A dict mapping the file offset of the (compressed) data of each
+        compressed record to its decompressed data. Records whose data can't
+        be decompressed are left out, loading them will report the error."""
+    decompressed = {}
+    try:
+        with ModReader.from_path(plugin_name, plugin_path) as ins:
+            ins_tell = ins.ins.tell
+            ins_seek = ins.ins.seek
+            ins_read_view = ins.read_view
+            ins_size = ins.size
+            while ins_tell() != ins_size:
+                next_header = unpack_header(ins)
+                if next_header.recType == b'GRUP':
+                    continue # step into the group
+                data_offset = ins_tell()
+                if (data_end := data_offset + next_header.blob_size) > \
+                        ins_size:
+                    break # truncated, loading the plugin will report it
+                # 'compressed' flag
+                if next_header.flags1 & 0x00040000 and (
+                        next_header.recType in decompress_sigs):
+                    size_check = unpack_int(ins)
+                    with suppress(zlib_error):
+                        # Decompress straight out of the mapping
+                        decomp = zlib_decompress(ins_read_view(
+                            next_header.blob_size - 4))
+                        if len(decomp) == size_check:
+                            decompressed[data_offset] = decomp
+                ins_seek(data_end)
+    except (ModError, OSError, struct_error):
+        pass # return what we have, loading the plugin will report the error
+    return decompressed
+
 class ModFile(object):
     """Plugin file representation. Will load only the top record types
     specified in its LoadFactory."""
@@ -167,13 +222,18 @@ def __init__(self, fileInfo,loadFactory=None):
         self.topsSkipped = set() #--Types skipped
 
     def load_plugin(self, progress=None, loadStrings=True, catch_errors=True,
-                    do_map_fids=True):
+                    do_map_fids=True, decompressed_records=None):
         ##: track uses and decide on exception handling
-        """Load file."""
+        """Load file.
+
+        :param decompressed_records: The result of running
+            decompress_records on this plugin, if available."""
         progress = progress or bolt.Progress()
         progress.setFull(1.0)
         cont = FormIdReadContext if do_map_fids else ModReader
         with cont.from_info(self.fileInfo) as ins:
+            if decompressed_records:
+                ins.decompressed_records = decompressed_records
             if not do_map_fids: # hacky - only used for Mod_RecalcRecordCounts
                 ins.load_tes4(do_unpack_tes4=False)
             self.tes4 = ins.plugin_header
@@ -252,6 +312,10 @@ def safeSave(self):
             # fileInfo created before the file
             if self.fileInfo.ftime is not None:
                 GPath_no_norm(tmp_plugin).mtime = self.fileInfo.ftime ##: ugh
+            # We keep the old mtime and the ctime may survive the move too
+            # (e.g. due to file system tunneling on Windows), so the cached
+            # raw header can't be told apart from the new one by its stats
+            self.fileInfo.set_table_prop('tes4_cache', None)
             # FIXME If saving a locked (by xEdit f.i.) bashed patch a bogus UAC
             #  permissions dialog is displayed (should display file in use)
             env.shellMove({tmp_plugin: self.fileInfo.abs_path})
@@ -386,6 +450,187 @@ def create_record(self, new_rec_sig: bytes, new_rec_fid: FormId = None, *,
 # Typing for ModHeaderReader below
 _ModDataDict = defaultdict[bytes, list[tuple[RecHeader, str]]]
 
+# FormIds can't be pickled, so the worker processes used by
+# ModHeaderReader.extract_mods_data (and the record index below) store plain
+# tuples instead
+def _pack_headers(rec_headers: Iterable[RecHeader]) -> list[tuple]:
+    """Flatten the specified record headers to tuples of their fields."""
+    return [(h.recType, h.blob_size, h.flags1, h.fid.short_fid, h.flags2,
+             h.extra) for h in rec_headers]
+
+def _unpack_headers(packed_headers: list[tuple], fid_type=FormId) -> list[
+        RecHeader]:
+    """Rebuild the record headers from tuples created by _pack_headers,
+    wrapping their FormIDs in instances of fid_type."""
+    return [RecHeader(r_sig, r_size, r_flags1, fid_type(r_fid), r_flags2,
+                      r_extra, _entering_context=True)
+            for r_sig, r_size, r_flags1, r_fid, r_flags2, r_extra
+            in packed_headers]
+
+def _pack_mod_data(mod_data: _ModDataDict) -> dict[bytes, tuple[list, list]]:
+    """Flatten the specified mod data to a dict mapping each top group
+    signature to a list of packed headers and a list of EDIDs."""
+    return {grup_sig: (_pack_headers(h for h, _eid in grup_recs),
+                       [eid for _h, eid in grup_recs])
+            for grup_sig, grup_recs in mod_data.items()}
+
+def _unpack_mod_data(packed_data: dict[bytes, tuple[list, list]]) -> \
+        _ModDataDict:
+    """Rebuild the mod data from a dict created by _pack_mod_data."""
+    mod_data = defaultdict(list)
+    for grup_sig, (packed_headers, grup_eids) in packed_data.items():
+        mod_data[grup_sig] = list(zip(_unpack_headers(packed_headers),
+                                      grup_eids))
+    return mod_data
+
+def _extract_packed_data(plugin_name: str, plugin_path: str,
+        plugin_size: int) -> dict[bytes, tuple[list, list]]:
+    """Worker process side of extract_mods_data."""
+    return _pack_mod_data(ModHeaderReader._extract_data(FName(plugin_name),
+        plugin_path, plugin_size, None))
+
+_fid_facets = frozenset(('fids_outside_esl_range', 'new_records'))
+
+def _scan_fid_facets(plugin_name: str, plugin_path: str,
+        num_masters: int) -> dict[str, bool] | None:
+    """Computes both the 'fids_outside_esl_range' and the 'new_records' facets
+    in a single pass over the record headers. Returns None if the plugin can't
+    be read, checking it in the main process will report the error."""
+    outside_esl = new_records = False
+    try:
+        with ModReader.from_path(plugin_name, plugin_path) as ins:
+            while not ins.atEnd():
+                # Skip wrapping each fid in a FormId (which ModReader.__enter__
+                # would do) and work with the raw ints instead - see
+                # FormId.mod_dex/object_dex/is_null
+                next_header = unpack_header(ins, _entering_context=True)
+                if next_header.recType == b'GRUP':
+                    continue # step into the group
+                h_fid = next_header.fid
+                if (h_fid >> 24) >= num_masters and h_fid & 0x00FFFFFF:
+                    new_records = True
+                    if h_fid & 0x00FFFFFF > 0xFFF:
+                        outside_esl = True
+                        break # both facets are settled
+                next_header.skip_blob(ins)
+    except (ModError, OSError, struct_error):
+        return None
+    return {'fids_outside_esl_range': outside_esl,
+            'new_records': new_records}
+
+class _PluginPath:
+    """Stands in for the ModInfo of a plugin that ModFile needs for loading it
+    in a worker process, where there are no ModInfos."""
+    __slots__ = ('fn_key', 'abs_path')
+
+    def __init__(self, plugin_name: str, plugin_path: str):
+        self.fn_key = FName(plugin_name)
+        self.abs_path = GPath_no_norm(plugin_path)
+
+    def __str__(self): return f'{self.fn_key}'
+
+def _scan_facets(plugin_name: str, plugin_path: str, num_masters: int,
+        facets: frozenset[str]) -> dict:
+    """Worker process side of ModHeaderReader.index_facets. Returns a dict
+    mapping the specified facets to their values - the FormID facets are left
+    out if the plugin can't be read, checking it in the main process will
+    report the error."""
+    scanned = {}
+    if facets & _fid_facets and (fid_facets := _scan_fid_facets(
+            plugin_name, plugin_path, num_masters)) is not None:
+        scanned.update(fid_facets)
+    if 'merge' in facets:
+        scanned['merge'] = ModHeaderReader._scan_merge(
+            _PluginPath(plugin_name, plugin_path))
+    return scanned
+
+class _RecordIndex:
+    """Persistent per-plugin cache of what ModHeaderReader found out about each
+    plugin, so that plugins which did not change since the last time they were
+    scanned don't have to be read (and decompressed) again. Each plugin gets
+    its own folder in the Record Index folder, holding one file per 'facet'
+    (e.g. the headers and EDIDs of all its records, or whether all of its
+    FormIDs are in the ESL range). Each facet file starts with the key of the
+    plugin (its size, mtime and CRC) at the time the facet was stored - if the
+    key of a plugin changes, its stored facets are ignored. Keeping facets in
+    separate files means that small facets can be looked up and stored
+    without loading or rewriting the big ones."""
+    # Bump this whenever the format of any facet changes
+    _index_version = 2
+
+    @staticmethod
+    def _index_dir():
+        try:
+            return bass.dirs['modsBash'].join('Record Index')
+        except KeyError: # Bash dirs not initialized, e.g. in a worker process
+            return None
+
+    @classmethod
+    def _facet_path(cls, mod_info, facet: str):
+        if (index_dir := cls._index_dir()) is None: return None
+        return index_dir.join(f'{mod_info.fn_key}', f'{facet}.dat')
+
+    @staticmethod
+    def _mod_key(mod_info):
+        return (_RecordIndex._index_version, mod_info.fsize, mod_info.ftime,
+                mod_info.calculate_crc()[0])
+
+    @classmethod
+    def get(cls, mod_info, facet: str):
+        """Return the stored value of the specified facet for the specified
+        plugin or None if it's not stored (or no longer valid)."""
+        if (facet_path := cls._facet_path(mod_info, facet)) is None:
+            return None
+        try:
+            with facet_path.open('rb') as ins:
+                # The key is pickled separately, so that we don't have to load
+                # the facet of a plugin that changed
+                if pickle.load(ins) != cls._mod_key(mod_info):
+                    return None
+                return pickle.load(ins)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            deprint(f'Corrupted record index entry {facet_path}',
+                    traceback=True)
+            return None
+
+    @classmethod
+    def put(cls, mod_info, facet: str, facet_value):
+        """Store the value of the specified facet for the specified plugin.
+        Other facets stored for it are left alone."""
+        if (facet_path := cls._facet_path(mod_info, facet)) is None: return
+        try:
+            facet_path.head.makedirs()
+            with TempFile() as temp_entry:
+                with open(temp_entry, 'wb') as out:
+                    pickle.dump(cls._mod_key(mod_info), out, -1)
+                    pickle.dump(facet_value, out, -1)
+                facet_path.replace_with_temp(temp_entry)
+        except OSError:
+            # Not being able to store the index just means we'll have to scan
+            # the plugin again next time
+            deprint(f'Failed to write record index entry {facet_path}',
+                    traceback=True)
+
+    @classmethod
+    def prune(cls, keep_plugins):
+        """Remove the stored facets of all plugins that are not in
+        keep_plugins, e.g. because they were deleted or renamed. Also removes
+        entries left over from older versions of the index."""
+        if (index_dir := cls._index_dir()) is None: return
+        for entry_fn in index_dir.ilist():
+            if entry_fn in keep_plugins: continue
+            entry_path = index_dir.join(entry_fn)
+            try:
+                if entry_path.is_dir():
+                    entry_path.rmtree(safety='Record Index')
+                else:
+                    entry_path.remove()
+            except OSError:
+                deprint(f'Failed to remove record index entry {entry_path}',
+                        traceback=True)
+
 # TODO(inf) Use this for a bunch of stuff in mods_metadata.py (e.g. UDRs)
 class ModHeaderReader(object):
     """Allows very fast reading of a plugin's headers, skipping reading and
@@ -406,11 +651,27 @@ def _scan_fids(mod_info, fid_cond):
                     f"read pos: {ins.tell():d}\nCaused by: '{e!r}'")
         return False
 
+    @staticmethod
+    def _scan_fids_indexed(mod_info, facet, fid_cond):
+        """Wrapper around _scan_fids that uses the record index if possible,
+        either the stored result of a previous scan (stored under the
+        specified facet) or the stored headers of all records."""
+        if (scan_result := _RecordIndex.get(mod_info, facet)) is None:
+            if (packed_data := _RecordIndex.get(mod_info, 'records')) is None:
+                scan_result = ModHeaderReader._scan_fids(mod_info, fid_cond)
+            else:
+                scan_result = any(fid_cond(FormId(h[3]))
+                    for packed_headers, _eids in packed_data.values()
+                    for h in packed_headers)
+            _RecordIndex.put(mod_info, facet, scan_result)
+        return scan_result
+
     @staticmethod
     def formids_in_esl_range(mod_info):
         """Checks if all FormIDs in the specified mod are in the ESL range."""
         num_masters = len(mod_info.masterNames)
-        return not ModHeaderReader._scan_fids(mod_info,
+        return not ModHeaderReader._scan_fids_indexed(mod_info,
+            'fids_outside_esl_range',
             lambda header_fid: header_fid.mod_dex >= num_masters and
                                header_fid.object_dex > 0xFFF)
 
@@ -419,10 +680,85 @@ def has_new_records(mod_info):
         """Checks if all the specified mod has any new records."""
         num_masters = len(mod_info.masterNames)
         # Check for NULL to skip the main file header (i.e. TES3/TES4)
-        return ModHeaderReader._scan_fids(mod_info,
+        return ModHeaderReader._scan_fids_indexed(mod_info, 'new_records',
             lambda header_fid: not header_fid.is_null() and
                                header_fid.mod_dex >= num_masters)
 
+    @staticmethod
+    def merge_facts(mod_info) -> dict:
+        """Load the specified plugin the way the Bashed Patch merges it and
+        return what the MERGE check needs to know about it - see _scan_merge.
+        Uses the record index if possible."""
+        if (merge_facts := _RecordIndex.get(mod_info, 'merge')) is None:
+            merge_facts = ModHeaderReader._scan_merge(mod_info)
+            _RecordIndex.put(mod_info, 'merge', merge_facts)
+        return merge_facts
+
+    @staticmethod
+    def _scan_merge(plugin_info) -> dict:
+        """Implementation of merge_facts that only needs the fn_key and
+        abs_path of a ModInfo, so that it can run in a worker process too.
+        Returns a dict holding the error loading the plugin ran into (or
+        None), the signatures of the top groups that can't be merged, whether
+        no top groups were loaded and the signatures of the top groups holding
+        new records. The latter are found even if loading failed halfway."""
+        # Use generic MreRecord (without unpacking). ModFile.load will unpack
+        # the header which is enough for record.flags1|fid checks
+        merge_types_fact = LoadFactory(False, generic=bush.game.mergeable_sigs)
+        mod_file = ModFile(plugin_info, merge_types_fact)
+        load_error = None
+        try:
+            mod_file.load_plugin(loadStrings=False, catch_errors=False)
+        except ModError as error:
+            load_error = f'{error}'
+        new_rec_sigs = []
+        self_name = plugin_info.fn_key
+        for top_sig, block in mod_file.tops.items():
+            for candidate_rec in block.iter_records(): # skip deleted/ignored
+                if candidate_rec.group_key().mod_fn == self_name:
+                    new_rec_sigs.append(top_sig)
+                    break
+        return {'load_error': load_error,
+                'tops_skipped': sorted(mod_file.topsSkipped),
+                'is_empty': not mod_file.tops, 'new_rec_sigs': new_rec_sigs}
+
+    @staticmethod
+    def index_facets(wanted_facets: dict[FName, tuple[..., set[str]]],
+            progress=None):
+        """Parallel precomputation of facets for many plugins at once - the
+        'fids_outside_esl_range' and 'new_records' facets (see
+        formids_in_esl_range and has_new_records) and the 'merge' facet (see
+        merge_facts). wanted_facets maps each plugin to its ModInfo and the
+        facets wanted for it. The facets that the record index does not hold
+        yet are computed in a pool of worker processes and stored in the
+        record index, so that the checks themselves only have to look them
+        up. Raises CancelError if the user cancels via progress."""
+        to_scan = {}
+        for p, (p_minf, p_facets) in wanted_facets.items():
+            missing_facets = frozenset(f for f in p_facets
+                                       if _RecordIndex.get(p_minf, f) is None)
+            if missing_facets:
+                to_scan[p] = (p_minf, missing_facets)
+        if not worker_pool.use_pool(len(to_scan)):
+            return # the checks will scan the plugins as needed
+        progress = progress or bolt.Progress()
+        progress.setFull(len(to_scan))
+        scanned = worker_pool.parallel_map(_scan_facets,
+            {p: (f'{p}', f'{p_minf.abs_path}', len(p_minf.masterNames),
+                 missing_facets)
+             for p, (p_minf, missing_facets) in to_scan.items()}, progress,
+            lambda p: _('Scanning: %(scanning_plugin)s') % {
+                'scanning_plugin': p})
+        for p, p_facets in scanned.items():
+            for f, f_value in p_facets.items():
+                _RecordIndex.put(to_scan[p][0], f, f_value)
+
+    @staticmethod
+    def prune_record_index(mod_infos: dict[FName, ...]):
+        """Drop whatever the record index stored for plugins that are not in
+        mod_infos (anymore)."""
+        _RecordIndex.prune(mod_infos)
+
     @staticmethod
     def extract_mod_data(mod_info, progress) -> _ModDataDict:
         """Reads the headers and EDIDs of every record in the specified mod,
@@ -431,6 +767,56 @@ def extract_mod_data(mod_info, progress) -> _ModDataDict:
         record with that signature. Note that the flags are not processed
         either - if you need that, manually call MreRecord.flags1_() on
         them."""
+        if (packed_data := _RecordIndex.get(mod_info, 'records')) is None:
+            return ModHeaderReader._extract_indexed_data(mod_info, progress)
+        return _unpack_mod_data(packed_data)
+
+    @staticmethod
+    def _extract_indexed_data(mod_info, progress) -> _ModDataDict:
+        """Read the mod data of the specified plugin and store it in the
+        record index."""
+        mod_data = ModHeaderReader._extract_data(mod_info.fn_key,
+            mod_info.abs_path, mod_info.fsize, progress)
+        _RecordIndex.put(mod_info, 'records', _pack_mod_data(mod_data))
+        return mod_data
+
+    @staticmethod
+    def extract_mods_data(mod_infos: dict[FName, ...], progress) -> dict[
+            FName, _ModDataDict]:
+        """Parallel version of extract_mod_data for many plugins at once. The
+        plugins that have to be read (i.e. are not in the record index yet)
+        are spread across a pool of worker processes, but the returned dict
+        maps the keys of mod_infos to their data in the same order as
+        mod_infos. Raises CancelError if the user cancels via progress."""
+        progress = progress or bolt.Progress()
+        progress.setFull(max(len(mod_infos), 1))
+        ret_data = {}
+        to_scan = {}
+        for p, p_minf in mod_infos.items():
+            if (p_packed := _RecordIndex.get(p_minf, 'records')) is None:
+                ret_data[p] = None # placeholder to keep the order
+                to_scan[p] = p_minf
+            else:
+                ret_data[p] = _unpack_mod_data(p_packed)
+        if not worker_pool.use_pool(len(to_scan)):
+            for i, (p, p_minf) in enumerate(to_scan.items()):
+                ret_data[p] = ModHeaderReader._extract_indexed_data(p_minf,
+                    SubProgress(progress, i, i + 1))
+            return ret_data
+        scanned_packed = worker_pool.parallel_map(_extract_packed_data,
+            {p: (f'{p}', f'{p_minf.abs_path}', p_minf.fsize)
+             for p, p_minf in to_scan.items()}, progress,
+            lambda p: _('Loading: %(loading_plugin)s') % {'loading_plugin': p})
+        for p, p_packed in scanned_packed.items():
+            _RecordIndex.put(to_scan[p], 'records', p_packed)
+            ret_data[p] = _unpack_mod_data(p_packed)
+        return ret_data
+
+    @staticmethod
+    def _extract_data(plugin_fn: FName, plugin_path, plugin_size,
+            progress) -> _ModDataDict:
+        """Implementation of extract_mod_data that does not need a ModInfo,
+        so that it can run in a worker process too."""
         # This method is *heavily* optimized for performance. Inlines and other
         # ugly code ahead
         progress = progress or bolt.Progress()
@@ -441,7 +827,6 @@ def extract_mod_data(mod_info, progress) -> _ModDataDict:
         # PY3.13: Check if removing all the dot 'inlines' in here is faster
         # now - on py3.12 it is *slower*, even though it really should be
         # faster!
-        plugin_fn = mod_info.fn_key
         sh_unpack = Subrecord.sub_header_unpack
         sh_size = Subrecord.sub_header_size
         main_progress_msg = _('Loading: %(loading_plugin)s') % {
@@ -459,12 +844,13 @@ def extract_mod_data(mod_info, progress) -> _ModDataDict:
         # Whether or not we can skip looking for EDIDs for  the current record
         # type because it doesn't even have any
         #skip_eids = tg_label not in records_with_eids
-        with mod_info.abs_path.open(u'rb') as ins:
-            initial_bytes = ins.read()
-        with FastModReader(plugin_fn, initial_bytes) as ins:
-            ins_tell = ins.tell
-            ins_seek = ins.seek
-            ins_read = ins.read
+        with ModReader.from_path(plugin_fn, plugin_path) as ins:
+            # Bypass the bounds checks of ModReader and use the methods of the
+            # memory-mapped file directly - they are only needed for headers
+            ins_tell = ins.ins.tell
+            ins_seek = ins.ins.seek
+            ins_read = ins.ins.read
+            ins_read_view = ins.read_view
             ins_size = ins.size
             while ins_tell() != ins_size:
                 # Unpack the headers - these can be either GRUPs or regular
@@ -475,7 +861,7 @@ def extract_mod_data(mod_info, progress) -> _ModDataDict:
                     # Nothing special to do for non-top GRUPs
                     if not next_header.is_top_group_header: continue
                     tg_label = next_header.label
-                    progress(ins_tell() / mod_info.fsize,
+                    progress(ins_tell() / plugin_size,
                              f'{main_progress_msg}\n{sig_to_str(tg_label)}')
                     record_list = group_records[tg_label]
                 #     skip_eids = tg_label not in records_with_eids
@@ -493,7 +879,7 @@ def extract_mod_data(mod_info, progress) -> _ModDataDict:
                     if next_header.flags1 & 0x00040000: # 'compressed' flag
                         size_check = unpack_int(ins)
                         try:
-                            new_rec_data = zlib_decompress(ins_read(
+                            new_rec_data = zlib_decompress(ins_read_view(
                                 blob_siz - 4))
                         except zlib_error:
                             if plugin_fn == 'FalloutNV.esm':
@@ -548,6 +934,17 @@ def extract_mod_data(mod_info, progress) -> _ModDataDict:
     def read_temp_child_headers(mod_info) -> list[RecHeader]:
         """Reads the headers of all temporary CELL chilren in the specified mod
         and returns them as a list. Used for determining FO3/FNV/TES5 ONAM."""
+        if (packed := _RecordIndex.get(mod_info, 'temp_children')) is None:
+            temp_headers = ModHeaderReader._read_temp_child_headers(mod_info)
+            _RecordIndex.put(mod_info, 'temp_children',
+                             _pack_headers(temp_headers))
+            return temp_headers
+        # Use the same FormId type that FormIdReadContext would have used
+        return _unpack_headers(packed, FormId.from_masters(
+            (*mod_info.masterNames, mod_info.fn_key), mod_info.is_overlay()))
+
+    @staticmethod
+    def _read_temp_child_headers(mod_info) -> list[RecHeader]:
         ret_headers = []
         # We want to read only the children of these, so skip their tops
         interested_sigs = {b'CELL', b'WRLD'}
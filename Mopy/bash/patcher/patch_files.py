@@ -25,20 +25,43 @@
 import re
 import time
 from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
 from itertools import chain, count
 from operator import attrgetter
 from typing import Self
 
-from .. import bass, load_order
+from .. import bass, load_order, worker_pool
 from .. import bolt # for type hints
 from .. import bush # for game etc
 from ..bolt import Progress, SubProgress, deprint, dict_sort, readme_url, FName
+from ..brec import FormId, RecordType
 from ..exception import BoltError, CancelError, ModError
 from ..localize import format_date
-from ..mod_files import LoadFactory, ModFile
+from ..mod_files import LoadFactory, ModFile, decompress_records
+
+def _plain_config(config_val):
+    """Convert a patch configuration to builtin types that still compare
+    equal after being pickled - FNames are pickled as Paths."""
+    if isinstance(config_val, dict):
+        return {_plain_config(k): _plain_config(v) for k, v in
+                config_val.items()}
+    if isinstance(config_val, (set, frozenset)):
+        return frozenset(map(_plain_config, config_val))
+    if isinstance(config_val, (list, tuple)):
+        return tuple(map(_plain_config, config_val))
+    if isinstance(config_val, (FName, bolt.Path)):
+        return f'{config_val}'.lower()
+    return config_val
 
 class PatchFile(ModFile):
     """Base class of patch files. Wraps an executing bashed Patch."""
+    # Plugins loaded during the build are cached so that every phase can reuse
+    # them - evict the least recently used ones once the cached plugins' total
+    # file size exceeds this. Loaded records take up a multiple of that size
+    _max_loaded_size = 512 * 1024 * 1024
+    # Same, but for the decompressed records of plugins that are prefetched
+    # in worker processes and not yet scanned (see scanLoadMods)
+    _max_prefetch_size = 256 * 1024 * 1024
 
     def set_mergeable_mods(self, mergeMods):
         """Set 'mergeSet' attribute to the srcs of MergePatchesPatcher."""
@@ -140,9 +163,14 @@ def _link(link_id):
                 log(f'* {alias_target} >> {alias_repl}')
 
     def init_patchers_data(self, patcher_instances, progress):
-        """Gives each patcher a chance to get its source data."""
+        """Gives each patcher a chance to get its source data. Starts the
+        build - see end_build."""
+        # FormIds of the same record share their long fid while building
+        self._build_ctx.enter_context(FormId.interning())
         self._patcher_instances = [p for p in patcher_instances if p.isActive]
         if not self._patcher_instances: return
+        # Have get_loaded_mod also load what scanLoadMods will need
+        self._scan_read_sigs = self._patchers_read_sigs()
         progress = progress.setFull(len(self._patcher_instances))
         for index, patcher in enumerate(self._patcher_instances):
             progress(index, _('Preparing') + f'\n{patcher.getName()}')
@@ -151,6 +179,67 @@ def init_patchers_data(self, patcher_instances, progress):
         # initData may set isActive to zero - TODO(ut) track down
         self._patcher_instances = [p for p in patcher_instances if p.isActive]
 
+    def build_state(self, patch_config, game_files, progress):
+        """Return a snapshot of everything the output of this patch depends
+        on: the patch configuration, the bash.ini settings, the plugins
+        loading before it (in order, with their tags), the Bash Patches csv
+        files and the specified game files. Plugins are represented by their
+        cached CRC, which is only recalculated for plugins whose size or mtime
+        changed, other files by their size and mtime.
+
+        :param game_files: Maps a key to the path of each other file the
+            patch depends on, e.g. the game INIs and the strings files."""
+        stale_plugins = [k for k, v in self.all_plugins.items() if
+                         v.valid_cached_crc() is None]
+        self.p_file_minfos.refresh_crcs(stale_plugins, progress)
+        plugin_crcs = tuple((f'{k}', v.cached_mod_crc(), k in self.load_dict,
+            tuple(sorted(self.all_tags[k]))) for k, v in
+                            self.all_plugins.items())
+        csv_paths = {}
+        for patches_dir in (bass.dirs['patches'], bass.dirs['defaultPatches']):
+            if not patches_dir: continue
+            for csv_fn in patches_dir.ilist():
+                csv_path = patches_dir.join(csv_fn)
+                csv_paths[f'{csv_path}'] = csv_path
+        return {'app_version': bass.AppVersion,
+                'config': _plain_config(patch_config),
+                'settings': tuple(sorted((k, f'{v}') for k, v in
+                                         bass.inisettings.items())),
+                'plugins': plugin_crcs, 'csvs': self._file_stats(csv_paths),
+                'game_files': self._file_stats(game_files)}
+
+    @staticmethod
+    def _file_stats(file_paths):
+        """Return the sorted (key, size, mtime) tuples of the specified files,
+        with None for the stats of missing ones."""
+        file_stats = []
+        for k, file_path in sorted(file_paths.items()):
+            try:
+                file_stats.append((k, *file_path.size_mtime()))
+            except OSError:
+                file_stats.append((k, None, None))
+        return tuple(file_stats)
+
+    @staticmethod
+    def is_build_current(prev_state, curr_state, pfile_minfos):
+        """Check if a patch built with prev_state (as returned by build_state
+        and updated with the CRCs of the outputs by the caller) would be
+        rebuilt identically for curr_state, and its outputs are untouched."""
+        if not prev_state or not (outputs := prev_state.get('outputs')):
+            return False
+        for k, v in curr_state.items():
+            if prev_state.get(k) != v:
+                return False
+        for bp_fname, bp_crc in outputs.items():
+            if (bp_info := pfile_minfos.get(FName(bp_fname))) is None:
+                return False
+            try:
+                if bp_info.calculate_crc()[0] != bp_crc:
+                    return False
+            except OSError:
+                return False
+        return True
+
     #--Instance
     def __init__(self, modInfo, pfile_minfos):
         """Initialization."""
@@ -188,10 +277,16 @@ def __init__(self, modInfo, pfile_minfos):
             self.patches_set.update(bass.dirs['defaultPatches'].ilist())
         self.p_file_minfos = pfile_minfos
         self.set_active_arrays(pfile_minfos)
-        # cache of mods loaded - eventually share between initData/scanModFile
-        self._loaded_mods = {}
+        # cache of mods loaded, shared between initData/scanLoadMods/buildPatch
+        # - ordered from least to most recently used
+        self._loaded_mods: dict[FName, ModFile] = {}
+        self._loaded_size = 0
+        # read signatures scanLoadMods will need for non-merged plugins
+        self._scan_read_sigs = set()
         # read signatures we need to load per plugin - updated by the patchers
         self._read_signatures = defaultdict(set)
+        # contexts kept open from init_patchers_data until end_build
+        self._build_ctx = ExitStack()
 
     def set_active_arrays(self, pfile_minfos):
         """Populate PatchFile data structures with info on active mods - must
@@ -287,56 +382,171 @@ def new_gmst(self, gmst_eid, gmst_val):
     def initFactories(self,progress):
         """Gets load factories."""
         progress(0, _('Processing.'))
-        read_sigs = set(bush.game.readClasses) | set(chain.from_iterable(
-            p.active_read_sigs for p in self._patcher_instances))
-        self.readFactory = LoadFactory(False, by_sig=read_sigs)
+        read_sigs = self._patchers_read_sigs()
+        # patchers generally only look at a few attributes of the records
+        # they read, so only unpack the records they actually look at
+        self.readFactory = LoadFactory(False, by_sig=read_sigs, lazy=True)
         write_sigs = set(bush.game.writeClasses) | set(chain.from_iterable(
             p.active_write_sigs for p in self._patcher_instances))
         self.loadFactory = LoadFactory(True, by_sig=write_sigs)
         #--Merge Factory
         self.mergeFactory = LoadFactory(False, by_sig=bush.game.mergeable_sigs)
 
+    def _patchers_read_sigs(self):
+        """Return the signatures the active patchers need to read."""
+        return set(bush.game.readClasses) | set(chain.from_iterable(
+            p.active_read_sigs for p in self._patcher_instances))
+
     def update_read_factories(self, sigs, mods):
         """Let the patchers request loading the specified `sigs` for the
         specified `mods` to use in its initData (eventually scanModFile)."""
         for m in mods: self._read_signatures[m].update(sigs)
 
     def get_loaded_mod(self, mod_name):
+        if mod_name not in self.all_plugins:
+            return None # (Filter tagged) mods with missing masters
         # get which signatures the patchers need to load for this mod
-        load_sigs = self._read_signatures.get(mod_name) or set()
-        if mod_name in self._loaded_mods:
-            loaded_mod: ModFile = self._loaded_mods[mod_name]
-            if loaded_mod.topsSkipped & load_sigs: # we need to reload
-                # never happens for initData but see mergeModFile
-                del self._loaded_mods[mod_name]
-            else:
+        return self._load_shared(mod_name,
+                                 self._read_signatures.get(mod_name) or set())
+
+    def _load_shared(self, mod_name, needed_sigs, progress=None,
+                     decompressed_records=None) -> ModFile:
+        """Return the cached ModFile for the specified plugin, loading it
+        first if it's not cached yet or lacks some of needed_sigs. Loads
+        everything all patch phases need from the plugin at once, so that
+        ideally each plugin gets loaded only once per build. The cached
+        ModFile is shared, so it must not be modified - except for the
+        filtering of inactive Filter plugins, which happens right here."""
+        if loaded_mod := self._loaded_mods.pop(mod_name, None):
+            loaded_sigs = loaded_mod.loadFactory.all_sigs
+            if needed_sigs <= loaded_sigs:
+                self._loaded_mods[mod_name] = loaded_mod # most recently used
                 return loaded_mod
-        elif mod_name not in self.all_plugins:
-            return None # (Filter tagged) mods with missing masters
-        lf = LoadFactory(False, by_sig=load_sigs)
+            # we need to reload - never happens for initData but see
+            # mergeModFile
+            self._loaded_size -= loaded_mod.fileInfo.fsize
+            load_sigs = {*loaded_sigs, *needed_sigs}
+        else:
+            load_sigs = {*needed_sigs, *self._read_signatures.get(mod_name,
+                                                                  ())}
+            # Merged plugins get loaded separately for merging, since that
+            # modifies them - see _get_scan_mod
+            if mod_name not in self.mergeSet:
+                load_sigs |= self._scan_read_sigs
+        lf = LoadFactory(False, by_sig=load_sigs, lazy=True)
         mod_info = self.all_plugins[mod_name]
         mod_file = ModFile(mod_info, lf)
-        mod_file.load_plugin()
-        # don't waste time for active Filter plugins, since we already ensure
-        # those don't have missing masters before we even begin building the BP
-        if mod_name not in self.load_dict and 'Filter' in self.all_tags[
-                mod_name]:
-            load_set = set(self.load_dict)
-            # pass lf in - in initData self.readFactory is not initialized yet
-            self.filter_plugin(mod_file, load_set, lf=lf)
+        mod_file.load_plugin(progress,
+                             decompressed_records=decompressed_records)
+        # pass lf in - in initData self.readFactory is not initialized yet
+        self._filter_inactive(mod_name, mod_file, lf)
         self._loaded_mods[mod_name] = mod_file
+        self._loaded_size += mod_info.fsize
+        # Evict the least recently used plugins if we cache too much
+        for cached_name in [*self._loaded_mods][:-1]:
+            if self._loaded_size <= self._max_loaded_size: break
+            evicted_mod = self._loaded_mods.pop(cached_name)
+            self._loaded_size -= evicted_mod.fileInfo.fsize
         return mod_file
 
+    def _get_scan_mod(self, mod_name, scan_factory, progress,
+                      decompressed_records) -> ModFile:
+        """Return a ModFile for scanLoadMods to scan, holding exactly the
+        records scan_factory would load. Reuses the ModFile cached by
+        get_loaded_mod if there is one - unless the plugin is to be merged,
+        since merging filters its records in place."""
+        if mod_name in self.mergeSet or mod_name not in self._loaded_mods:
+            return self._load_scan_mod(mod_name, scan_factory, progress,
+                                       decompressed_records)
+        mod_file = self._load_shared(mod_name, scan_factory.all_sigs, progress,
+                                     decompressed_records)
+        # Only hand out the top groups scan_factory would have loaded - and
+        # only if their loaded nested records match too (e.g. a CELL block
+        # with REFRs in it if we are not scanning REFRs would get merged)
+        loaded_sigs, scan_sigs = (mod_file.loadFactory.all_sigs,
+                                  scan_factory.all_sigs)
+        scan_view = ModFile(mod_file.fileInfo, scan_factory)
+        for top_sig, top_block in mod_file.tops.items():
+            if top_sig not in scan_factory.topTypes:
+                scan_view.topsSkipped.add(top_sig)
+                continue
+            nested_sigs = {top_sig, *(s for s in loaded_sigs if top_sig in
+                RecordType.nested_to_top.get(s, ()))}
+            if loaded_sigs & nested_sigs != scan_sigs & nested_sigs:
+                return self._load_scan_mod(mod_name, scan_factory, progress,
+                                           decompressed_records)
+            scan_view.tops[top_sig] = top_block
+        scan_view.topsSkipped.update(mod_file.topsSkipped)
+        scan_view.tes4 = mod_file.tes4
+        scan_view.strings = mod_file.strings
+        return scan_view
+
+    def _load_scan_mod(self, mod_name, scan_factory, progress,
+                       decompressed_records) -> ModFile:
+        """Load the specified plugin using scan_factory. The result is not
+        cached, since mergeModFile keeps adding types to scan_factory."""
+        scan_mod = ModFile(self.all_plugins[mod_name], scan_factory)
+        scan_mod.load_plugin(progress,
+                             decompressed_records=decompressed_records)
+        # Merged plugins get filtered while merging, see mergeModFile
+        if mod_name not in self.mergeSet:
+            self._filter_inactive(mod_name, scan_mod, scan_factory)
+        return scan_mod
+
+    def _filter_inactive(self, mod_name, mod_file, lf):
+        """Filter the specified plugin if it is an inactive Filter plugin.
+        Don't waste time on active Filter plugins, since we already ensure
+        those don't have missing masters before we even begin building the
+        BP."""
+        if mod_name not in self.load_dict and 'Filter' in self.all_tags[
+                mod_name]:
+            self.filter_plugin(mod_file, set(self.load_dict), lf=lf)
+
     def scanLoadMods(self,progress):
         """Scans load+merge mods."""
-        nullProgress = Progress()
         progress = progress.setFull(len(self.all_plugins))
         load_set = set(self.load_dict)
         patchers_ord = sorted(self._patcher_instances,
                               key=attrgetter('patcher_order'))
+        # Decompress the records of upcoming plugins in worker processes while
+        # we parse and scan the current one - parsing itself stays here, in
+        # load order, so the result is the same as a sequential scan. Out of
+        # their records, only decompress what the plugin's load factory unpacks
+        read_sigs = self.readFactory.unpacked_sigs()
+        merge_sigs = self.mergeFactory.unpacked_sigs()
+        prefetch_mods = {m: (f'{m}', f'{self.all_plugins[m].abs_path}',
+                             merge_sigs if m in self.mergeSet else read_sigs)
+            for m in self.all_plugins if m not in self.needs_filter_mods and (
+                m not in self._loaded_mods or m in self.mergeSet)}
+        prefetched = None
+        if worker_pool.use_pool(len(prefetch_mods)):
+            prefetched = worker_pool.ordered_prefetch(decompress_records,
+                prefetch_mods, item_sizes={m: self.all_plugins[m].fsize
+                                           for m in prefetch_mods},
+                max_pending_size=self._max_prefetch_size)
+        try:
+            self._scan_load_mods(progress, load_set, patchers_ord,
+                                 prefetch_mods, prefetched)
+        finally:
+            if prefetched is not None:
+                prefetched.close()
+        progress(progress.full, _('Load plugins scanned.'))
+
+    def _scan_load_mods(self, progress, load_set, patchers_ord, prefetch_mods,
+                        prefetched):
+        nullProgress = Progress()
         for index, (modName, modInfo) in enumerate(self.all_plugins.items()):
             if modName in self.needs_filter_mods:
                 continue
+            decompressed = None
+            if prefetched is not None and modName in prefetch_mods:
+                try:
+                    decompressed = next(prefetched)[1]
+                except Exception: # fall back to decompressing in place
+                    deprint('Prefetching plugin records failed',
+                            traceback=True)
+                    prefetched.close()
+                    prefetched = None
             # Check some commonly needed properties of the current plugin
             is_merged = modName in self.mergeSet
             is_filter = 'Filter' in self.all_tags[modName]
@@ -346,8 +556,8 @@ def scanLoadMods(self,progress):
             try:
                 scan_factory = (self.readFactory, self.mergeFactory)[is_merged]
                 progress(index, f'{modName}\n' + _('Loading…'))
-                modFile = ModFile(modInfo, scan_factory)
-                modFile.load_plugin(SubProgress(progress, index, index + 0.5))
+                modFile = self._get_scan_mod(modName, scan_factory,
+                    SubProgress(progress, index, index + 0.5), decompressed)
             except ModError as e:
                 deprint('load error:', traceback=True)
                 self.loadErrorMods.append((modName,e))
@@ -366,12 +576,10 @@ def scanLoadMods(self,progress):
                     # Else, if the plugin is active, update records from it
                     progress(pstate, f'{modName}\n' + _('Scanning…'))
                     self.update_patch_records_from_mod(modFile)
-                elif is_filter:
-                    # Else, if the plugin is a Filter plugin, filter it but
-                    # don't merge any of its contents (since it's inactive, but
-                    # we might still want to import filtered data, e.g. actor
-                    # factions)
-                    self.filter_plugin(modFile, load_set)
+                # Else, if the plugin is a Filter plugin, it got filtered when
+                # it was loaded (see _filter_inactive) - we don't merge any of
+                # its contents (since it's inactive, but we might still want to
+                # import filtered data, e.g. actor factions)
                 for patcher in patchers_ord:
                     if iiMode and not patcher.iiMode: continue
                     progress(pstate, f'{modName}\n{patcher.getName()}')
@@ -381,7 +589,6 @@ def scanLoadMods(self,progress):
             except:
                 bolt.deprint(f'MERGE/SCAN ERROR: {modName}', traceback=True)
                 raise
-        progress(progress.full, _('Load plugins scanned.'))
 
     def mergeModFile(self, modFile, loaded_mods, iiMode):
         """Copies contents of modFile into self."""
@@ -447,6 +654,11 @@ def buildPatch(self,log,progress):
             block.keepRecords(self.keepIds)
         progress(0.95, _('Completing') + '\n' + _('Converting FormIDs…'))
 
+    def end_build(self):
+        """Must be called once done building and saving this patch, even if
+        the build failed or was skipped."""
+        self._build_ctx.close()
+
     def set_attributes(self, *, was_split=False, split_part=0):
         """Create the description, set appropriate flags, etc."""
         self.tes4.masters = load_order.get_ordered(self.used_masters())
@@ -21,10 +21,15 @@
 #
 # =============================================================================
 """Test archives.py"""
+import lzma
 import os
+import struct
 import tempfile
+import zipfile
+from zlib import crc32
 
-from ..archives import compress7z, extract7z
+from .. import archives
+from ..archives import compress7z, extract7z, list_archive
 from ..bolt import GPath
 
 _utils_dir = GPath(os.path.join(os.path.dirname(__file__), 'utils'))
@@ -55,3 +60,196 @@ def test_compress_extract_with_spaces(capsys):
                 out.write('__init__.py\n')
             extract7z(full_out, dirname, filelist_to_extract=templist)
             assert '__init__.py' in os.listdir(dirname)
+
+def test_list_archive_zip(tmp_path):
+    """Test that zips are listed in-process, like 7z -slt would list them."""
+    zip_path = tmp_path / 'test archive.zip'
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as out:
+        out.writestr('Meshes/test.nif', b'nif' * 100)
+        out.writestr('Meshes/', b'')
+        out.writestr('test.esp', b'')
+    listed = []
+    list_archive(zip_path, lambda k, v: listed.append((k, v)))
+    nif_path = os.path.join('Meshes', 'test.nif')
+    assert listed == [('Solid', '-'),
+        ('Path', nif_path), ('Size', '300'), ('Attributes', 'A'),
+        ('CRC', f'{crc32(b"nif" * 100):08X}'), ('Method', ''),
+        ('Path', 'Meshes'), ('Size', '0'), ('Attributes', 'D'),
+        ('CRC', ''), ('Method', ''),
+        ('Path', 'test.esp'), ('Size', '0'), ('Attributes', 'A'),
+        ('CRC', '00000000'), ('Method', '')]
+
+# 7z archives -----------------------------------------------------------------
+def _7z_number(num):
+    """Encode num the way 7z encodes numbers in its headers."""
+    for i in range(8):
+        if num < 1 << 7 * (i + 1):
+            return bytes([((0xFF00 >> i) & 0xFF) | (num >> 8 * i)]) + (
+                num & ((1 << 8 * i) - 1)).to_bytes(i, 'little')
+    return b'\xff' + num.to_bytes(8, 'little')
+
+def _7z_bits(bit_vector):
+    packed = bytearray()
+    for i, bit in enumerate(bit_vector):
+        if not i % 8: packed.append(0)
+        if bit: packed[-1] |= 0x80 >> i % 8
+    return bytes(packed)
+
+def _7z_folder(codec_id, coder_props=b''):
+    """A folder with a single coder."""
+    coder_flags = len(codec_id) | (0x20 if coder_props else 0)
+    return b'\x01' + bytes([coder_flags]) + codec_id + (
+        _7z_number(len(coder_props)) + coder_props if coder_props else b'')
+
+def _7z_streams_info(pack_pos, pack_sizes, folders, unpack_sizes,
+                     folder_crcs=None, substreams=b''):
+    return (b'\x06' + _7z_number(pack_pos) + _7z_number(len(pack_sizes)) +
+            b'\x09' + b''.join(map(_7z_number, pack_sizes)) + b'\x00' +
+            b'\x07\x0b' + _7z_number(len(folders)) + b'\x00' +
+            b''.join(folders) + b'\x0c' +
+            b''.join(map(_7z_number, unpack_sizes)) +
+            (b'\x0a\x01' + b''.join(struct.pack('<I', c) for c in
+                                    folder_crcs) if folder_crcs else b'') +
+            b'\x00' + substreams + b'\x00')
+
+def _write_7z(archive_path, archive_files, *, solid=False,
+              encode_header=False):
+    """Write a 7z archive holding archive_files, a list of (path, data)
+    tuples with data being None for directories. The file data is stored
+    with the Copy coder - we only ever list it, so no need to compress."""
+    streams = [d for _p, d in archive_files if d]
+    packed = b''.join(streams)
+    header = b'\x01'
+    if streams:
+        copy_folder = _7z_folder(b'\x00')
+        if solid:
+            substreams = (b'\x08\x0d' + _7z_number(len(streams)) +
+                b'\x09' + b''.join(_7z_number(len(d)) for d in streams[:-1]) +
+                b'\x0a\x01' + b''.join(struct.pack('<I', crc32(d)) for d in
+                                       streams) + b'\x00')
+            streams_info = _7z_streams_info(0, [len(packed)], [copy_folder],
+                [len(packed)], substreams=substreams)
+        else:
+            # Like 7-Zip, list the CRCs as part of the substreams info
+            substreams = b'\x08\x0a\x01' + b''.join(struct.pack(
+                '<I', crc32(d)) for d in streams) + b'\x00'
+            streams_info = _7z_streams_info(0, [len(d) for d in streams],
+                [copy_folder] * len(streams), [len(d) for d in streams],
+                substreams=substreams)
+        header += b'\x04' + streams_info
+    empty_streams = [not d for _p, d in archive_files]
+    files_info = _7z_number(len(archive_files))
+    if any(empty_streams):
+        files_info += b'\x0e' + _7z_number(len(
+            ebits := _7z_bits(empty_streams))) + ebits
+        files_info += b'\x0f' + _7z_number(len(fbits := _7z_bits(
+            [d is not None for _p, d in archive_files if not d]))) + fbits
+    names = b'\x00' + ''.join(f'{p}\0' for p, _d in archive_files).encode(
+        'utf-16-le')
+    files_info += b'\x11' + _7z_number(len(names)) + names + b'\x00'
+    header += b'\x05' + files_info + b'\x00'
+    if encode_header:
+        header_size = len(header)
+        header_crc = crc32(header)
+        header = lzma.compress(header, format=lzma.FORMAT_RAW, filters=[
+            {'id': lzma.FILTER_LZMA2, 'dict_size': 1 << 20}])
+        # A dictionary size byte of 16 stands for 1 MiB
+        lzma2_folder = _7z_folder(b'\x21', b'\x10')
+        encoded_header = b'\x17' + _7z_streams_info(len(packed),
+            [len(header)], [lzma2_folder], [header_size], [header_crc])
+        packed += header
+        header = encoded_header
+    next_header = struct.pack('<QQI', len(packed), len(header), crc32(header))
+    with open(archive_path, 'wb') as out:
+        out.write(b"7z\xbc\xaf'\x1c\x00\x04" +
+                  struct.pack('<I', crc32(next_header)) + next_header)
+        out.write(packed)
+        out.write(header)
+
+def _listed_entries(archive_path):
+    listed = []
+    list_archive(archive_path, lambda k, v: listed.append((k, v)))
+    return listed
+
+def _expected_entries(archive_files, solid):
+    expected = [('Solid', '+' if solid else '-')]
+    for entry_path, entry_data in archive_files:
+        expected.extend([('Path', entry_path.replace('/', os.sep)),
+            ('Size', f'{len(entry_data or b"")}'),
+            ('Attributes', 'A' if entry_data is not None else 'D'),
+            ('CRC', f'{crc32(entry_data):08X}' if entry_data else ''),
+            ('Method', '')])
+    return expected
+
+_7z_test_files = [('Meshes/test.nif', b'nif' * 100),
+                  ('Textures/test.dds', b'dds' * 300),
+                  ('test.esp', b'TES4')]
+
+def test_list_archive_7z_non_solid(tmp_path):
+    """Test listing a 7z archive with one folder per file."""
+    _write_7z(archive_path := tmp_path / 'non solid.7z', _7z_test_files)
+    assert _listed_entries(archive_path) == _expected_entries(
+        _7z_test_files, False)
+
+def test_list_archive_7z_solid(tmp_path):
+    """Test listing a solid 7z archive, where one folder holds all files."""
+    _write_7z(archive_path := tmp_path / 'solid.7z', _7z_test_files,
+              solid=True)
+    assert _listed_entries(archive_path) == _expected_entries(
+        _7z_test_files, True)
+
+def test_list_archive_7z_empty_streams(tmp_path):
+    """Test listing a 7z archive holding directories and empty files next
+    to regular files, and one that holds nothing but those."""
+    mixed_files = [('Meshes', None), ('Meshes/test.nif', b'nif' * 100),
+                   ('empty.txt', b''), ('test.esp', b'TES4')]
+    for test_files in (mixed_files, [('Meshes', None), ('empty.txt', b'')]):
+        _write_7z(archive_path := tmp_path / 'empty streams.7z', test_files)
+        # Empty files have no stream, hence no CRC
+        assert _listed_entries(archive_path) == _expected_entries(
+            test_files, False)
+
+def test_list_archive_7z_empty(tmp_path):
+    """Test listing a 7z archive without any files."""
+    _write_7z(archive_path := tmp_path / 'empty.7z', [])
+    assert _listed_entries(archive_path) == [('Solid', '-')]
+    # 7-Zip writes an empty archive as a bare signature header
+    with open(archive_path, 'wb') as out:
+        out.write(b"7z\xbc\xaf'\x1c\x00\x04" + struct.pack('<I', crc32(
+            bytes(20))) + bytes(20))
+    assert _listed_entries(archive_path) == [('Solid', '-')]
+
+def test_list_archive_7z_encoded_header(tmp_path):
+    """Test listing 7z archives with an LZMA2-compressed header."""
+    for solid in (False, True):
+        _write_7z(archive_path := tmp_path / 'encoded.7z', _7z_test_files,
+                  solid=solid, encode_header=True)
+        assert _listed_entries(archive_path) == _expected_entries(
+            _7z_test_files, solid)
+
+def test_list_archive_7z_fallback(tmp_path, monkeypatch):
+    """Test that 7z archives we can't parse are listed by 7z instead."""
+    slt_output = ('Solid = +\nPath = test.esp\nSize = 4\nAttributes = A\n'
+                  'CRC = 0000ABCD\nMethod = LZMA2:24\n')
+    ran_commands = []
+    class _FakeProc:
+        def communicate(self):
+            return slt_output, ''
+    def _fake_popen(command, **_kwargs):
+        ran_commands.append(command)
+        return _FakeProc()
+    monkeypatch.setattr(archives, 'popen_common', _fake_popen)
+    _write_7z(archive_path := tmp_path / 'corrupted.7z', _7z_test_files)
+    with open(archive_path, 'r+b') as ins: # break the header's CRC
+        ins.seek(-1, os.SEEK_END)
+        last_byte = ins.read(1)
+        ins.seek(-1, os.SEEK_END)
+        ins.write(bytes([last_byte[0] ^ 0xFF]))
+    assert _listed_entries(archive_path) == [('Solid', '+'),
+        ('Path', 'test.esp'), ('Size', '4'), ('Attributes', 'A'),
+        ('CRC', '0000ABCD'), ('Method', 'LZMA2:24')]
+    assert len(ran_commands) == 1
+    # Valid archives never run 7z
+    _write_7z(archive_path, _7z_test_files)
+    _listed_entries(archive_path)
+    assert len(ran_commands) == 1
@@ -21,12 +21,16 @@
 #
 # =============================================================================
 import copy
+import os
+import struct
+from zlib import crc32
 
 import pytest
 
 from ..bolt import CIstr, DefaultFNDict, DefaultLowerDict, FName, FNDict, \
     GPath, GPath_no_norm, LooseVersion, LowerDict, OrderedLowerDict, Path, \
-    Rounder, SigToStr, StrToSig, decoder, encode, getbestencoding, os_name
+    Progress, Rounder, SigToStr, StringTable, StrToSig, decoder, encode, \
+    getbestencoding, os_name, threaded_crcs
 
 def test_getbestencoding():
     """Tests getbestencoding. Keep this one small, we don't want to test
@@ -454,6 +458,77 @@ def test_dict_keys(self):
         if os_name == 'nt': assert not GPath('c:/random/path.txt') in dd
         assert not GPath(r'c:\random\path.txt') in dd
 
+def test_threaded_crcs(tmp_path):
+    test_files = {}
+    for i in range(6):
+        test_file = tmp_path / f'file{i}.bin'
+        test_file.write_bytes(bytes(range(i * 40)) * 5000)
+        test_files[i] = test_file
+    expected = {i: crc32(f.read_bytes()) for i, f in test_files.items()}
+    assert dict(threaded_crcs(test_files)) == expected
+    assert dict(threaded_crcs({0: test_files[0]})) == {0: expected[0]}
+    # Missing files get a None crc
+    assert dict(threaded_crcs({**test_files, 'missing': tmp_path / 'm'})) == {
+        **expected, 'missing': None}
+    # Closing the generator early must not hang
+    crcs_gen = threaded_crcs(test_files)
+    next(crcs_gen)
+    crcs_gen.close()
+
+def _write_strings(strs_path, strs_dict, formatted):
+    """Write a strings file holding strs_dict, an id -> bytes dict."""
+    strs_data = b''
+    directory = b''
+    for str_id, str_bytes in strs_dict.items():
+        directory += struct.pack('=2I', str_id, len(strs_data))
+        if formatted:
+            strs_data += struct.pack('=I', len(str_bytes) + 1)
+        strs_data += str_bytes + b'\0'
+    strs_path.write_bytes(struct.pack('=2I', len(strs_dict), len(strs_data)) +
+                          directory + strs_data)
+
+def test_string_table(tmp_path):
+    strs_table = StringTable()
+    for strs_ext, formatted in (('STRINGS', False), ('DLSTRINGS', True)):
+        strs_path = tmp_path / f'Test_English.{strs_ext}'
+        _write_strings(strs_path, {1: f'One {strs_ext}'.encode(),
+                                   2: 'Tw\u00f6'.encode()}, formatted)
+        strs_table.loadFile(GPath(f'{strs_path}'), Progress())
+        # The files are read into memory, so they can be replaced right away
+        _write_strings(strs_path, {1: b'Replaced'}, formatted)
+        os.remove(strs_path)
+    assert 3 not in strs_table
+    assert 1 in strs_table
+    # Later files win
+    assert strs_table[1] == 'One DLSTRINGS'
+    assert strs_table.get(2) == 'Tw\u00f6'
+    assert strs_table.get(3) is None
+    strs_table.clear()
+    assert not strs_table
+    assert 1 not in strs_table
+
+def test_string_table_views(tmp_path):
+    """Check that len, iteration and the views cover the strings that have
+    not been decoded yet."""
+    strs_table = StringTable()
+    assert len(strs_table) == 0
+    for strs_name, strs_dict in (('First', {1: b'One', 2: b'Two'}),
+                                 ('Second', {2: b'Deux', 3: b'Trois'})):
+        strs_path = tmp_path / f'{strs_name}_English.STRINGS'
+        _write_strings(strs_path, strs_dict, formatted=False)
+        strs_table.loadFile(GPath(f'{strs_path}'), Progress())
+        if strs_name == 'First':
+            assert strs_table[2] == 'Two' # decode one before it is replaced
+    assert len(strs_table) == 3
+    assert sorted(strs_table) == [1, 2, 3]
+    assert sorted(strs_table.keys()) == [1, 2, 3]
+    assert 3 in strs_table.keys()
+    assert sorted(strs_table.values()) == ['Deux', 'One', 'Trois']
+    assert dict(strs_table.items()) == {1: 'One', 2: 'Deux', 3: 'Trois'}
+    strs_table.clear()
+    assert len(strs_table) == 0
+    assert [*strs_table.items()] == []
+
 class TestRounder(object):
 
     def test__eq__(self):
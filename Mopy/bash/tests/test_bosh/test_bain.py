@@ -23,7 +23,8 @@
 # =============================================================================
 import os
 
-from ...bosh.bain import _remove_empty_dirs
+from ... import bolt
+from ...bosh.bain import Installer, _pack_file_table, _remove_empty_dirs
 from ...wbtemp import TempDir
 
 def test__remove_empty_dirs():
@@ -33,3 +34,23 @@ def test__remove_empty_dirs():
         os.mkdir(os.path.join(cl, 'farmclothes02'))
         _remove_empty_dirs(tex)
         assert not os.path.exists(cl)
+
+def test_lazy_file_tables():
+    """Check that packed file tables are only unpacked when accessed, and
+    are pickled as loaded until then."""
+    inst = Installer.__new__(Installer)
+    inst.initDefault()
+    file_table = [('a.esp', 1, 2), (os.path.join('meshes', 'b.nif'), 3, 4)]
+    inst.fileSizeCrcs = packed = _pack_file_table(file_table)
+    inst.src_sizeCrcDate = _pack_file_table(
+        bolt.LowerDict({'a.esp': (1, 2, 3.0)}))
+    assert inst.num_of_files == 2
+    assert [*inst._iter_file_sizes_crcs()] == file_table
+    pickled = dict(zip(inst.persistent, inst._persistent_values()))
+    assert pickled['fileSizeCrcs'] is packed
+    assert inst.fileSizeCrcs == file_table # unpacked now
+    assert inst.src_sizeCrcDate['A.ESP'] == (1, 2, 3.0)
+    pickled = dict(zip(inst.persistent, inst._persistent_values()))
+    assert pickled['fileSizeCrcs'] == packed
+    inst.fileSizeCrcs = file_table[:1]
+    assert inst.num_of_files == 1
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# GPL License and Copyright Notice ============================================
+#  This file is part of Wrye Bash.
+#
+#  Wrye Bash is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation, either version 3
+#  of the License, or (at your option) any later version.
+#
+#  Wrye Bash is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Wrye Bash.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  Wrye Bash copyright (C) 2005-2009 Wrye, 2010-2024 Wrye Bash Team
+#  https://github.com/wrye-bash
+#
+# =============================================================================
+"""Tests writing BSAs and BA2s and reading them back."""
+import os
+
+import pytest
+
+from ...bolt import GPath
+from ...bosh import dds_files
+from ...bosh.bsa_files import BA2, BSA, OblivionBsa, SkyrimSeBsa, \
+    StarfieldBA2
+from ...bosh.dds_files import DDSFile
+from ...exception import BSAError
+
+# Compressible and incompressible data, and sound files - which are never
+# compressed - in nested folders and folders with dots in their names
+_test_assets = {
+    'meshes\\armor\\test.nif': b'nif' * 200,
+    'meshes\\armor\\other.nif': bytes(range(256)),
+    'textures\\test.dir\\test.dds': b'dds' * 500,
+    'sound\\fx\\test.wav': b'wav' * 100,
+    'interface\\test.swf': b'',
+}
+
+def _write_sources(tmp_path):
+    """Write the sources of _test_assets, returning a dict mapping the asset
+    paths to the paths of their sources."""
+    asset_sources = {}
+    for i, (asset_path, asset_data) in enumerate(_test_assets.items()):
+        (src_path := tmp_path / f'source{i}').write_bytes(asset_data)
+        asset_sources[asset_path] = f'{src_path}'
+    return asset_sources
+
+def _os_path(asset_path):
+    return asset_path.replace('\\', os.sep)
+
+@pytest.mark.parametrize('bsa_type, bsa_ext, pack_kwargs', [
+    (OblivionBsa, 'bsa', {}), # v103
+    (OblivionBsa, 'bsa', {'compress': False}),
+    (BSA, 'bsa', {}), # v104
+    (BSA, 'bsa', {'embed_names': True}),
+    (SkyrimSeBsa, 'bsa', {}), # v105
+    (SkyrimSeBsa, 'bsa', {'compress': False, 'embed_names': True}),
+    (BA2, 'ba2', {}), # v1 GNRL
+    (BA2, 'ba2', {'compress': False}),
+])
+def test_pack_load_extract(tmp_path, bsa_type, bsa_ext, pack_kwargs):
+    """Test that packed archives list and extract the packed assets."""
+    asset_sources = _write_sources(tmp_path)
+    archive_path = GPath(f'{tmp_path / "Test Archive"}.{bsa_ext}')
+    bsa_type(archive_path).pack_assets(asset_sources, **pack_kwargs)
+    packed_bsa = bsa_type(archive_path, load_cache=True)
+    assert packed_bsa.assets == {_os_path(a) for a in _test_assets}
+    packed_bsa.extract_assets([*map(_os_path, _test_assets)],
+                              f'{tmp_path / "extracted"}')
+    for asset_path, asset_data in _test_assets.items():
+        extracted_path = tmp_path / 'extracted' / _os_path(asset_path)
+        assert extracted_path.read_bytes() == asset_data
+    # Folders and files are looked up by hash, check ours
+    if issubclass(bsa_type, BSA):
+        packed_bsa._load_bsa()
+        for folder_path, bsa_folder in packed_bsa.bsa_folders.items():
+            assert bsa_folder.folder_record.record_hash == \
+                   bsa_type.calculate_hash(folder_path, is_folder=True)
+            for file_name, file_record in bsa_folder.folder_assets.items():
+                assert file_record.record_hash == bsa_type.calculate_hash(
+                    file_name)
+
+def test_pack_starfield(tmp_path):
+    """Test that writing Starfield BA2s is refused."""
+    with pytest.raises(BSAError):
+        StarfieldBA2(GPath(f'{tmp_path / "Test"}.ba2')).pack_assets(
+            _write_sources(tmp_path))
+
+def _dxgi_format(fmt_name):
+    return next(f for f in dds_files._DXGIFormat.index_to_fmt.values()
+                if f._fmt_name == f'DXGI_FORMAT_{fmt_name}')
+
+@pytest.mark.parametrize('fmt_name, legacy_pf, is_cube_map', [
+    ('BC1_UNORM', dds_files._DDSPF_DXT1, False),
+    ('BC2_UNORM', dds_files._DDSPF_DXT3, False),
+    ('BC3_UNORM', dds_files._DDSPF_DXT5, True),
+    ('BC4_UNORM', dds_files._mk_fourcc(b'ATI1'), False),
+    ('BC5_UNORM', dds_files._mk_fourcc(b'ATI2'), False),
+    ('B8G8R8A8_UNORM', dds_files._DDSPF_A8R8G8B8, False),
+    ('B8G8R8X8_UNORM', dds_files._DDSPF_X8R8G8B8, False),
+    ('BC7_UNORM', None, False), # DXT10 header
+])
+def test_pack_textures(tmp_path, fmt_name, legacy_pf, is_cube_map):
+    """Test that archives of textures only are packed as DX10 BA2s, mapping
+    legacy DDS formats to DXGI, and that the textures survive extraction."""
+    dxgi_format = _dxgi_format(fmt_name)
+    src_dds = DDSFile(GPath(f'{tmp_path / "source.dds"}'))
+    src_dds.dds_header.dw_height = 16
+    src_dds.dds_header.dw_width = 8
+    src_dds.dds_header.dw_mip_map_count = 3
+    dxgi_format.setup_file(src_dds, use_legacy_formats=bool(legacy_pf))
+    if legacy_pf:
+        src_dds.dds_header.ddspf = legacy_pf
+    if is_cube_map:
+        src_dds.dds_header.dw_caps2.DDSCAPS2_CUBEMAP = True
+    src_dds.dds_contents = bytes(range(256)) * 4
+    src_dds.write_file()
+    asset_sources = {'textures\\a.dds': f'{src_dds.abs_path}',
+                     'textures\\sub\\b.dds': f'{src_dds.abs_path}'}
+    archive_path = GPath(f'{tmp_path / "Test - Textures"}.ba2')
+    BA2(archive_path).pack_assets(asset_sources)
+    packed_ba2 = BA2(archive_path, load_cache=True)
+    assert packed_ba2.bsa_header.ba2_files_type == b'DX10'
+    packed_ba2._load_bsa()
+    for tex_rec in (packed_ba2.bsa_folders['textures'].folder_assets['a.dds'],
+            packed_ba2.bsa_folders['textures\\sub'].folder_assets['b.dds']):
+        assert (tex_rec.height, tex_rec.width, tex_rec.num_mips) == (16, 8, 3)
+        assert tex_rec.dxgi_format.fmt_index == dxgi_format.fmt_index
+        assert tex_rec.cube_maps == (2049 if is_cube_map else 2048)
+    packed_ba2.extract_assets([*map(_os_path, asset_sources)],
+                              f'{tmp_path / "extracted"}')
+    for asset_path in asset_sources:
+        out_dds = DDSFile(GPath(f'{tmp_path / "extracted"}').join(
+            _os_path(asset_path)))
+        out_dds.load_file()
+        assert out_dds.dxgi_format.fmt_index == dxgi_format.fmt_index
+        assert out_dds.dds_contents == src_dds.dds_contents
+
+def test_pack_invalid_texture(tmp_path):
+    """Test that textures that we cannot map to a DXGI format are refused,
+    since DX10 BA2s have no way to store them."""
+    (src_path := tmp_path / 'source.dds').write_bytes(b'dds' * 500)
+    with pytest.raises(BSAError):
+        BA2(GPath(f'{tmp_path / "Test"}.ba2')).pack_assets(
+            {'textures\\a.dds': f'{src_path}'})
@@ -22,8 +22,10 @@
 # =============================================================================
 from pytest import fail
 
+from ... import loot_conditions, loot_parser
+from ...bolt import FName, GPath
 from ...exception import LexerError, ParserError
-from ...loot_parser import _process_condition_string
+from ...loot_parser import LOOTParser, _process_condition_string
 
 # Conditions: Canonical representation tests ----------------------------------
 class _ATestCanonical(object):
@@ -221,3 +223,95 @@ class TestParserRejectsDoubleBinary(_ATestParserRejects):
 class TestParserRejectsDoubleNot(_ATestParserRejects):
     """Tests if the parser rejects a double 'not' expression."""
     _condition = u'not not foo("bar")'
+
+# Masterlists -----------------------------------------------------------------
+_test_masterlist = '''plugins:
+  - name: 'Foo.esp'
+    tag: [Delev]
+  - name: 'Foo.*\\.esp'
+    tag: [Relev]
+  - name: 'Bar.*\\.esp'
+    tag: [Names]
+  - name: '.*\\.esp'
+    tag: [-Stats]
+'''
+
+def _load_test_parser(tmp_path, compiled_path=None):
+    masterlist_path = tmp_path / 'masterlist.yaml'
+    masterlist_path.write_text(_test_masterlist, encoding='utf-8')
+    return LOOTParser(GPath(masterlist_path), GPath(tmp_path / 'userlist'),
+        GPath(tmp_path / 'taglist'), compiled_path)
+
+def test_regex_matches(tmp_path):
+    """Tests that a plugin gets merged with every regex entry it matches."""
+    parser = _load_test_parser(tmp_path)
+    assert parser.get_plugin_tags(FName('Foo.esp')) == (
+        {'Delev', 'Relev'}, {'Stats'})
+    assert parser.get_plugin_tags(FName('barfoo.esp')) == ({'Names'},
+                                                           {'Stats'})
+    assert parser.get_plugin_tags(FName('Baz.esm')) == (set(), set())
+
+def test_compiled_masterlist(tmp_path, monkeypatch):
+    """Tests that a compiled masterlist is used instead of the YAML one if
+    the YAML one did not change."""
+    compiled_path = GPath(tmp_path / 'compiled.dat')
+    _load_test_parser(tmp_path, compiled_path)
+    assert compiled_path.is_file()
+    parsed_lists = []
+    real_parse_list = loot_parser._parse_list
+    def _parse_list(list_path):
+        parsed_lists.append(list_path)
+        return real_parse_list(list_path)
+    monkeypatch.setattr(loot_parser, '_parse_list', _parse_list)
+    parser = _load_test_parser(tmp_path, compiled_path)
+    masterlist_path = GPath(ml_file := tmp_path / 'masterlist.yaml')
+    parser.load_lists(masterlist_path)
+    assert not parsed_lists
+    assert parser.get_plugin_tags(FName('Foo.esp')) == (
+        {'Delev', 'Relev'}, {'Stats'})
+    # Editing the masterlist, even without changing its size, must make us
+    # parse it again
+    ml_file.write_text(_test_masterlist.replace('Delev', 'Names'),
+                       encoding='utf-8')
+    parser.load_lists(masterlist_path)
+    assert parsed_lists == [masterlist_path]
+    assert parser.get_plugin_tags(FName('Foo.esp')) == (
+        {'Names', 'Relev'}, {'Stats'})
+    # ...and the new compiled masterlist is used from then on
+    parser.load_lists(masterlist_path)
+    assert parsed_lists == [masterlist_path]
+
+def test_condition_results_reused(monkeypatch):
+    """Tests that a function call shared by several conditions is only
+    evaluated once until the evaluation context is reset."""
+    calls = []
+    def _fn_test(test_arg):
+        calls.append(test_arg)
+        return True
+    monkeypatch.setitem(loot_conditions._function_mapping, 'test', _fn_test)
+    loot_conditions.reset_eval_context()
+    assert _process_condition_string('test("a") and test("b")').evaluate()
+    assert _process_condition_string('not test("a")').evaluate() is False
+    assert calls == ['a', 'b']
+    loot_conditions.reset_eval_context()
+    assert _process_condition_string('test("a")').evaluate()
+    assert calls == ['a', 'b', 'a']
+
+def test_parsed_conditions_cleared(tmp_path, monkeypatch):
+    """Tests that the conditions parsed for the tags of a masterlist are
+    forgotten once the lists get loaded again."""
+    monkeypatch.setitem(loot_conditions._function_mapping, 'test',
+                        lambda _test_arg: True)
+    loot_conditions.reset_eval_context()
+    parser = _load_test_parser(tmp_path)
+    masterlist_path = GPath(ml_file := tmp_path / 'masterlist.yaml')
+    ml_file.write_text(_test_masterlist + '''  - name: 'Cond.esp'
+    tag:
+      - name: Names
+        condition: 'test("a")'
+''', encoding='utf-8')
+    parser.load_lists(masterlist_path)
+    assert parser.get_plugin_tags(FName('Cond.esp')) == ({'Names'}, {'Stats'})
+    assert 'test("a")' in loot_parser._parsed_conditions
+    parser.load_lists(masterlist_path)
+    assert not loot_parser._parsed_conditions
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+#
+# GPL License and Copyright Notice ============================================
+#  This file is part of Wrye Bash.
+#
+#  Wrye Bash is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation, either version 3
+#  of the License, or (at your option) any later version.
+#
+#  Wrye Bash is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Wrye Bash.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  Wrye Bash copyright (C) 2005-2009 Wrye, 2010-2024 Wrye Bash Team
+#  https://github.com/wrye-bash
+#
+# =============================================================================
+import struct
+
+import pytest
+
+from ...bolt import FName, GPath, structs_cache
+from ...brec import Subrecord
+from ...bosh._saves import SaveFile, SaveFileView
+
+@pytest.fixture(autouse=True)
+def _oblivion_subrecords(monkeypatch):
+    """Saves are Oblivion only, but initializing all games for the tests
+    leaves Morrowind's subrecord header format set."""
+    monkeypatch.setattr(Subrecord, 'sub_header_fmt', '=4sH')
+    monkeypatch.setattr(Subrecord, 'sub_header_unpack',
+                        structs_cache['=4sH'].unpack)
+    monkeypatch.setattr(Subrecord, 'sub_header_size', 6)
+
+def _sub(sub_sig, sub_data):
+    return sub_sig + struct.pack('=H', len(sub_data)) + sub_data
+
+def _created(rec_sig, rec_fid, full):
+    rec_data = _sub(b'EDID', b'Created\0') + _sub(b'FULL', full + b'\0')
+    return struct.pack('=4s4I', rec_sig, len(rec_data), 0, rec_fid,
+                       0) + rec_data
+
+def _change(rec_id, rec_kind, rec_flags, rec_data):
+    return struct.pack('=IBIBH', rec_id, rec_kind, rec_flags, 0,
+                       len(rec_data)) + rec_data
+
+def _write_save(save_path, created_recs, change_recs, fids):
+    """Write a minimal Oblivion save with the specified created and change
+    records and FormID array."""
+    save_header = b''.join([b'TES4SAVEGAME', struct.pack('=2B', 0, 125),
+        bytes(16), struct.pack('=3I', 125, 0, 1), struct.pack('=B', 7),
+        b'Player\0', struct.pack('=HB', 1, 8), b'Nowhere\0',
+        struct.pack('=fI', 1.0, 0), bytes(16), struct.pack('=3I', 8, 0, 0),
+        struct.pack('=2B', 1, 12), b'Oblivion.esm'])
+    # Pre-globals, no globals, four empty pre-created blocks and the created
+    # records themselves
+    save_body = b''.join([bytes(32), struct.pack('=H', 0), bytes(8 + 4),
+        struct.pack('=I', len(created_recs)), *created_recs,
+        bytes(8), *change_recs, struct.pack('=I', 0)])
+    fids_pointer = len(save_header) + 8 + len(save_body)
+    save_path.write_bytes(b''.join([save_header,
+        struct.pack('=2I', fids_pointer, len(change_recs)), save_body,
+        struct.pack(f'=I{len(fids)}I', len(fids), *fids),
+        struct.pack('=I', 0)]))
+
+class _FakeSaveInfo:
+    def __init__(self, save_path):
+        self.abs_path = GPath(save_path)
+        self.fn_key = FName(save_path.name)
+        self.fsize = save_path.stat().st_size
+
+@pytest.fixture
+def bloated_save(tmp_path):
+    """A save with 50 identical created spells, 3 change records with a null
+    reference and one change record that is fine."""
+    created_recs = [_created(b'SPEL', 0xFF000800 + i, b'Bloat')
+                    for i in range(50)]
+    created_recs.append(_created(b'ALCH', 0xFF000900, b'Potion'))
+    null_ref = struct.pack('=2I', 0, 1) # iref 1 -> fids[1] == 0
+    fine_ref = struct.pack('=2I', 0, 0)
+    change_recs = [_change(0xFF000A00 + i, 49, 2, null_ref) for i in range(3)]
+    change_recs.append(_change(0xFF000B00, 49, 2, fine_ref))
+    save_path = tmp_path / 'Bloated.ess'
+    _write_save(save_path, created_recs, change_recs, [0x14, 0])
+    return _FakeSaveInfo(save_path)
+
+class TestSaveFileView:
+    def test_find_bloating(self, bloated_save):
+        """Check that the streaming view finds the same bloating as a fully
+        loaded SaveFile."""
+        with SaveFileView(bloated_save) as save_view:
+            assert save_view.header.pcName == 'Player'
+            assert save_view.header.masters == ['Oblivion.esm']
+            assert save_view.fids.tolist() == [0x14, 0]
+            view_bloating = save_view.findBloating()
+        assert view_bloating == ({(b'SPEL', 'Bloat'): 50}, 3)
+        save_file = SaveFile(bloated_save)
+        save_file.load()
+        assert save_file.findBloating() == view_bloating
+
+    def test_iter_change_records(self, bloated_save):
+        """Check that change records can be iterated and that exiting the
+        view with a change record still held does not fail."""
+        with SaveFileView(bloated_save) as save_view:
+            change_recs = [(rec_id, rec_kind, rec_flags, bytes(rec_data))
+                           for rec_id, rec_kind, rec_flags, _ver, rec_data
+                           in save_view.iter_change_records()]
+            assert [r[0] for r in change_recs] == [0xFF000A00, 0xFF000A01,
+                                                   0xFF000A02, 0xFF000B00]
+            assert {r[1:3] for r in change_recs} == {(49, 2)}
+            change_iter = save_view.iter_change_records()
+            held_rec = next(change_iter)
+        with pytest.raises(ValueError): # released on exit
+            bytes(held_rec[-1])
+
+    def test_error_mid_iteration(self, tmp_path):
+        """Check that an error raised while iterating change records is not
+        masked by the view failing to close the save."""
+        # The iref of the second change record is outside the FormID array
+        change_recs = [_change(0xFF000A00 + i, 49, 2, struct.pack('=2I', 0, i))
+                       for i in (1, 5)]
+        save_path = tmp_path / 'Broken.ess'
+        _write_save(save_path, [], change_recs, [0x14, 0])
+        with pytest.raises(IndexError):
+            with SaveFileView(_FakeSaveInfo(save_path)) as save_view:
+                save_view.findBloating()
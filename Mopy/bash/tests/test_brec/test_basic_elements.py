@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+# GPL License and Copyright Notice ============================================
+#  This file is part of Wrye Bash.
+#
+#  Wrye Bash is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation, either version 3
+#  of the License, or (at your option) any later version.
+#
+#  Wrye Bash is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Wrye Bash.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  Wrye Bash copyright (C) 2005-2009 Wrye, 2010-2024 Wrye Bash Team
+#  https://github.com/wrye-bash
+#
+# =============================================================================
+from ...brec.basic_elements import MelObject
+from ...brec.complex_subrecords import _MelOmodInclude
+
+def _make_obj(obj_type, **attrs):
+    obj = obj_type()
+    for a, v in attrs.items():
+        setattr(obj, a, v)
+    return obj
+
+class TestMelObject(object):
+    """Tests MelObject comparisons."""
+    def test_with_slots_eq(self):
+        """Objects of slotted types created via with_slots compare by the
+        values of their set attributes."""
+        obj_type = MelObject.with_slots(['foo', 'bar'])
+        assert obj_type is MelObject.with_slots(['foo', 'bar'])
+        assert _make_obj(obj_type, foo=1, bar=2) == _make_obj(obj_type,
+                                                              foo=1, bar=2)
+        assert _make_obj(obj_type, foo=1, bar=2) != _make_obj(obj_type,
+                                                              foo=1, bar=3)
+        assert _make_obj(obj_type, foo=1) != _make_obj(obj_type, foo=1, bar=2)
+        assert _make_obj(obj_type, foo=1) != 1
+
+    def test_subclass_slots_eq(self):
+        """Slots of base classes are compared too, internal slots are not."""
+        class _Base(MelObject):
+            __slots__ = ('foo', '_internal')
+            _internal_slots = frozenset(['_internal'])
+        obj_type = _Base.with_slots(['bar'])
+        assert _make_obj(obj_type, foo=1, bar=2, _internal=3) == _make_obj(
+            obj_type, foo=1, bar=2, _internal=4)
+        assert _make_obj(obj_type, foo=1, bar=2) != _make_obj(obj_type,
+                                                              foo=2, bar=2)
+
+    def test_helper_class_eq(self):
+        """Helper classes that declare their own __slots__ compare by the
+        values of those."""
+        incl_attrs = {'oi_mod': None, 'oi_attach_point_index': 1,
+                      'oi_optional': 0, 'oi_dont_use_all': 0}
+        assert _make_obj(_MelOmodInclude, **incl_attrs) == _make_obj(
+            _MelOmodInclude, **incl_attrs)
+        assert _make_obj(_MelOmodInclude, **incl_attrs) != _make_obj(
+            _MelOmodInclude, **{**incl_attrs, 'oi_optional': 1})
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+# GPL License and Copyright Notice ============================================
+#  This file is part of Wrye Bash.
+#
+#  Wrye Bash is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation, either version 3
+#  of the License, or (at your option) any later version.
+#
+#  Wrye Bash is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Wrye Bash.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  Wrye Bash copyright (C) 2005-2009 Wrye, 2010-2024 Wrye Bash Team
+#  https://github.com/wrye-bash
+#
+# =============================================================================
+import io
+import struct
+import zlib
+
+from ...brec import FormId, ModReader, RecHeader, RecordType, \
+    lazy_record_type
+
+def _misc_data(misc_type, eid, full):
+    """Return the raw data of a MISC record with the specified EDID and
+    FULL."""
+    misc_rec = misc_type(RecHeader(b'MISC', arg2=FormId(0x800),
+                                   _entering_context=True))
+    misc_rec.eid = eid
+    misc_rec.full = full
+    misc_rec.setChanged()
+    misc_rec.getSize()
+    return misc_rec.data
+
+class TestLazyRecord(object):
+    """Tests loading records via the lazy variants of their types."""
+    def setup_method(self):
+        self.misc_type = RecordType.sig_to_class[b'MISC']
+        self.lazy_type = lazy_record_type(self.misc_type)
+        self.raw_data = _misc_data(self.misc_type, 'TestMisc', 'Test Item')
+
+    def _load_lazy(self, rec_data, rec_flags=0, decompressed=None):
+        """Load a lazy MISC record from rec_data, the way ModFile would."""
+        with ModReader('Test.esp', io.BytesIO(rec_data)) as ins:
+            if decompressed is not None:
+                ins.decompressed_records[0] = decompressed
+            lazy_rec = self.lazy_type(RecHeader(b'MISC', len(rec_data),
+                rec_flags, FormId(0x800), _entering_context=True), ins)
+            assert ins.atEnd()
+        return lazy_rec
+
+    def test_lazy_type(self):
+        """Tests that only simple MelRecord types get lazy variants."""
+        assert self.lazy_type is not self.misc_type
+        assert issubclass(self.lazy_type, self.misc_type)
+        assert lazy_record_type(self.misc_type) is self.lazy_type
+        tes4_type = RecordType.sig_to_class[b'TES4']
+        assert lazy_record_type(tes4_type) is tes4_type
+
+    def test_unpack_on_access(self):
+        """Tests that the record only holds its raw data until one of its
+        attributes is accessed, at which point it unpacks and turns into an
+        instance of its regular type."""
+        lazy_rec = self._load_lazy(self.raw_data)
+        assert type(lazy_rec) is self.lazy_type
+        assert lazy_rec.data == self.raw_data
+        assert lazy_rec.fid == FormId(0x800) # header attributes don't unpack
+        assert type(lazy_rec) is self.lazy_type
+        assert lazy_rec.eid == 'TestMisc'
+        assert type(lazy_rec) is self.misc_type
+        assert lazy_rec.full == 'Test Item'
+        # Unchanged records keep their data, so they can be dumped as is
+        assert lazy_rec.data == self.raw_data
+
+    def test_set_changed(self):
+        """Tests that setChanged unpacks the record and drops its now stale
+        raw data."""
+        lazy_rec = self._load_lazy(self.raw_data)
+        lazy_rec.setChanged()
+        assert type(lazy_rec) is self.misc_type
+        assert lazy_rec.changed
+        assert lazy_rec.data is None
+        assert lazy_rec.eid == 'TestMisc'
+        lazy_rec.getSize()
+        assert lazy_rec.data == self.raw_data
+
+    def test_set_before_unpack(self):
+        """Tests that setting an attribute before unpacking unpacks first,
+        so the new value is not overwritten by the unpacked data."""
+        lazy_rec = self._load_lazy(self.raw_data)
+        lazy_rec.full = 'Other Item'
+        assert type(lazy_rec) is self.misc_type
+        assert lazy_rec.full == 'Other Item'
+        assert lazy_rec.eid == 'TestMisc'
+
+    def test_get_type_copy(self):
+        """Tests that getTypeCopy returns an unpacked, changed copy that is
+        independent of the original."""
+        lazy_rec = self._load_lazy(self.raw_data)
+        rec_copy = lazy_rec.getTypeCopy()
+        assert type(rec_copy) is self.misc_type
+        assert rec_copy.changed
+        assert rec_copy.data is None
+        assert (rec_copy.eid, rec_copy.full) == ('TestMisc', 'Test Item')
+        rec_copy.full = 'Other Item'
+        assert lazy_rec.full == 'Test Item'
+        assert not lazy_rec.changed
+        assert lazy_rec.data == self.raw_data
+
+    def test_compressed(self):
+        """Tests lazily loading a compressed record, both with and without
+        its data having been decompressed ahead of time."""
+        comp_data = struct.pack('=I', len(self.raw_data)) + zlib.compress(
+            self.raw_data)
+        for decompressed in (None, self.raw_data):
+            lazy_rec = self._load_lazy(comp_data, 0x00040000, decompressed)
+            assert type(lazy_rec) is self.lazy_type
+            # Data decompressed ahead of time must not be kept alive
+            assert self.raw_data not in lazy_rec._load_ctx
+            assert lazy_rec.data == comp_data
+            assert lazy_rec.eid == 'TestMisc'
+            assert lazy_rec.full == 'Test Item'
+            assert lazy_rec.data == comp_data
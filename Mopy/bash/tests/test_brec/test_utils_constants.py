@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+#
+# GPL License and Copyright Notice ============================================
+#  This file is part of Wrye Bash.
+#
+#  Wrye Bash is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation, either version 3
+#  of the License, or (at your option) any later version.
+#
+#  Wrye Bash is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Wrye Bash.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  Wrye Bash copyright (C) 2005-2009 Wrye, 2010-2024 Wrye Bash Team
+#  https://github.com/wrye-bash
+#
+# =============================================================================
+from ...bolt import FName
+from ...brec import FormId
+
+class TestFormIdInterning(object):
+    """Tests that long fids are only interned inside FormId.interning."""
+    def test_interned_in_context(self):
+        with FormId.interning():
+            fid_a = FormId.from_tuple((FName('Test.esp'), 0x800))
+            fid_b = FormId.from_tuple((FName('Test.esp'), 0x800))
+            assert fid_a.long_fid is fid_b.long_fid
+            with FormId.interning(): # nesting keeps the outer table
+                fid_c = FormId.from_tuple((FName('Test.esp'), 0x800))
+                assert fid_c.long_fid is fid_a.long_fid
+        assert FormId._interned_long_fids is None
+        assert fid_a == fid_b == fid_c
+
+    def test_not_interned_outside_context(self):
+        fid_a = FormId.from_tuple((FName('Test.esp'), 0x800))
+        fid_b = FormId.from_tuple((FName('Test.esp'), 0x800))
+        assert fid_a.long_fid is not fid_b.long_fid
+        assert fid_a == fid_b
+        assert FormId._interned_long_fids is None
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# GPL License and Copyright Notice ============================================
+#  This file is part of Wrye Bash.
+#
+#  Wrye Bash is free software: you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation, either version 3
+#  of the License, or (at your option) any later version.
+#
+#  Wrye Bash is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with Wrye Bash.  If not, see <https://www.gnu.org/licenses/>.
+#
+#  Wrye Bash copyright (C) 2005-2009 Wrye, 2010-2024 Wrye Bash Team
+#  https://github.com/wrye-bash
+#
+# =============================================================================
+"""Spreads CPU-heavy work (e.g. scanning plugins) across all cores via a pool
+of worker processes.
+
+Worker processes are always spawned (never forked, forking a process running a
+GUI is asking for trouble), so they start out without translations and without
+a game. The pool initializer bootstraps both from the state of the main
+process. Because of that, this module *must not import anything at module
+level that needs translations or bush.game* - it gets imported by freshly
+spawned workers before their initializer has had a chance to run. The same
+goes for any module that houses functions passed to parallel_map."""
+import gettext
+import importlib
+import multiprocessing
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Below this many work items, spawning the workers costs more than it saves
+_MIN_PARALLEL_ITEMS = 8
+
+def _init_worker(game_module: str, game_class: str, game_path: str,
+        plugin_encoding: str):
+    """Pool initializer, sets up the worker process to mirror the parts of the
+    main process' state that plugin-reading code needs."""
+    # bush needs _() to be available - worker output is never shown to the
+    # user directly, so untranslated strings are fine
+    gettext.NullTranslations().install()
+    from . import bolt, bush
+    bolt.pluginEncoding = plugin_encoding
+    if bush.game is None:
+        game_type = getattr(importlib.import_module(game_module), game_class)
+        bush.game = game_type(bolt.GPath(game_path))
+        bush.game.init()
+
+def worker_count() -> int:
+    """Return the number of worker processes we'll use. Keeps one core free
+    for the main process, which is busy consuming the results."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+def use_pool(num_items: int) -> bool:
+    """Return True if it's worth it to spread num_items work items across a
+    pool of worker processes."""
+    return num_items >= _MIN_PARALLEL_ITEMS and worker_count() > 1
+
+def new_pool(max_workers: int | None = None) -> ProcessPoolExecutor:
+    """Create a new process pool whose workers are set up to read plugins for
+    the current game. Prefer parallel_map, which also takes care of progress
+    and cancellation."""
+    from . import bolt, bush
+    game_type = type(bush.game)
+    return ProcessPoolExecutor(max_workers=max_workers or worker_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker, initargs=(game_type.__module__,
+            game_type.__qualname__, f'{bush.game.gamePath}',
+            bolt.pluginEncoding))
+
+def parallel_map(work_func, work_items: dict, progress, item_msg=None) -> dict:
+    """Call work_func(*args) in a pool of worker processes for each key ->
+    args item in work_items. work_func must be a module-level function and
+    both args and its return value must be picklable.
+
+    :param progress: Called with the number of finished work items whenever an
+        item finishes. Should have been set up with setFull(len(work_items)).
+        If it raises (e.g. a CancelError because the user canceled), all
+        pending work is canceled and the exception is propagated.
+    :param item_msg: If specified, a callable taking a work item key and
+        returning the message to show in the progress dialog once that item
+        is finished.
+    :return: A dict mapping each key of work_items to the result of the
+        corresponding work_func call, in the same order as work_items."""
+    results = {}
+    pool = new_pool(min(worker_count(), len(work_items)))
+    try:
+        pending = {pool.submit(work_func, *w_args): w_key
+                   for w_key, w_args in work_items.items()}
+        for i, done_future in enumerate(as_completed(pending), start=1):
+            w_key = pending[done_future]
+            results[w_key] = done_future.result()
+            progress(i, item_msg(w_key) if item_msg else '')
+    finally:
+        # Don't wait for the work items that are still running if we were
+        # canceled or one of the workers blew up - just drop them
+        pool.shutdown(wait=False, cancel_futures=True)
+    return {w_key: results[w_key] for w_key in work_items}
+
+def ordered_prefetch(work_func, work_items: dict, lookahead: int | None = None,
+        item_sizes: dict | None = None, max_pending_size: int | None = None):
+    """Generator calling work_func(*args) in a pool of worker processes for
+    each key -> args item in work_items and yielding (key, result) tuples in
+    work_items order. Lets the caller consume results in sequence while the
+    workers already process the next items. Same restrictions on work_func
+    and args as for parallel_map.
+
+    :param lookahead: At most this many items are submitted ahead of the one
+        being consumed, so that results don't pile up in memory if the
+        consumer is slower than the workers. Defaults to twice the number of
+        workers.
+    :param item_sizes: Maps each key of work_items to an estimate of the size
+        of its result, e.g. the size of the file work_func reads. If given
+        along with max_pending_size, items are only submitted while the sizes
+        of the pending ones add up to at most max_pending_size - but at least
+        one item is always pending, however big it is."""
+    num_workers = min(worker_count(), len(work_items))
+    lookahead = lookahead or 2 * num_workers
+    if item_sizes is None or max_pending_size is None:
+        item_sizes, max_pending_size = defaultdict(int), 0
+    pool = new_pool(num_workers)
+    try:
+        to_submit = deque(work_items.items())
+        pending = deque()
+        pending_size = 0
+        def _submit_next():
+            nonlocal pending_size
+            while to_submit and len(pending) < lookahead:
+                next_key, next_args = to_submit[0]
+                next_size = item_sizes[next_key]
+                if pending and pending_size + next_size > max_pending_size:
+                    break
+                to_submit.popleft()
+                pending.append((next_key, next_size,
+                                pool.submit(work_func, *next_args)))
+                pending_size += next_size
+        _submit_next()
+        while pending:
+            w_key, w_size, w_future = pending.popleft()
+            pending_size -= w_size
+            _submit_next()
+            yield w_key, w_future.result()
+    finally:
+        # Runs when the generator is closed too, e.g. if the consumer was
+        # canceled - don't wait for the pending items
+        pool.shutdown(wait=False, cancel_futures=True)